@@ -5,7 +5,7 @@ https://oss.oracle.com/licenses/upl.
 """
 
 from datetime import datetime
-from typing import Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 import oci
 from pydantic import BaseModel, Field
@@ -246,3 +246,45 @@ def map_update_problem_status_details(
         status=getattr(upd, "status", None),
         comment=getattr(upd, "comment", None),
     )
+
+
+class ProblemQueryResult(BaseModel):
+    """Result of a query against the locally synced problems."""
+
+    synced_count: int = Field(
+        0, description="Problems added or changed by the sync before the query."
+    )
+    store_size: int = Field(0, description="Problems held for the compartment.")
+    time_synced: Optional[datetime] = Field(
+        None, description="When the problems were last synced (RFC3339)."
+    )
+    total_matches: int = Field(0, description="Problems matching the filters.")
+    groups: Optional[List[Dict[str, Any]]] = Field(
+        None, description="Matching problem counts per group, most first."
+    )
+    problems: List[Problem] = Field(
+        default_factory=list,
+        description="The most recently detected matching problems, up to the limit.",
+    )
+
+
+class ProblemStatusOutcome(BaseModel):
+    """Outcome of updating the status of one problem."""
+
+    problem_id: str = Field(..., description="The OCID of the problem.")
+    success: bool = Field(..., description="Whether the status was updated.")
+    lifecycle_detail: Optional[str] = Field(
+        None, description="The status of the problem after the update."
+    )
+    error: Optional[str] = Field(None, description="Why the update failed.")
+
+
+class BulkProblemStatusResult(BaseModel):
+    """Result of updating the status of several problems."""
+
+    requested: int = Field(0, description="Problems whose status was to be updated.")
+    updated: int = Field(0, description="Problems updated successfully.")
+    failed: int = Field(0, description="Problems that could not be updated.")
+    outcomes: List[ProblemStatusOutcome] = Field(
+        default_factory=list, description="The outcome for each problem."
+    )
@@ -5,6 +5,9 @@ https://oss.oracle.com/licenses/upl.
 """
 
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from logging import Logger
 from typing import Literal, Optional
@@ -13,9 +16,20 @@ import oci
 from fastmcp import FastMCP
 from oci.cloud_guard import CloudGuardClient
 from oracle.oci_cloud_guard_mcp_server.models import (
+    BulkProblemStatusResult,
     Problem,
+    ProblemQueryResult,
+    ProblemStatusOutcome,
     map_problem,
 )
+from oracle.oci_cloud_guard_mcp_server.store import (
+    PROBLEM_DIMENSIONS,
+    ProblemSet,
+    ProblemSetKey,
+    ProblemStore,
+    count_problems,
+    filter_problems,
+)
 from pydantic import Field
 
 from . import __project__, __version__
@@ -24,6 +38,14 @@ logger = Logger(__name__, level="INFO")
 
 mcp = FastMCP(name=__project__)
 
+PROBLEM_PAGE_SIZE = 1000
+MAX_CONCURRENT_UPDATES = 8
+MAX_BULK_PROBLEMS = 100
+MAX_RETRIES = 6
+BACKOFF_BASE_SECONDS = 0.5
+
+problem_store = ProblemStore()
+
 
 def get_cloud_guard_client():
     config = oci.config.from_file(
@@ -126,6 +148,281 @@ def update_problem_status(
     return map_problem(problem)
 
 
+def call_with_backoff(operation, *args, **kwargs):
+    """Call an OCI operation, retrying with exponential backoff when throttled (429)"""
+    for attempt in range(MAX_RETRIES):
+        try:
+            return operation(*args, **kwargs)
+        except oci.exceptions.ServiceError as e:
+            if e.status != 429 or attempt == MAX_RETRIES - 1:
+                raise
+            delay = BACKOFF_BASE_SECONDS * (2**attempt)
+            time.sleep(delay + random.uniform(0, delay))
+
+
+def list_all_pages(operation, **kwargs) -> list:
+    """
+    Call a paginated list operation until there are no more pages, retrying
+    each page when throttled
+    """
+    items = []
+    has_next_page = True
+    next_page = None
+    while has_next_page:
+        response = call_with_backoff(operation, page=next_page, **kwargs)
+        items.extend(response.data.items)
+        has_next_page = response.has_next_page
+        next_page = response.next_page if hasattr(response, "next_page") else None
+    return items
+
+
+def sync_problems(
+    cloud_guard_client, key: ProblemSetKey, initial_days: int, full: bool = False
+) -> tuple[ProblemSet, int]:
+    """
+    Fetch every page of problems detected since the set's cursor, or over the
+    last initial_days for a new set, and merge them into the set. A full sync
+    fetches into a new set that replaces the stored one only once every page
+    has been fetched, so a failed sync leaves the stored set as it was
+    """
+    now = datetime.now(timezone.utc)
+    with problem_store.lock(key):
+        problem_set = ProblemSet() if full else problem_store.get(key)
+        since = problem_set.cursor or now - timedelta(days=initial_days)
+        kwargs = {
+            "compartment_id": key.compartment_id,
+            "time_last_detected_greater_than_or_equal_to": since,
+            "limit": PROBLEM_PAGE_SIZE,
+        }
+        if key.compartment_id_in_subtree:
+            kwargs["compartment_id_in_subtree"] = True
+            kwargs["access_level"] = "ACCESSIBLE"
+        summaries = list_all_pages(cloud_guard_client.list_problems, **kwargs)
+        changed = problem_set.upsert(map_problem(summary) for summary in summaries)
+        problem_set.synced_at = now
+        if full:
+            problem_store.put(key, problem_set)
+    return problem_set, changed
+
+
+@mcp.tool(
+    name="query_problems",
+    description="Filters, counts and groups Cloud Guard problems from a local store "
+    "that is synced incrementally: each call only fetches the problems detected "
+    "since the newest one already held, across every page.",
+)
+def query_problems(
+    compartment_id: str = Field(..., description="The OCID of the compartment"),
+    compartment_id_in_subtree: bool = Field(
+        True, description="Whether to include the problems of all subcompartments"
+    ),
+    risk_levels: Optional[list[str]] = Field(
+        None, description="Only problems with one of these risk levels"
+    ),
+    resource_types: Optional[list[str]] = Field(
+        None, description="Only problems on one of these resource types"
+    ),
+    regions: Optional[list[str]] = Field(
+        None, description="Only problems found in one of these regions"
+    ),
+    detector_rule_ids: Optional[list[str]] = Field(
+        None, description="Only problems raised by one of these detector rules"
+    ),
+    lifecycle_details: Optional[list[str]] = Field(
+        ["OPEN"],
+        description="Only problems in one of these states: OPEN, RESOLVED, "
+        "DISMISSED or DELETED. Default: OPEN",
+    ),
+    group_by: Optional[list[str]] = Field(
+        None,
+        description="Count the matching problems per combination of these fields: "
+        + ", ".join(PROBLEM_DIMENSIONS),
+    ),
+    limit: int = Field(
+        50, description="Maximum number of matching problems to return, newest first"
+    ),
+    sync: bool = Field(
+        True, description="Whether to fetch newly detected problems before querying"
+    ),
+    full_sync: bool = Field(
+        False,
+        description="Whether to discard the stored problems and sync the initial "
+        "window again, e.g. to pick up status changes made outside this server",
+    ),
+    initial_days: int = Field(
+        30, description="Number of days to look back when syncing for the first time"
+    ),
+) -> ProblemQueryResult:
+    for dimension in group_by or []:
+        if dimension not in PROBLEM_DIMENSIONS:
+            raise ValueError(
+                f"Unknown group_by field {dimension!r}, "
+                f"expected one of {list(PROBLEM_DIMENSIONS)}"
+            )
+    key = ProblemSetKey(compartment_id, compartment_id_in_subtree)
+    synced_count = 0
+    if sync or full_sync:
+        problem_set, synced_count = sync_problems(
+            get_cloud_guard_client(), key, initial_days, full=full_sync
+        )
+    else:
+        problem_set = problem_store.get(key)
+
+    with problem_store.lock(key):
+        problems = list(problem_set.problems.values())
+    matches = filter_problems(
+        problems,
+        {
+            "risk_level": risk_levels,
+            "resource_type": resource_types,
+            "region": regions,
+            "detector_rule_id": detector_rule_ids,
+            "lifecycle_detail": lifecycle_details,
+        },
+    )
+    matches.sort(
+        key=lambda problem: problem.time_last_detected
+        or datetime.min.replace(tzinfo=timezone.utc),
+        reverse=True,
+    )
+    return ProblemQueryResult(
+        synced_count=synced_count,
+        store_size=len(problems),
+        time_synced=problem_set.synced_at,
+        total_matches=len(matches),
+        groups=count_problems(matches, group_by) if group_by else None,
+        problems=matches[:limit],
+    )
+
+
+@mcp.tool(
+    name="bulk_update_problem_status",
+    description="Changes the status of several problems at once, given either their "
+    "OCIDs or a compartment and filters that select them from the locally synced "
+    "problems. Updates run concurrently and are retried when throttled; the "
+    "outcome of each problem is returned.",
+)
+def bulk_update_problem_status(
+    status: Literal["OPEN", "RESOLVED", "DISMISSED", "DELETED"] = Field(
+        ..., description="Action taken by user: OPEN, RESOLVED, DISMISSED or DELETED"
+    ),
+    comment: Optional[str] = Field(None, description="A comment from the user"),
+    problem_ids: Optional[list[str]] = Field(
+        None, description="The OCIDs of the problems to update"
+    ),
+    compartment_id: Optional[str] = Field(
+        None,
+        description="Update the problems of this compartment that match the "
+        "filters instead of listing their OCIDs",
+    ),
+    compartment_id_in_subtree: bool = Field(
+        True, description="Whether to include the problems of all subcompartments"
+    ),
+    risk_levels: Optional[list[str]] = Field(
+        None, description="Only problems with one of these risk levels"
+    ),
+    resource_types: Optional[list[str]] = Field(
+        None, description="Only problems on one of these resource types"
+    ),
+    regions: Optional[list[str]] = Field(
+        None, description="Only problems found in one of these regions"
+    ),
+    detector_rule_ids: Optional[list[str]] = Field(
+        None, description="Only problems raised by one of these detector rules"
+    ),
+    lifecycle_details: Optional[list[str]] = Field(
+        ["OPEN"], description="Only problems in one of these states. Default: OPEN"
+    ),
+    max_problems: int = Field(
+        MAX_BULK_PROBLEMS,
+        description="Refuse to update more problems than this, as a safeguard "
+        "against filters that select more than intended",
+    ),
+    max_workers: int = Field(
+        MAX_CONCURRENT_UPDATES, description="Maximum number of concurrent updates"
+    ),
+    initial_days: int = Field(
+        30,
+        description="Number of days to look back when the compartment's problems "
+        "have not been synced yet",
+    ),
+) -> BulkProblemStatusResult:
+    if not problem_ids and not compartment_id:
+        raise ValueError("Provide either problem_ids or compartment_id")
+    if problem_ids and compartment_id:
+        raise ValueError("Provide either problem_ids or compartment_id, not both")
+    cloud_guard_client = get_cloud_guard_client()
+    if compartment_id:
+        key = ProblemSetKey(compartment_id, compartment_id_in_subtree)
+        problem_set, _ = sync_problems(cloud_guard_client, key, initial_days)
+        with problem_store.lock(key):
+            problems = list(problem_set.problems.values())
+        problem_ids = [
+            problem.id
+            for problem in filter_problems(
+                problems,
+                {
+                    "risk_level": risk_levels,
+                    "resource_type": resource_types,
+                    "region": regions,
+                    "detector_rule_id": detector_rule_ids,
+                    "lifecycle_detail": lifecycle_details,
+                },
+            )
+        ]
+    problem_ids = list(dict.fromkeys(problem_ids))
+    if len(problem_ids) > max_problems:
+        raise ValueError(
+            f"{len(problem_ids)} problems selected, more than max_problems="
+            f"{max_problems}; narrow the selection or raise max_problems"
+        )
+
+    details = oci.cloud_guard.models.UpdateProblemStatusDetails(
+        status=status, comment=comment
+    )
+
+    def update(problem_id: str) -> tuple[ProblemStatusOutcome, Optional[Problem]]:
+        try:
+            response = call_with_backoff(
+                cloud_guard_client.update_problem_status,
+                problem_id=problem_id,
+                update_problem_status_details=details,
+            )
+        except oci.exceptions.ServiceError as e:
+            return (
+                ProblemStatusOutcome(
+                    problem_id=problem_id,
+                    success=False,
+                    error=f"{e.status}: {e.message}",
+                ),
+                None,
+            )
+        problem = map_problem(response.data)
+        return (
+            ProblemStatusOutcome(
+                problem_id=problem_id,
+                success=True,
+                lifecycle_detail=problem.lifecycle_detail,
+            ),
+            problem,
+        )
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(len(problem_ids), max_workers))
+    ) as executor:
+        results = list(executor.map(update, problem_ids))
+
+    problem_store.update(problem for _, problem in results if problem is not None)
+    outcomes = [outcome for outcome, _ in results]
+    updated = sum(outcome.success for outcome in outcomes)
+    return BulkProblemStatusResult(
+        requested=len(outcomes),
+        updated=updated,
+        failed=len(outcomes) - updated,
+        outcomes=outcomes,
+    )
+
+
 def main():
     mcp.run()
 
@@ -0,0 +1,143 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, NamedTuple, Optional
+
+from oracle.oci_cloud_guard_mcp_server.models import Problem
+
+# Problem fields that queries can filter and group by
+PROBLEM_DIMENSIONS = (
+    "risk_level",
+    "resource_type",
+    "region",
+    "detector_rule_id",
+    "detector_id",
+    "lifecycle_state",
+    "lifecycle_detail",
+    "compartment_id",
+)
+
+
+class ProblemSetKey(NamedTuple):
+    compartment_id: str
+    compartment_id_in_subtree: bool
+
+
+@dataclass
+class ProblemSet:
+    """The problems of a compartment scope, keyed by OCID"""
+
+    problems: dict[str, Problem] = field(default_factory=dict)
+    # Newest time_last_detected seen so far, where the next sync resumes
+    cursor: Optional[datetime] = None
+    synced_at: Optional[datetime] = None
+
+    def upsert(self, problems: Iterable[Problem]) -> int:
+        """Add or replace problems, returning how many were new or changed"""
+        changed = 0
+        for problem in problems:
+            if self.problems.get(problem.id) != problem:
+                changed += 1
+            self.problems[problem.id] = problem
+            if problem.time_last_detected is not None and (
+                self.cursor is None or problem.time_last_detected > self.cursor
+            ):
+                self.cursor = problem.time_last_detected
+        return changed
+
+
+def problem_values(problem: Problem, dimension: str) -> list[Optional[str]]:
+    """
+    The values of a problem for a dimension; a problem can be found in several
+    regions and counts towards each of them
+    """
+    if dimension == "region":
+        return list(problem.regions or []) or [problem.region]
+    return [getattr(problem, dimension)]
+
+
+def filter_problems(
+    problems: Iterable[Problem], filters: dict[str, Optional[list[str]]]
+) -> list[Problem]:
+    """The problems having one of the listed values for every filtered dimension"""
+    active = {
+        dimension: {value.lower() for value in values}
+        for dimension, values in filters.items()
+        if values
+    }
+    return [
+        problem
+        for problem in problems
+        if all(
+            any(
+                value is not None and value.lower() in accepted
+                for value in problem_values(problem, dimension)
+            )
+            for dimension, accepted in active.items()
+        )
+    ]
+
+
+def count_problems(problems: Iterable[Problem], group_by: list[str]) -> list[dict]:
+    """Count problems per combination of the group_by dimensions, most first"""
+    counts: Counter = Counter()
+    for problem in problems:
+        combinations = [()]
+        for dimension in group_by:
+            combinations = [
+                combination + (value,)
+                for combination in combinations
+                for value in problem_values(problem, dimension)
+            ]
+        counts.update(combinations)
+    return [
+        dict(zip(group_by, combination), count=count)
+        for combination, count in counts.most_common()
+    ]
+
+
+class ProblemStore:
+    """The synced problem sets, each with a lock serializing its syncs"""
+
+    def __init__(self):
+        self._sets: dict[ProblemSetKey, ProblemSet] = {}
+        self._locks: dict[ProblemSetKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._sets.clear()
+            self._locks.clear()
+
+    def lock(self, key: ProblemSetKey) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key: ProblemSetKey) -> ProblemSet:
+        with self._lock:
+            return self._sets.setdefault(key, ProblemSet())
+
+    def put(self, key: ProblemSetKey, problem_set: ProblemSet):
+        with self._lock:
+            self._sets[key] = problem_set
+
+    def update(self, problems: Iterable[Problem]):
+        """Replace the stored copies of the given problems in every set holding them"""
+        problems = list(problems)
+        with self._lock:
+            keys = list(self._sets)
+        for key in keys:
+            with self.lock(key):
+                problem_set = self.get(key)
+                problem_set.upsert(
+                    problem
+                    for problem in problems
+                    if problem.id in problem_set.problems
+                )
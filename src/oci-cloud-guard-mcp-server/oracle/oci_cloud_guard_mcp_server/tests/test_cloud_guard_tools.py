@@ -5,12 +5,41 @@ https://oss.oracle.com/licenses/upl.
 """
 
 # noinspection PyPackageRequirements
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, create_autospec, patch
 
 import oci
 import pytest
 from fastmcp import Client
-from oracle.oci_cloud_guard_mcp_server.server import mcp
+from fastmcp.exceptions import ToolError
+from oracle.oci_cloud_guard_mcp_server.server import mcp, problem_store
+
+
+@pytest.fixture(autouse=True)
+def clear_problem_store():
+    problem_store.clear()
+    yield
+    problem_store.clear()
+
+
+def problems_response(items, next_page=None):
+    response = create_autospec(oci.response.Response)
+    response.data = oci.cloud_guard.models.ProblemCollection(items=items)
+    response.has_next_page = next_page is not None
+    response.next_page = next_page
+    return response
+
+
+def problem_summary(id, risk_level, resource_type, regions, time_last_detected):
+    return oci.cloud_guard.models.ProblemSummary(
+        id=id,
+        risk_level=risk_level,
+        resource_type=resource_type,
+        regions=regions,
+        lifecycle_state="ACTIVE",
+        lifecycle_detail="OPEN",
+        time_last_detected=time_last_detected,
+    )
 
 
 class TestResourceSearchTools:
@@ -113,3 +142,211 @@ class TestResourceSearchTools:
             assert result["id"] == problem_id
             assert result["lifecycle_detail"] == status
             assert result["comment"] == comment
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_cloud_guard_mcp_server.server.get_cloud_guard_client")
+    async def test_query_problems_syncs_incrementally(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        first = now - timedelta(days=2)
+        second = now - timedelta(days=1)
+
+        pages = {
+            None: problems_response(
+                [
+                    problem_summary(
+                        "p1", "HIGH", "Bucket", ["us-phoenix-1", "us-ashburn-1"], first
+                    )
+                ],
+                next_page="page2",
+            ),
+            "page2": problems_response(
+                [problem_summary("p2", "LOW", "Bucket", ["us-phoenix-1"], second)]
+            ),
+        }
+        mock_client.list_problems.side_effect = lambda page, **kwargs: pages[page]
+
+        async with Client(mcp) as client:
+            grouped = (
+                await client.call_tool(
+                    "query_problems",
+                    {"compartment_id": "test_compartment", "group_by": ["region"]},
+                )
+            ).structured_content
+
+            pages[None] = problems_response(
+                [
+                    problem_summary("p2", "LOW", "Bucket", ["us-phoenix-1"], second),
+                    problem_summary("p3", "HIGH", "Instance", ["us-ashburn-1"], now),
+                ]
+            )
+            mock_client.list_problems.reset_mock()
+            high = (
+                await client.call_tool(
+                    "query_problems",
+                    {
+                        "compartment_id": "test_compartment",
+                        "risk_levels": ["high"],
+                        "group_by": ["resource_type"],
+                    },
+                )
+            ).structured_content
+
+        assert grouped["synced_count"] == 2
+        assert grouped["groups"] == [
+            {"region": "us-phoenix-1", "count": 2},
+            {"region": "us-ashburn-1", "count": 1},
+        ]
+        # The second sync resumes from the newest detection time
+        kwargs = mock_client.list_problems.call_args.kwargs
+        assert kwargs["time_last_detected_greater_than_or_equal_to"] == second
+        assert kwargs["compartment_id_in_subtree"] is True
+        assert high["synced_count"] == 1
+        assert high["store_size"] == 3
+        assert [problem["id"] for problem in high["problems"]] == ["p3", "p1"]
+        assert sorted(high["groups"], key=lambda group: group["resource_type"]) == [
+            {"resource_type": "Bucket", "count": 1},
+            {"resource_type": "Instance", "count": 1},
+        ]
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_cloud_guard_mcp_server.server.BACKOFF_BASE_SECONDS", 0)
+    @patch("oracle.oci_cloud_guard_mcp_server.server.get_cloud_guard_client")
+    async def test_full_sync_keeps_the_store_when_it_fails(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        now = datetime.now(timezone.utc)
+        failures = {"page2": [429]}
+
+        def list_problems(page, **kwargs):
+            if failures.get(page):
+                status = failures[page].pop(0)
+                raise oci.exceptions.ServiceError(status, "Error", {}, "failed")
+            if page is None:
+                return problems_response(
+                    [problem_summary("p1", "LOW", "Bucket", ["r1"], now)],
+                    next_page="page2",
+                )
+            return problems_response(
+                [problem_summary("p2", "LOW", "Bucket", ["r1"], now)]
+            )
+
+        mock_client.list_problems.side_effect = list_problems
+
+        async with Client(mcp) as client:
+            synced = (
+                await client.call_tool(
+                    "query_problems", {"compartment_id": "test_compartment"}
+                )
+            ).structured_content
+            failures["page2"] = [500]
+            with pytest.raises(ToolError):
+                await client.call_tool(
+                    "query_problems",
+                    {"compartment_id": "test_compartment", "full_sync": True},
+                )
+            kept = (
+                await client.call_tool(
+                    "query_problems",
+                    {"compartment_id": "test_compartment", "sync": False},
+                )
+            ).structured_content
+
+        # The throttled page was retried rather than failing the sync
+        assert synced["synced_count"] == 2
+        assert kept["store_size"] == 2
+        assert kept["time_synced"] == synced["time_synced"]
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_cloud_guard_mcp_server.server.BACKOFF_BASE_SECONDS", 0)
+    @patch("oracle.oci_cloud_guard_mcp_server.server.get_cloud_guard_client")
+    async def test_bulk_update_problem_status(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        now = datetime.now(timezone.utc)
+        mock_client.list_problems.return_value = problems_response(
+            [
+                problem_summary("p1", "LOW", "Bucket", ["us-phoenix-1"], now),
+                problem_summary("p2", "LOW", "Bucket", ["us-phoenix-1"], now),
+                problem_summary("p3", "HIGH", "Bucket", ["us-phoenix-1"], now),
+                problem_summary("p4", "LOW", "Instance", ["us-phoenix-1"], now),
+            ]
+        )
+        throttled = {"p2"}
+
+        def update_problem_status(problem_id, update_problem_status_details):
+            if problem_id in throttled:
+                throttled.discard(problem_id)
+                raise oci.exceptions.ServiceError(
+                    429, "TooManyRequests", {}, "slow down"
+                )
+            if problem_id == "p4":
+                raise oci.exceptions.ServiceError(409, "Conflict", {}, "locked")
+            response = create_autospec(oci.response.Response)
+            response.data = oci.cloud_guard.models.Problem(
+                id=problem_id,
+                lifecycle_state="ACTIVE",
+                lifecycle_detail=update_problem_status_details.status,
+            )
+            return response
+
+        mock_client.update_problem_status.side_effect = update_problem_status
+
+        async with Client(mcp) as client:
+            by_filter = (
+                await client.call_tool(
+                    "bulk_update_problem_status",
+                    {
+                        "status": "DISMISSED",
+                        "compartment_id": "test_compartment",
+                        "risk_levels": ["LOW"],
+                        "resource_types": ["Bucket"],
+                        "initial_days": 7,
+                    },
+                )
+            ).structured_content
+            since = mock_client.list_problems.call_args.kwargs[
+                "time_last_detected_greater_than_or_equal_to"
+            ]
+            by_id = (
+                await client.call_tool(
+                    "bulk_update_problem_status",
+                    {"status": "RESOLVED", "problem_ids": ["p3", "p4", "p3"]},
+                )
+            ).structured_content
+            with pytest.raises(ToolError, match="problem_ids or compartment_id$"):
+                await client.call_tool(
+                    "bulk_update_problem_status", {"status": "RESOLVED"}
+                )
+            with pytest.raises(ToolError, match="not both"):
+                await client.call_tool(
+                    "bulk_update_problem_status",
+                    {
+                        "status": "RESOLVED",
+                        "problem_ids": ["p1"],
+                        "compartment_id": "test_compartment",
+                    },
+                )
+            still_open = (
+                await client.call_tool(
+                    "query_problems",
+                    {"compartment_id": "test_compartment", "sync": False},
+                )
+            ).structured_content
+
+        assert by_filter["updated"] == 2 and by_filter["failed"] == 0
+        assert now - since > timedelta(days=6) and now - since < timedelta(days=8)
+        assert {o["problem_id"] for o in by_filter["outcomes"]} == {"p1", "p2"}
+        assert by_id["requested"] == 2
+        assert by_id["outcomes"][1] == {
+            "problem_id": "p4",
+            "success": False,
+            "lifecycle_detail": None,
+            "error": "409: locked",
+        }
+        # The local store reflects the new statuses
+        assert [problem["id"] for problem in still_open["problems"]] == ["p4"]
+        # One client per valid bulk call; the throttled update was retried
+        assert mock_get_client.call_count == 2
+        assert mock_client.update_problem_status.call_count == 5
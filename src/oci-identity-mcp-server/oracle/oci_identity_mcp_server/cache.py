@@ -0,0 +1,47 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import threading
+import time
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+DEFAULT_TTL_SECONDS = 900
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TtlCache(Generic[K, V]):
+    """Caches one value per key, e.g. per tenancy, for ttl seconds"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        # Key -> (time loaded, value)
+        self._entries: dict[K, tuple[float, V]] = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def peek(self, key: K) -> Optional[V]:
+        """The cached value if it has not expired, without loading it"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def put(self, key: K, value: V):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+
+    def get(self, key: K, load: Callable[[], V], refresh: bool = False) -> V:
+        value = None if refresh else self.peek(key)
+        if value is None:
+            value = load()
+            self.put(key, value)
+        return value
@@ -0,0 +1,111 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import time
+from typing import Iterable, Optional
+
+PATH_SEPARATOR = "/"
+
+
+def is_active(compartment: dict) -> bool:
+    return compartment["lifecycle_state"] in (None, "ACTIVE")
+
+
+def normalize_path(path: str) -> str:
+    return PATH_SEPARATOR.join(
+        part for part in path.strip().lower().split(PATH_SEPARATOR) if part
+    )
+
+
+class CompartmentTree:
+    """
+    Every compartment of a tenancy, as compact dicts, with the full path of
+    each below the root and indexes by OCID, lowercased name, lowercased path
+    and parent for local lookups. Only active compartments are indexed by name
+    and path, so deleted ones are reachable by OCID alone and never shadow an
+    active compartment of the same name.
+    """
+
+    def __init__(
+        self,
+        root: dict,
+        compartments: Iterable[dict],
+        fetched_at: Optional[float] = None,
+    ):
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.root = dict(root, parent_id=None, path="", depth=0)
+        self.by_id: dict[str, dict] = {self.root["id"]: self.root}
+        self.children: dict[str, list[dict]] = {}
+        for compartment in compartments:
+            # Compartments whose parent is not visible get no path
+            self.by_id[compartment["id"]] = dict(compartment, path=None, depth=None)
+        for compartment in self.by_id.values():
+            if compartment["parent_id"] is not None:
+                self.children.setdefault(compartment["parent_id"], []).append(
+                    compartment
+                )
+
+        # Walk down from the root so every parent has its path before its children
+        self.by_name: dict[str, list[dict]] = {}
+        self.by_path: dict[str, dict] = {"": self.root}
+        pending = [self.root]
+        while pending:
+            parent = pending.pop()
+            for child in self.children.get(parent["id"], []):
+                child["path"] = (
+                    f"{parent['path']}{PATH_SEPARATOR}{child['name']}"
+                    if parent["path"]
+                    else child["name"]
+                )
+                child["depth"] = parent["depth"] + 1
+                if is_active(child) and is_active(parent):
+                    self.by_path[normalize_path(child["path"])] = child
+                pending.append(child)
+        for compartment in self.by_id.values():
+            if is_active(compartment):
+                self.by_name.setdefault(compartment["name"].lower(), []).append(
+                    compartment
+                )
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def resolve(self, reference: str) -> list[dict]:
+        """
+        Find compartments by OCID, full path below the root (e.g. "prod/app") or
+        name, in that order; names and paths are case-insensitive. Names are not
+        unique across the tree, so every compartment with the name is returned
+        """
+        reference = reference.strip()
+        if reference in self.by_id:
+            return [self.by_id[reference]]
+        if PATH_SEPARATOR in reference:
+            compartment = self.by_path.get(normalize_path(reference))
+            return [compartment] if compartment else []
+        return list(self.by_name.get(reference.lower(), []))
+
+    def subtree(
+        self, compartment_id: str, include_inactive: bool = False
+    ) -> list[dict]:
+        """The compartment and all of its descendants, parents before children"""
+        compartment = self.by_id.get(compartment_id)
+        if compartment is None:
+            return []
+        result = []
+        pending = [compartment]
+        while pending:
+            current = pending.pop()
+            if not include_inactive and not is_active(current):
+                continue
+            result.append(current)
+            pending.extend(
+                sorted(
+                    self.children.get(current["id"], []),
+                    key=lambda child: child["name"].lower(),
+                    reverse=True,
+                )
+            )
+        return result
@@ -0,0 +1,111 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import threading
+import time
+from typing import Iterable, Optional
+
+
+class MembershipGraph:
+    """
+    The users and groups of a tenancy, as compact dicts, and the group
+    memberships between them, with adjacency indexes in both directions and
+    indexes of users by lowercased name and email and of groups by lowercased
+    name. The memberships of single users or groups can be refreshed in place.
+    """
+
+    def __init__(
+        self,
+        users: Iterable[dict],
+        groups: Iterable[dict],
+        memberships: Iterable[dict],
+        fetched_at: Optional[float] = None,
+    ):
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.users = {user["id"]: user for user in users}
+        self.groups = {group["id"]: group for group in groups}
+        self.users_by_name: dict[str, list[dict]] = {}
+        for user in self.users.values():
+            for name in {user["name"], user.get("email")}:
+                if name:
+                    self.users_by_name.setdefault(name.lower(), []).append(user)
+        self.groups_by_name: dict[str, list[dict]] = {}
+        for group in self.groups.values():
+            self.groups_by_name.setdefault(group["name"].lower(), []).append(group)
+        # Membership OCID -> (user OCID, group OCID)
+        self.memberships: dict[str, tuple[str, str]] = {}
+        self.groups_by_user: dict[str, set[str]] = {}
+        self.users_by_group: dict[str, set[str]] = {}
+        # Lowercased references that matched no user or group after this
+        # graph was loaded, as ("user" or "group", reference)
+        self.misses: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        for membership in memberships:
+            self._add(membership)
+
+    def _add(self, membership: dict):
+        user_id, group_id = membership["user_id"], membership["group_id"]
+        self.memberships[membership["id"]] = (user_id, group_id)
+        self.groups_by_user.setdefault(user_id, set()).add(group_id)
+        self.users_by_group.setdefault(group_id, set()).add(user_id)
+
+    def _remove(self, membership_id: str):
+        user_id, group_id = self.memberships.pop(membership_id)
+        self.groups_by_user.get(user_id, set()).discard(group_id)
+        self.users_by_group.get(group_id, set()).discard(user_id)
+
+    def replace_memberships(
+        self,
+        memberships: Iterable[dict],
+        user_id: Optional[str] = None,
+        group_id: Optional[str] = None,
+    ):
+        """Replace the memberships of one user or one group with fresh ones"""
+        with self._lock:
+            stale = [
+                membership_id
+                for membership_id, (member, group) in self.memberships.items()
+                if (user_id is not None and member == user_id)
+                or (group_id is not None and group == group_id)
+            ]
+            for membership_id in stale:
+                self._remove(membership_id)
+            for membership in memberships:
+                self._add(membership)
+
+    def find_users(self, reference: str) -> list[dict]:
+        """Users by OCID, or by name or email, case-insensitively"""
+        reference = reference.strip()
+        if reference in self.users:
+            return [self.users[reference]]
+        return list(self.users_by_name.get(reference.lower(), []))
+
+    def find_groups(self, reference: str) -> list[dict]:
+        """Groups by OCID, or by name case-insensitively"""
+        reference = reference.strip()
+        if reference in self.groups:
+            return [self.groups[reference]]
+        return list(self.groups_by_name.get(reference.lower(), []))
+
+    def groups_of(self, user_id: str) -> list[dict]:
+        with self._lock:
+            group_ids = list(self.groups_by_user.get(user_id, ()))
+        return sorted(
+            (
+                self.groups[group_id]
+                for group_id in group_ids
+                if group_id in self.groups
+            ),
+            key=lambda group: group["name"].lower(),
+        )
+
+    def members_of(self, group_id: str) -> list[dict]:
+        with self._lock:
+            user_ids = list(self.users_by_group.get(group_id, ()))
+        return sorted(
+            (self.users[user_id] for user_id in user_ids if user_id in self.users),
+            key=lambda user: user["name"].lower(),
+        )
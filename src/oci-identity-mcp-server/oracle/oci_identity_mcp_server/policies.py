@@ -0,0 +1,296 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import re
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+
+VERB_RANKS = {"inspect": 1, "read": 2, "use": 3, "manage": 4}
+ALL_RESOURCES = "all-resources"
+# Members of the common aggregate resource types. Families that are not listed
+# here only match statements naming the family itself
+RESOURCE_FAMILIES = {
+    "object-family": {"buckets", "objects"},
+    "instance-family": {
+        "instances",
+        "instance-images",
+        "volume-attachments",
+        "vnic-attachments",
+        "instance-console-connection",
+        "console-histories",
+    },
+    "volume-family": {
+        "volumes",
+        "volume-attachments",
+        "volume-backups",
+        "boot-volume-backups",
+        "backup-policies",
+        "volume-groups",
+        "volume-group-backups",
+    },
+    "virtual-network-family": {
+        "vcns",
+        "subnets",
+        "route-tables",
+        "network-security-groups",
+        "security-lists",
+        "dhcp-options",
+        "private-ips",
+        "public-ips",
+        "internet-gateways",
+        "nat-gateways",
+        "service-gateways",
+        "local-peering-gateways",
+        "drgs",
+        "drg-attachments",
+        "vnics",
+        "vnic-attachments",
+    },
+    "database-family": {
+        "db-systems",
+        "db-nodes",
+        "db-homes",
+        "databases",
+        "backups",
+        "pluggable-databases",
+    },
+    "autonomous-database-family": {
+        "autonomous-databases",
+        "autonomous-backups",
+    },
+    "cluster-family": {
+        "clusters",
+        "cluster-node-pools",
+        "cluster-work-requests",
+    },
+}
+
+STATEMENT_PATTERN = re.compile(
+    r"^\s*allow\s+(?P<subjects>.+?)\s+to\s+(?P<verb>\S+)\s+(?P<resource>\S+)"
+    r"\s+in\s+(?P<location>tenancy|compartment\s+id\s+\S+|compartment\s+\S+)"
+    r"(?:\s+where\s+(?P<condition>.+?))?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+SUBJECT_PATTERN = re.compile(
+    r"^(?P<kind>group|dynamic-group|service)\s+(?:(?P<id>id)\s+)?(?P<name>.+)$",
+    re.IGNORECASE,
+)
+
+
+class Subject(NamedTuple):
+    # group, dynamic-group, service, any-user or any-group
+    kind: str
+    # Lowercased name or OCID, None for any-user and any-group
+    name: Optional[str]
+
+
+class PolicyStatement(NamedTuple):
+    policy_id: str
+    policy_name: str
+    statement: str
+    subjects: tuple[Subject, ...]
+    verb: str
+    resource_type: str
+    location: str
+    # OCID of the compartment the statement applies in, None if it could not
+    # be resolved
+    location_id: Optional[str]
+    condition: Optional[str]
+
+    def to_dict(self) -> dict:
+        return {
+            "policy_id": self.policy_id,
+            "policy_name": self.policy_name,
+            "statement": self.statement,
+            "location_id": self.location_id,
+            "condition": self.condition,
+        }
+
+
+def parse_subject_name(name: str) -> str:
+    """Strip quotes and the identity domain, e.g. 'Default'/'Admins' -> admins"""
+    name = name.strip()
+    if not name.startswith("ocid1."):
+        name = name.split("/")[-1]
+    return name.strip().strip("'\"").lower()
+
+
+def parse_subjects(text: str) -> Optional[tuple[Subject, ...]]:
+    """
+    Parse the subjects of a statement, e.g. "group A, group id ocid1..., B"; a
+    name without a kind takes the kind of the one before it
+    """
+    subjects = []
+    kind = None
+    for part in text.split(","):
+        part = part.strip()
+        match = SUBJECT_PATTERN.match(part)
+        if part.lower() in ("any-user", "any-group"):
+            subjects.append(Subject(part.lower(), None))
+            kind = None
+        elif match:
+            kind = match.group("kind").lower()
+            subjects.append(Subject(kind, parse_subject_name(match.group("name"))))
+        elif kind and part:
+            subjects.append(Subject(kind, parse_subject_name(part)))
+        else:
+            return None
+    return tuple(subjects)
+
+
+def parse_statement(
+    statement: str,
+    policy_id: str,
+    policy_name: str,
+    resolve_location: Callable[[str], Optional[str]],
+) -> Optional[PolicyStatement]:
+    """
+    Parse an Allow statement granting a verb on a resource type. Endorse,
+    admit and define statements and statements granting individual
+    permissions are not evaluated and return None
+    """
+    match = STATEMENT_PATTERN.match(statement)
+    if not match or match.group("verb").lower() not in VERB_RANKS:
+        return None
+    subjects = parse_subjects(match.group("subjects"))
+    if not subjects:
+        return None
+    location = " ".join(match.group("location").split())
+    return PolicyStatement(
+        policy_id=policy_id,
+        policy_name=policy_name,
+        statement=statement,
+        subjects=subjects,
+        verb=match.group("verb").lower(),
+        resource_type=match.group("resource").lower(),
+        location=location,
+        location_id=resolve_location(location),
+        condition=match.group("condition"),
+    )
+
+
+def covers(granted: str, requested: str) -> bool:
+    """Whether a statement on resource type granted applies to requested"""
+    return (
+        granted == requested
+        or granted == ALL_RESOURCES
+        or requested in RESOURCE_FAMILIES.get(granted, ())
+    )
+
+
+def granting_types(requested: str) -> set[str]:
+    """The resource types whose statements apply to requested"""
+    return {requested, ALL_RESOURCES} | {
+        family for family, members in RESOURCE_FAMILIES.items() if requested in members
+    }
+
+
+class PolicyIndex:
+    """
+    The parsed Allow statements of every policy in a tenancy, indexed by
+    subject, resource type and the compartment they apply in, for evaluating
+    permissions locally
+    """
+
+    def __init__(
+        self,
+        statements: Iterable[PolicyStatement],
+        unparsed: Iterable[dict],
+        policy_count: int,
+        fetched_at: Optional[float] = None,
+    ):
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.statements = list(statements)
+        self.unparsed = list(unparsed)
+        self.policy_count = policy_count
+        self.by_subject: dict[Subject, list[PolicyStatement]] = {}
+        self.by_resource_type: dict[str, list[PolicyStatement]] = {}
+        self.by_location: dict[Optional[str], list[PolicyStatement]] = {}
+        for statement in self.statements:
+            for subject in statement.subjects:
+                self.by_subject.setdefault(subject, []).append(statement)
+            self.by_resource_type.setdefault(statement.resource_type, []).append(
+                statement
+            )
+            self.by_location.setdefault(statement.location_id, []).append(statement)
+
+    def find(
+        self,
+        subjects: Iterable[Subject],
+        verb: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        compartment_ids: Optional[Iterable[str]] = None,
+    ) -> list[PolicyStatement]:
+        """
+        The statements granting any of the subjects at least the verb on the
+        resource type in one of the compartments, given as the compartment
+        and its ancestors since statements are inherited down the tree
+        """
+        rank = VERB_RANKS[verb] if verb else 0
+        subjects = set(subjects)
+        locations = set(compartment_ids) if compartment_ids is not None else None
+        # Scan the statements of whichever index narrows the search the most
+        candidates = [
+            [
+                statement
+                for subject in subjects
+                for statement in self.by_subject.get(subject, [])
+            ]
+        ]
+        if resource_type is not None:
+            candidates.append(
+                [
+                    statement
+                    for granted in granting_types(resource_type)
+                    for statement in self.by_resource_type.get(granted, [])
+                ]
+            )
+        if locations is not None:
+            candidates.append(
+                [
+                    statement
+                    for location in locations
+                    for statement in self.by_location.get(location, [])
+                ]
+            )
+        matches = {}
+        for statement in min(candidates, key=len):
+            if (
+                not subjects.isdisjoint(statement.subjects)
+                and VERB_RANKS[statement.verb] >= rank
+                and (
+                    resource_type is None
+                    or covers(statement.resource_type, resource_type)
+                )
+                and (locations is None or statement.location_id in locations)
+            ):
+                matches[statement.statement, statement.policy_id] = statement
+        return list(matches.values())
+
+
+class ParsedPolicyCache:
+    """
+    The parsed statements of each policy, reused across index rebuilds until
+    the policy's creation time, version date or statements change
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[tuple, list, list]] = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, policy_id: str, fingerprint: tuple, parse: Callable[[], tuple]):
+        with self._lock:
+            entry = self._entries.get(policy_id)
+        if entry is None or entry[0] != fingerprint:
+            entry = (fingerprint, *parse())
+            with self._lock:
+                self._entries[policy_id] = entry
+        return entry[1], entry[2]
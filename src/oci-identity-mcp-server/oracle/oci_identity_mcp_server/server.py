@@ -7,14 +7,37 @@ https://oss.oracle.com/licenses/upl.
 import base64
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Optional
 
 import oci
 from fastmcp import FastMCP
+from oracle.oci_identity_mcp_server.cache import TtlCache
+from oracle.oci_identity_mcp_server.compartments import CompartmentTree, normalize_path
+from oracle.oci_identity_mcp_server.memberships import MembershipGraph
+from oracle.oci_identity_mcp_server.policies import (
+    VERB_RANKS,
+    ParsedPolicyCache,
+    PolicyIndex,
+    Subject,
+    parse_statement,
+    parse_subject_name,
+)
 
 from . import __project__, __version__
 
 mcp = FastMCP(name=__project__)
 
+MAX_CONCURRENT_REQUESTS = 8
+
+# Per tenancy, reloaded after 15 minutes
+compartment_tree_cache: TtlCache[str, CompartmentTree] = TtlCache()
+policy_index_cache: TtlCache[str, PolicyIndex] = TtlCache()
+parsed_policy_cache = ParsedPolicyCache()
+membership_graph_cache: TtlCache[str, MembershipGraph] = TtlCache()
+group_directory_cache: TtlCache[str, list[dict]] = TtlCache()
+
 
 def get_identity_client():
     config = oci.config.from_file(
@@ -30,6 +53,368 @@ def get_identity_client():
     return oci.identity.IdentityClient(config, signer=signer)
 
 
+def list_all_pages(operation, **kwargs) -> list:
+    """Call a paginated list operation until there are no more pages"""
+    items = []
+    has_next_page = True
+    next_page = None
+    while has_next_page:
+        response = operation(page=next_page, **kwargs)
+        items.extend(response.data)
+        has_next_page = response.has_next_page
+        next_page = response.next_page if hasattr(response, "next_page") else None
+    return items
+
+
+def map_compartment(compartment) -> dict:
+    return {
+        "id": compartment.id,
+        "name": compartment.name,
+        "description": compartment.description,
+        "lifecycle_state": compartment.lifecycle_state,
+        "parent_id": compartment.compartment_id,
+    }
+
+
+def load_compartment_tree(identity, tenancy_id: str) -> CompartmentTree:
+    tenancy = identity.get_tenancy(tenancy_id).data
+    compartments = list_all_pages(
+        identity.list_compartments,
+        compartment_id=tenancy_id,
+        compartment_id_in_subtree=True,
+        access_level="ANY",
+    )
+    return CompartmentTree(
+        root={
+            "id": tenancy.id,
+            "name": tenancy.name,
+            "description": tenancy.description,
+            "lifecycle_state": "ACTIVE",
+        },
+        compartments=[map_compartment(compartment) for compartment in compartments],
+    )
+
+
+def get_compartment_tree(tenancy_id: str, refresh: bool = False) -> CompartmentTree:
+    return compartment_tree_cache.get(
+        tenancy_id,
+        lambda: load_compartment_tree(get_identity_client(), tenancy_id),
+        refresh=refresh,
+    )
+
+
+def resolve_one(tree: CompartmentTree, reference: str) -> dict:
+    """Resolve a compartment reference that must match exactly one compartment"""
+    matches = tree.resolve(reference)
+    if not matches:
+        raise ValueError(f"No compartment matches {reference!r}")
+    if len(matches) > 1:
+        raise ValueError(
+            f"{len(matches)} compartments are named {reference!r}, "
+            "use their path or OCID instead: "
+            + ", ".join(str(match["path"]) for match in matches)
+        )
+    return matches[0]
+
+
+def resolve_policy_location(
+    tree: CompartmentTree, policy_compartment_id: str, location: str
+) -> Optional[str]:
+    """
+    The OCID of the compartment a statement applies in. Compartment names in a
+    statement are a colon-separated path below the policy's own compartment
+    """
+    words = location.split()
+    if words[0].lower() == "tenancy":
+        return tree.root["id"]
+    if words[1].lower() == "id":
+        return words[2]
+    base = tree.by_id.get(policy_compartment_id)
+    if base is None or base["path"] is None:
+        return None
+    target = tree.by_path.get(
+        normalize_path(f"{base['path']}/{words[1].replace(':', '/')}")
+    )
+    return target["id"] if target else None
+
+
+def parse_policy(tree: CompartmentTree, policy) -> tuple[list, list]:
+    statements = []
+    unparsed = []
+    for text in policy.statements or []:
+        statement = parse_statement(
+            text,
+            policy_id=policy.id,
+            policy_name=policy.name,
+            resolve_location=lambda location: resolve_policy_location(
+                tree, policy.compartment_id, location
+            ),
+        )
+        if statement is None:
+            unparsed.append(
+                {"policy_id": policy.id, "policy_name": policy.name, "statement": text}
+            )
+        else:
+            statements.append(statement)
+    return statements, unparsed
+
+
+def load_policy_index(identity, tree: CompartmentTree) -> PolicyIndex:
+    """List the policies of every active compartment concurrently and index them"""
+    compartment_ids = [
+        compartment["id"]
+        for compartment in tree.by_id.values()
+        if compartment["lifecycle_state"] == "ACTIVE"
+    ]
+
+    def list_compartment_policies(compartment_id: str) -> list:
+        return list_all_pages(identity.list_policies, compartment_id=compartment_id)
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(len(compartment_ids), MAX_CONCURRENT_REQUESTS))
+    ) as executor:
+        policies = [
+            policy
+            for compartment_policies in executor.map(
+                list_compartment_policies, compartment_ids
+            )
+            for policy in compartment_policies
+        ]
+
+    statements = []
+    unparsed = []
+    for policy in policies:
+        # Statements are re-parsed when the policy changes or the compartment
+        # tree their locations were resolved against is reloaded
+        parsed, failed = parsed_policy_cache.get(
+            policy.id,
+            (
+                str(policy.time_created),
+                str(policy.version_date),
+                tuple(policy.statements or ()),
+                tree.fetched_at,
+            ),
+            lambda: parse_policy(tree, policy),
+        )
+        statements.extend(parsed)
+        unparsed.extend(failed)
+    return PolicyIndex(statements, unparsed, policy_count=len(policies))
+
+
+def get_policy_index(
+    tenancy_id: str, refresh: bool = False
+) -> tuple[CompartmentTree, PolicyIndex]:
+    tree = get_compartment_tree(tenancy_id, refresh=refresh)
+    index = policy_index_cache.get(
+        tenancy_id,
+        lambda: load_policy_index(get_identity_client(), tree),
+        refresh=refresh,
+    )
+    return tree, index
+
+
+def ancestor_ids(tree: CompartmentTree, compartment: dict) -> list[str]:
+    """The compartment and every compartment above it up to the root"""
+    ids = []
+    current = compartment
+    while current is not None:
+        ids.append(current["id"])
+        current = tree.by_id.get(current["parent_id"])
+    return ids
+
+
+def map_user(user) -> dict:
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "description": user.description,
+        "lifecycle_state": user.lifecycle_state,
+    }
+
+
+def map_group(group) -> dict:
+    return {
+        "id": group.id,
+        "name": group.name,
+        "description": group.description,
+        "lifecycle_state": group.lifecycle_state,
+    }
+
+
+def get_group_directory(tenancy_id: str, refresh: bool = False) -> list[dict]:
+    return group_directory_cache.get(
+        tenancy_id,
+        lambda: [
+            map_group(group)
+            for group in list_all_pages(
+                get_identity_client().list_groups, compartment_id=tenancy_id
+            )
+        ],
+        refresh=refresh,
+    )
+
+
+def group_subjects(tenancy_id: str, group: str, refresh: bool = False) -> list[Subject]:
+    """
+    A group, under both its name and its OCID since statements can name it
+    either way, and the subjects every group member also falls under. Names
+    given with their identity domain match statements with or without it
+    """
+    reference = group.strip()
+    name = parse_subject_name(reference)
+    if reference.startswith("ocid1."):
+        matches = [
+            match
+            for match in get_group_directory(tenancy_id, refresh)
+            if match["id"] == reference
+        ]
+        if not matches:
+            # Created since the directory was listed
+            try:
+                matches = [map_group(get_identity_client().get_group(reference).data)]
+            except oci.exceptions.ServiceError as e:
+                if e.status != 404:
+                    raise
+    else:
+        matches = [
+            match
+            for match in get_group_directory(tenancy_id, refresh)
+            if match["name"].lower() == name
+        ]
+    names = {name}
+    for match in matches:
+        names.update(
+            (parse_subject_name(match["id"]), parse_subject_name(match["name"]))
+        )
+    return [
+        *(Subject("group", name) for name in sorted(names)),
+        Subject("any-user", None),
+        Subject("any-group", None),
+    ]
+
+
+def list_memberships(
+    identity,
+    tenancy_id: str,
+    user_id: Optional[str] = None,
+    group_id: Optional[str] = None,
+) -> list[dict]:
+    """The active memberships of a user or a group"""
+    memberships = list_all_pages(
+        identity.list_user_group_memberships,
+        compartment_id=tenancy_id,
+        **({"user_id": user_id} if user_id else {}),
+        **({"group_id": group_id} if group_id else {}),
+    )
+    return [
+        {
+            "id": membership.id,
+            "user_id": membership.user_id,
+            "group_id": membership.group_id,
+        }
+        for membership in memberships
+        if membership.lifecycle_state == "ACTIVE"
+    ]
+
+
+def load_membership_graph(identity, tenancy_id: str) -> MembershipGraph:
+    """
+    List users and groups concurrently, then the memberships of every group
+    concurrently, since memberships can only be listed per user or group
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        users_future = executor.submit(
+            list_all_pages, identity.list_users, compartment_id=tenancy_id
+        )
+        groups_future = executor.submit(
+            list_all_pages, identity.list_groups, compartment_id=tenancy_id
+        )
+        users = users_future.result()
+        groups = groups_future.result()
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(len(groups), MAX_CONCURRENT_REQUESTS))
+    ) as executor:
+        memberships = [
+            membership
+            for group_memberships in executor.map(
+                lambda group: list_memberships(identity, tenancy_id, group_id=group.id),
+                groups,
+            )
+            for membership in group_memberships
+        ]
+    return MembershipGraph(
+        users=[map_user(user) for user in users],
+        groups=[map_group(group) for group in groups],
+        memberships=memberships,
+    )
+
+
+def get_membership_graph(tenancy_id: str, refresh: bool = False) -> MembershipGraph:
+    return membership_graph_cache.get(
+        tenancy_id,
+        lambda: load_membership_graph(get_identity_client(), tenancy_id),
+        refresh=refresh,
+    )
+
+
+def refresh_memberships(
+    identity,
+    graph: MembershipGraph,
+    tenancy_id: str,
+    user_id: Optional[str] = None,
+    group_id: Optional[str] = None,
+):
+    """Re-list the memberships of one user or group and patch them into the graph"""
+    graph.replace_memberships(
+        list_memberships(identity, tenancy_id, user_id=user_id, group_id=group_id),
+        user_id=user_id,
+        group_id=group_id,
+    )
+
+
+def resolve_member(
+    tenancy_id: str, reference: str, is_user: bool
+) -> tuple[MembershipGraph, dict]:
+    """
+    Resolve a user or group that must match exactly one, reloading the graph
+    once when nothing matches in case it was created since the graph was
+    loaded. References that still match nothing are remembered until the
+    graph expires so they do not reload it again.
+    """
+    graph = get_membership_graph(tenancy_id)
+    kind = "user" if is_user else "group"
+    miss = (kind, reference.strip().lower())
+
+    def find(graph: MembershipGraph) -> list[dict]:
+        return graph.find_users(reference) if is_user else graph.find_groups(reference)
+
+    matches = find(graph)
+    if not matches and miss not in graph.misses:
+        graph = get_membership_graph(tenancy_id, refresh=True)
+        matches = find(graph)
+        if not matches:
+            graph.misses.add(miss)
+    if not matches:
+        raise ValueError(f"No {kind} matches {reference!r}")
+    if len(matches) > 1:
+        raise ValueError(
+            f"{len(matches)} {kind}s match {reference!r}, use an OCID instead: "
+            + ", ".join(match["id"] for match in matches)
+        )
+    return graph, matches[0]
+
+
+def user_groups(tenancy_id: str, user: str, refresh: bool) -> dict:
+    graph, target = resolve_member(tenancy_id, user, is_user=True)
+    if refresh:
+        refresh_memberships(
+            get_identity_client(), graph, tenancy_id, user_id=target["id"]
+        )
+    return {"user": target, "groups": graph.groups_of(target["id"])}
+
+
 @mcp.tool
 def list_compartments(tenancy_id: str) -> list[dict]:
     identity = get_identity_client()
@@ -100,13 +485,7 @@ def create_auth_token(user_id: str) -> dict:
     }
 
 
-@mcp.tool
-def get_current_user() -> dict:
-    identity = get_identity_client()
-    config = oci.config.from_file(
-        profile_name=os.getenv("OCI_CONFIG_PROFILE", oci.config.DEFAULT_PROFILE)
-    )
-
+def get_current_user_id(config: dict) -> str:
     # Prefer explicit user from config if present
     user_id = config.get("user")
 
@@ -136,6 +515,16 @@ def get_current_user() -> dict:
             raise KeyError(
                 "Unable to determine current user OCID from config or security token"
             )
+    return user_id
+
+
+@mcp.tool
+def get_current_user() -> dict:
+    identity = get_identity_client()
+    config = oci.config.from_file(
+        profile_name=os.getenv("OCI_CONFIG_PROFILE", oci.config.DEFAULT_PROFILE)
+    )
+    user_id = get_current_user_id(config)
 
     user = identity.get_user(user_id).data
     return {
@@ -145,6 +534,187 @@ def get_current_user() -> dict:
     }
 
 
+@mcp.tool
+def resolve_compartment(
+    tenancy_id: Annotated[str, "Tenancy OCID"],
+    reference: Annotated[
+        str,
+        "Compartment OCID, name or full path below the root such as prod/app; "
+        "names and paths are case-insensitive",
+    ],
+    refresh: Annotated[
+        bool, "Whether to reload the cached compartment tree first"
+    ] = False,
+) -> list[dict]:
+    """
+    Find compartments by OCID, name or path in a cached index of the whole
+    compartment tree, returning each with its parent and full path
+    """
+    return get_compartment_tree(tenancy_id, refresh=refresh).resolve(reference)
+
+
+@mcp.tool
+def list_compartment_subtree(
+    tenancy_id: Annotated[str, "Tenancy OCID"],
+    compartment: Annotated[
+        Optional[str],
+        "OCID, name or path of the compartment at the top of the subtree. "
+        "Default: the root compartment",
+    ] = None,
+    include_inactive: Annotated[
+        bool, "Whether to include compartments that are being or were deleted"
+    ] = False,
+    refresh: Annotated[
+        bool, "Whether to reload the cached compartment tree first"
+    ] = False,
+) -> dict:
+    """
+    List a compartment and every compartment below it, with their full paths and
+    depths, from a cached index of the compartment tree that is loaded across
+    all pages once and refreshed after 15 minutes
+    """
+    tree = get_compartment_tree(tenancy_id, refresh=refresh)
+    top = tree.root if compartment is None else resolve_one(tree, compartment)
+    return {
+        "tree_size": len(tree),
+        "tree_age_seconds": int(time.time() - tree.fetched_at),
+        "compartments": tree.subtree(top["id"], include_inactive=include_inactive),
+    }
+
+
+@mcp.tool
+def check_policy_permission(
+    tenancy_id: Annotated[str, "Tenancy OCID"],
+    group: Annotated[
+        str, "Group name, optionally with its identity domain, or group OCID"
+    ],
+    verb: Annotated[str, 'One of "inspect", "read", "use" or "manage"'],
+    resource_type: Annotated[
+        str, "Resource type or family, e.g. buckets, instances or object-family"
+    ],
+    compartment: Annotated[str, "Compartment OCID, name or path"],
+    refresh: Annotated[
+        bool, "Whether to reload the cached policies and compartment tree first"
+    ] = False,
+) -> dict:
+    """
+    Check whether the policies of the tenancy let a group perform a verb on a
+    resource type in a compartment. All policies are listed concurrently once,
+    parsed and indexed, and the check is evaluated locally against the index,
+    including statements inherited from parent compartments, aggregate
+    resource families and any-user or any-group statements. Statements with a
+    where clause are reported as conditional; their conditions are not evaluated.
+    """
+    verb = verb.lower()
+    if verb not in VERB_RANKS:
+        raise ValueError(f"Unknown verb {verb!r}, expected one of {list(VERB_RANKS)}")
+    tree, index = get_policy_index(tenancy_id, refresh=refresh)
+    target = resolve_one(tree, compartment)
+    matches = index.find(
+        group_subjects(tenancy_id, group, refresh=refresh),
+        verb=verb,
+        resource_type=resource_type.lower(),
+        compartment_ids=ancestor_ids(tree, target),
+    )
+    unconditional = [statement for statement in matches if not statement.condition]
+    return {
+        "allowed": bool(unconditional),
+        "conditional": not unconditional and bool(matches),
+        "compartment_id": target["id"],
+        "matching_statements": [statement.to_dict() for statement in matches],
+        "policy_count": index.policy_count,
+        "index_age_seconds": int(time.time() - index.fetched_at),
+    }
+
+
+@mcp.tool
+def find_policy_statements(
+    tenancy_id: Annotated[str, "Tenancy OCID"],
+    group: Annotated[
+        str, "Group name, optionally with its identity domain, or group OCID"
+    ],
+    resource_type: Annotated[
+        Optional[str], "Only statements covering this resource type"
+    ] = None,
+    compartment: Annotated[
+        Optional[str],
+        "Only statements that apply in this compartment (OCID, name or path), "
+        "including ones inherited from its parents",
+    ] = None,
+    refresh: Annotated[
+        bool, "Whether to reload the cached policies and compartment tree first"
+    ] = False,
+) -> dict:
+    """
+    List the Allow statements that grant a group anything, from the cached
+    index of every policy in the tenancy, along with the statements that
+    could not be parsed and so are not part of the index
+    """
+    tree, index = get_policy_index(tenancy_id, refresh=refresh)
+    compartment_ids = (
+        ancestor_ids(tree, resolve_one(tree, compartment)) if compartment else None
+    )
+    matches = index.find(
+        group_subjects(tenancy_id, group, refresh=refresh),
+        resource_type=resource_type.lower() if resource_type else None,
+        compartment_ids=compartment_ids,
+    )
+    return {
+        "statements": [statement.to_dict() for statement in matches],
+        "unparsed_statements": index.unparsed,
+        "policy_count": index.policy_count,
+        "index_age_seconds": int(time.time() - index.fetched_at),
+    }
+
+
+@mcp.tool
+def list_user_groups(
+    tenancy_id: Annotated[str, "Tenancy OCID"],
+    user: Annotated[str, "User OCID, name or email"],
+    refresh: Annotated[
+        bool, "Whether to re-list this user's memberships before answering"
+    ] = False,
+) -> dict:
+    """
+    List the groups a user is a member of, from a cached graph of every user,
+    group and membership in the tenancy
+    """
+    return user_groups(tenancy_id, user, refresh)
+
+
+@mcp.tool
+def list_group_members(
+    tenancy_id: Annotated[str, "Tenancy OCID"],
+    group: Annotated[str, "Group OCID or name, e.g. Administrators"],
+    refresh: Annotated[
+        bool, "Whether to re-list this group's memberships before answering"
+    ] = False,
+) -> dict:
+    """
+    List the users in a group, from a cached graph of every user, group and
+    membership in the tenancy
+    """
+    graph, target = resolve_member(tenancy_id, group, is_user=False)
+    if refresh:
+        refresh_memberships(
+            get_identity_client(), graph, tenancy_id, group_id=target["id"]
+        )
+    return {"group": target, "users": graph.members_of(target["id"])}
+
+
+@mcp.tool
+def get_current_user_groups(
+    refresh: Annotated[
+        bool, "Whether to re-list the current user's memberships before answering"
+    ] = False,
+) -> dict:
+    """List the groups the user of the configured profile is a member of"""
+    config = oci.config.from_file(
+        profile_name=os.getenv("OCI_CONFIG_PROFILE", oci.config.DEFAULT_PROFILE)
+    )
+    return user_groups(config["tenancy"], get_current_user_id(config), refresh)
+
+
 def main():
     mcp.run()
 
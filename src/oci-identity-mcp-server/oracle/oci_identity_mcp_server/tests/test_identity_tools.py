@@ -9,7 +9,49 @@ from unittest.mock import MagicMock, create_autospec, patch
 import oci
 import pytest
 from fastmcp import Client
-from oracle.oci_identity_mcp_server.server import mcp
+from fastmcp.exceptions import ToolError
+from oracle.oci_identity_mcp_server.policies import Subject, parse_statement
+from oracle.oci_identity_mcp_server.server import (
+    compartment_tree_cache,
+    group_directory_cache,
+    mcp,
+    membership_graph_cache,
+    parsed_policy_cache,
+    policy_index_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_identity_caches():
+    caches = [
+        compartment_tree_cache,
+        policy_index_cache,
+        parsed_policy_cache,
+        membership_graph_cache,
+        group_directory_cache,
+    ]
+    for cache in caches:
+        cache.clear()
+    yield
+    for cache in caches:
+        cache.clear()
+
+
+def list_response(data, next_page=None):
+    response = create_autospec(oci.response.Response)
+    response.data = data
+    response.has_next_page = next_page is not None
+    response.next_page = next_page
+    return response
+
+
+def compartment(id, parent_id, name, lifecycle_state="ACTIVE"):
+    return oci.identity.models.Compartment(
+        id=id,
+        compartment_id=parent_id,
+        name=name,
+        lifecycle_state=lifecycle_state,
+    )
 
 
 class TestIdentityTools:
@@ -165,3 +207,320 @@ class TestIdentityTools:
             result = (await client.call_tool("get_current_user", {})).data
 
             assert result["id"] == "user1"
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_identity_mcp_server.server.get_identity_client")
+    async def test_compartment_tree_is_indexed_and_cached(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.get_tenancy.return_value = list_response(
+            oci.identity.models.Tenancy(id="tenancy1", name="acme")
+        )
+        pages = {
+            None: list_response(
+                [
+                    compartment("prod", "tenancy1", "Prod"),
+                    compartment("prod-app", "prod", "App"),
+                ],
+                next_page="page2",
+            ),
+            "page2": list_response(
+                [
+                    compartment("dev", "tenancy1", "Dev"),
+                    compartment("dev-app", "dev", "App"),
+                    compartment("old", "dev", "Old", lifecycle_state="DELETED"),
+                    compartment("old-prod", "tenancy1", "Prod", "DELETED"),
+                    compartment("old-prod-app", "old-prod", "App", "DELETED"),
+                ]
+            ),
+        }
+        mock_client.list_compartments.side_effect = lambda page, **kwargs: pages[page]
+
+        async with Client(mcp) as client:
+            by_path = (
+                await client.call_tool(
+                    "resolve_compartment",
+                    {"tenancy_id": "tenancy1", "reference": "PROD/app"},
+                )
+            ).structured_content["result"]
+            by_name = (
+                await client.call_tool(
+                    "resolve_compartment",
+                    {"tenancy_id": "tenancy1", "reference": "app"},
+                )
+            ).structured_content["result"]
+            by_shadowed_name = (
+                await client.call_tool(
+                    "resolve_compartment",
+                    {"tenancy_id": "tenancy1", "reference": "prod"},
+                )
+            ).structured_content["result"]
+            by_deleted_id = (
+                await client.call_tool(
+                    "resolve_compartment",
+                    {"tenancy_id": "tenancy1", "reference": "old-prod"},
+                )
+            ).structured_content["result"]
+            subtree = (
+                await client.call_tool(
+                    "list_compartment_subtree",
+                    {"tenancy_id": "tenancy1", "compartment": "dev"},
+                )
+            ).structured_content
+
+        assert by_path == [
+            {
+                "id": "prod-app",
+                "name": "App",
+                "description": None,
+                "lifecycle_state": "ACTIVE",
+                "parent_id": "prod",
+                "path": "Prod/App",
+                "depth": 2,
+            }
+        ]
+        assert sorted(match["id"] for match in by_name) == ["dev-app", "prod-app"]
+        # Deleted compartments never shadow active ones but resolve by OCID
+        assert [match["id"] for match in by_shadowed_name] == ["prod"]
+        assert [match["id"] for match in by_deleted_id] == ["old-prod"]
+        assert [c["path"] for c in subtree["compartments"]] == ["Dev", "Dev/App"]
+        assert subtree["tree_size"] == 8
+        # The whole tree is listed once and then served from the cache
+        assert mock_client.list_compartments.call_count == 2
+        assert mock_client.list_compartments.call_args.kwargs[
+            "compartment_id_in_subtree"
+        ]
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_identity_mcp_server.server.get_identity_client")
+    async def test_check_policy_permission(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.get_tenancy.return_value = list_response(
+            oci.identity.models.Tenancy(id="tenancy1", name="acme")
+        )
+        mock_client.list_compartments.return_value = list_response(
+            [
+                compartment("prod", "tenancy1", "Prod"),
+                compartment("prod-app", "prod", "App"),
+                compartment("dev", "tenancy1", "Dev"),
+            ]
+        )
+        policies = {
+            "tenancy1": [
+                oci.identity.models.Policy(
+                    id="policy1",
+                    name="storage-admins",
+                    compartment_id="tenancy1",
+                    statements=[
+                        "Allow group StorageAdmins to manage object-family "
+                        "in compartment Prod",
+                        "Allow group 'Default'/'Auditors' to read all-resources "
+                        "in tenancy where request.region = 'phx'",
+                        "Endorse group StorageAdmins to read objects in tenancy foo",
+                        "Allow group id ocid1.group.oc1..auditors to use vcns "
+                        "in compartment Dev",
+                    ],
+                )
+            ],
+            "prod": [
+                oci.identity.models.Policy(
+                    id="policy2",
+                    name="app-readers",
+                    compartment_id="prod",
+                    statements=[
+                        "Allow group Readers, Auditors to read buckets in compartment App"
+                    ],
+                )
+            ],
+        }
+        mock_client.list_policies.side_effect = lambda compartment_id, page: (
+            list_response(policies.get(compartment_id, []))
+        )
+        mock_client.list_groups.return_value = list_response(
+            [
+                oci.identity.models.Group(
+                    id="ocid1.group.oc1..storage", name="StorageAdmins"
+                ),
+                oci.identity.models.Group(
+                    id="ocid1.group.oc1..auditors", name="Auditors"
+                ),
+            ]
+        )
+
+        async def check(client, group, verb, resource_type, compartment):
+            return (
+                await client.call_tool(
+                    "check_policy_permission",
+                    {
+                        "tenancy_id": "tenancy1",
+                        "group": group,
+                        "verb": verb,
+                        "resource_type": resource_type,
+                        "compartment": compartment,
+                    },
+                )
+            ).structured_content
+
+        async with Client(mcp) as client:
+            inherited = await check(
+                client, "storageadmins", "use", "buckets", "prod/app"
+            )
+            wrong_compartment = await check(
+                client, "StorageAdmins", "manage", "buckets", "Dev"
+            )
+            conditional = await check(client, "Auditors", "inspect", "buckets", "Dev")
+            relative = await check(client, "Readers", "read", "buckets", "prod-app")
+            by_ocid = await check(
+                client, "ocid1.group.oc1..storage", "manage", "objects", "Prod"
+            )
+            by_name = await check(client, "Default/Auditors", "use", "vcns", "Dev")
+            statements = (
+                await client.call_tool(
+                    "find_policy_statements",
+                    {"tenancy_id": "tenancy1", "group": "Auditors"},
+                )
+            ).structured_content
+
+        assert inherited["allowed"] is True
+        assert inherited["matching_statements"][0]["policy_name"] == "storage-admins"
+        assert wrong_compartment["allowed"] is False
+        assert conditional["allowed"] is False and conditional["conditional"] is True
+        assert relative["allowed"] is True
+        assert relative["matching_statements"][0]["location_id"] == "prod-app"
+        # Groups match statements naming them by name or by OCID
+        assert by_ocid["allowed"] is True
+        assert by_name["allowed"] is True
+        assert by_name["matching_statements"][0]["statement"].startswith(
+            "Allow group id"
+        )
+        assert len(statements["statements"]) == 3
+        assert len(statements["unparsed_statements"]) == 1
+        # Every compartment's policies are listed once for all the checks
+        assert mock_client.list_policies.call_count == 4
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_identity_mcp_server.server.get_identity_client")
+    @patch("oracle.oci_identity_mcp_server.server.oci.config.from_file")
+    async def test_membership_graph(self, mock_config_from_file, mock_get_client):
+        mock_config_from_file.return_value = {"tenancy": "tenancy1", "user": "alice"}
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.list_users.side_effect = lambda page, **kwargs: (
+            list_response(
+                [oci.identity.models.User(id="alice", name="Alice", email="a@x.com")],
+                next_page="page2",
+            )
+            if page is None
+            else list_response([oci.identity.models.User(id="bob", name="Bob")])
+        )
+        mock_client.list_groups.return_value = list_response(
+            [
+                oci.identity.models.Group(id="admins", name="Administrators"),
+                oci.identity.models.Group(id="devs", name="Developers"),
+            ]
+        )
+        memberships = [
+            ("m1", "alice", "admins"),
+            ("m2", "alice", "devs"),
+            ("m3", "bob", "devs"),
+        ]
+
+        def list_user_group_memberships(
+            compartment_id, page, user_id=None, group_id=None
+        ):
+            return list_response(
+                [
+                    oci.identity.models.UserGroupMembership(
+                        id=id, user_id=user, group_id=group, lifecycle_state="ACTIVE"
+                    )
+                    for id, user, group in memberships
+                    if user_id in (None, user) and group_id in (None, group)
+                ]
+            )
+
+        mock_client.list_user_group_memberships.side_effect = (
+            list_user_group_memberships
+        )
+
+        async with Client(mcp) as client:
+            admins = (
+                await client.call_tool(
+                    "list_group_members",
+                    {"tenancy_id": "tenancy1", "group": "administrators"},
+                )
+            ).structured_content
+            current = (
+                await client.call_tool("get_current_user_groups", {})
+            ).structured_content
+
+            # Bob joins the admins; refreshing him only re-lists his memberships
+            memberships.append(("m4", "bob", "admins"))
+            mock_client.list_user_group_memberships.reset_mock()
+            bob = (
+                await client.call_tool(
+                    "list_user_groups",
+                    {"tenancy_id": "tenancy1", "user": "bob", "refresh": True},
+                )
+            ).structured_content
+            admins_after = (
+                await client.call_tool(
+                    "list_group_members",
+                    {"tenancy_id": "tenancy1", "group": "admins"},
+                )
+            ).structured_content
+            users_listed = mock_client.list_users.call_count
+            memberships_listed = mock_client.list_user_group_memberships.call_count
+
+            # An unknown user reloads the graph once, then is remembered
+            for _ in range(3):
+                with pytest.raises(ToolError, match="No user matches"):
+                    await client.call_tool(
+                        "list_user_groups", {"tenancy_id": "tenancy1", "user": "Carol"}
+                    )
+
+        assert [user["name"] for user in admins["users"]] == ["Alice"]
+        assert [group["name"] for group in current["groups"]] == [
+            "Administrators",
+            "Developers",
+        ]
+        assert [group["id"] for group in bob["groups"]] == ["admins", "devs"]
+        assert [user["id"] for user in admins_after["users"]] == ["alice", "bob"]
+        assert memberships_listed == 1
+        assert users_listed == 2
+        # One more reload, listing both pages of users
+        assert mock_client.list_users.call_count == 4
+
+
+class TestPolicyStatements:
+    def test_parse_statement_subjects_and_condition(self):
+        statement = parse_statement(
+            "allow group A, group id ocid1.group.oc1..x, dynamic-group Fn, B "
+            "to USE instance-family in compartment id ocid1.compartment.oc1..y "
+            "where target.resource.tag.env = 'prod'",
+            policy_id="policy1",
+            policy_name="policy",
+            resolve_location=lambda location: location.split()[-1],
+        )
+
+        assert statement.subjects == (
+            Subject("group", "a"),
+            Subject("group", "ocid1.group.oc1..x"),
+            Subject("dynamic-group", "fn"),
+            Subject("dynamic-group", "b"),
+        )
+        assert statement.verb == "use"
+        assert statement.resource_type == "instance-family"
+        assert statement.location_id == "ocid1.compartment.oc1..y"
+        assert statement.condition == "target.resource.tag.env = 'prod'"
+
+    def test_permission_statements_are_not_parsed(self):
+        assert (
+            parse_statement(
+                "Allow group A to {BUCKET_READ} in tenancy",
+                policy_id="policy1",
+                policy_name="policy",
+                resolve_location=lambda location: None,
+            )
+            is None
+        )
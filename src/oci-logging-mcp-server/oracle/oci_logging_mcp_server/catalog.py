@@ -0,0 +1,101 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+
+DEFAULT_TTL_SECONDS = 900
+
+
+class LogCatalogKey(NamedTuple):
+    compartment_id: str
+    include_subcompartments: bool
+
+
+class LogCatalog:
+    """
+    Every log under a compartment, as compact dicts, indexed by lowercased display
+    name, source service and source resource for local lookups.
+    """
+
+    def __init__(self, logs: Iterable[dict], fetched_at: Optional[float] = None):
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.logs = list(logs)
+        self.by_name: dict[str, list[dict]] = {}
+        self.by_service: dict[str, list[dict]] = {}
+        self.by_resource: dict[str, list[dict]] = {}
+        for log in self.logs:
+            self.by_name.setdefault((log["display_name"] or "").lower(), []).append(log)
+            if log["service"]:
+                self.by_service.setdefault(log["service"].lower(), []).append(log)
+            if log["resource"]:
+                self.by_resource.setdefault(log["resource"].lower(), []).append(log)
+
+    def find(
+        self,
+        name: Optional[str] = None,
+        service: Optional[str] = None,
+        resource: Optional[str] = None,
+    ) -> list[dict]:
+        """
+        Return the logs matching every given filter. Service and resource must
+        match exactly, name matches exactly or else as a substring; all matching
+        is case-insensitive
+        """
+        candidates = None
+        if service:
+            candidates = self.by_service.get(service.lower(), [])
+        if resource:
+            matches = self.by_resource.get(resource.lower(), [])
+            candidates = (
+                matches if candidates is None else intersect(candidates, matches)
+            )
+        if name:
+            name = name.lower()
+            matches = self.by_name.get(name)
+            if matches is None:
+                matches = [
+                    log
+                    for log in (self.logs if candidates is None else candidates)
+                    if name in (log["display_name"] or "").lower()
+                ]
+            candidates = (
+                matches if candidates is None else intersect(candidates, matches)
+            )
+        return list(self.logs if candidates is None else candidates)
+
+
+def intersect(logs: list[dict], other: list[dict]) -> list[dict]:
+    ids = {log["id"] for log in other}
+    return [log for log in logs if log["id"] in ids]
+
+
+class LogCatalogCache:
+    """Caches one LogCatalog per compartment scope for ttl seconds"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        self._catalogs: dict[LogCatalogKey, LogCatalog] = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._catalogs.clear()
+
+    def get(
+        self,
+        key: LogCatalogKey,
+        load: Callable[[], Iterable[dict]],
+        refresh: bool = False,
+    ) -> LogCatalog:
+        with self._lock:
+            catalog = self._catalogs.get(key)
+        if refresh or catalog is None or time.time() - catalog.fetched_at > self.ttl:
+            catalog = LogCatalog(load())
+            with self._lock:
+                self._catalogs[key] = catalog
+        return catalog
@@ -0,0 +1,81 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
+
+DEFAULT_MAX_CURSORS = 1024
+DEFAULT_MAX_SEEN_ENTRIES = 10_000
+
+
+class FollowCursorKey(NamedTuple):
+    cursor_id: str
+    search_query: str
+
+
+@dataclass
+class FollowCursor:
+    # Epoch milliseconds of the newest entry returned so far
+    last_time: int
+    # Keys of recently returned entries mapped to their timestamps, in the order
+    # they were returned.
+    # Each poll re-reads an overlap window before last_time to pick up entries
+    # that were ingested late, and these keys keep it from returning them twice
+    seen: OrderedDict[str, int] = field(default_factory=OrderedDict)
+
+    def copy(self) -> "FollowCursor":
+        return FollowCursor(last_time=self.last_time, seen=OrderedDict(self.seen))
+
+    def is_new(self, entry_key: str) -> bool:
+        return entry_key not in self.seen
+
+    def record(self, entry_time: int, entry_key: str):
+        self.last_time = max(self.last_time, entry_time)
+        self.seen[entry_key] = entry_time
+
+    def prune(self, overlap_millis: int, max_seen: int = DEFAULT_MAX_SEEN_ENTRIES):
+        """Forget entries that are older than the overlap window or over the cap"""
+        horizon = self.last_time - overlap_millis
+        for entry_key in [k for k, t in self.seen.items() if t < horizon]:
+            del self.seen[entry_key]
+        while len(self.seen) > max_seen:
+            self.seen.popitem(last=False)
+
+
+class FollowCursorStore:
+    """A bounded map of follow cursors, evicting the least recently used"""
+
+    def __init__(self, max_cursors: int = DEFAULT_MAX_CURSORS):
+        self.max_cursors = max_cursors
+        self._cursors: OrderedDict[FollowCursorKey, FollowCursor] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cursors)
+
+    def clear(self):
+        with self._lock:
+            self._cursors.clear()
+
+    def get(self, key: FollowCursorKey) -> Optional[FollowCursor]:
+        with self._lock:
+            cursor = self._cursors.get(key)
+            if cursor is not None:
+                self._cursors.move_to_end(key)
+            return cursor
+
+    def put(self, key: FollowCursorKey, cursor: FollowCursor):
+        with self._lock:
+            self._cursors[key] = cursor
+            self._cursors.move_to_end(key)
+            while len(self._cursors) > self.max_cursors:
+                self._cursors.popitem(last=False)
+
+    def delete(self, key: FollowCursorKey) -> bool:
+        with self._lock:
+            return self._cursors.pop(key, None) is not None
@@ -0,0 +1,205 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from logging import Logger
+from typing import Callable, NamedTuple, Optional, Union
+
+import oci
+
+logger = Logger(__name__, level="INFO")
+
+SPEC_VERSION = "1.0"
+DEFAULT_MAX_BATCH_ENTRIES = 500
+# PutLogs accepts request bodies of up to 10 MB, stay well below it
+DEFAULT_MAX_BATCH_BYTES = 4 * 1024 * 1024
+DEFAULT_FLUSH_INTERVAL_SECONDS = 5.0
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+# Rough per-entry JSON overhead for the id, time and field names
+ENTRY_OVERHEAD_BYTES = 100
+
+
+class LogBatchKey(NamedTuple):
+    log_id: str
+    source: str
+    type: str
+    subject: Optional[str]
+
+
+@dataclass
+class PendingBatch:
+    created_at: float = field(default_factory=time.monotonic)
+    entries: list[oci.loggingingestion.models.LogEntry] = field(default_factory=list)
+    size: int = 0
+
+
+@dataclass
+class FlushResult:
+    log_id: str
+    entries: int
+    error: Optional[str] = None
+
+
+def is_retryable(e: Exception) -> bool:
+    """Throttling, server errors and connection failures or timeouts"""
+    if isinstance(e, oci.exceptions.ServiceError):
+        return e.status == 429 or e.status >= 500
+    return isinstance(
+        e, (oci.exceptions.RequestException, oci.exceptions.ConnectTimeout)
+    )
+
+
+def to_log_entry(entry: Union[str, dict]) -> oci.loggingingestion.models.LogEntry:
+    data = entry if isinstance(entry, str) else json.dumps(entry, default=str)
+    return oci.loggingingestion.models.LogEntry(
+        data=data, id=str(uuid.uuid4()), time=datetime.now(timezone.utc)
+    )
+
+
+class LogIngestionBuffer:
+    """
+    Buffers custom log entries in memory and writes them with PutLogs in batches.
+
+    Entries are grouped by log and batch metadata. A group is flushed as soon as
+    it reaches max_batch_entries or max_batch_bytes, and a background thread
+    flushes groups older than flush_interval seconds. Throttled (429), server
+    and connection errors are retried with exponential backoff; entries of a
+    batch that still fails, or fails in any other way, are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable,
+        max_batch_entries: int = DEFAULT_MAX_BATCH_ENTRIES,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+    ):
+        self.client_factory = client_factory
+        self.max_batch_entries = max_batch_entries
+        self.max_batch_bytes = max_batch_bytes
+        self.flush_interval = flush_interval
+        self.sent_entries = 0
+        self.dropped_entries = 0
+        self._batches: dict[LogBatchKey, PendingBatch] = {}
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def pending_entries(self, log_id: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(
+                len(batch.entries)
+                for key, batch in self._batches.items()
+                if log_id is None or key.log_id == log_id
+            )
+
+    def add(
+        self, key: LogBatchKey, entries: list[Union[str, dict]]
+    ) -> list[FlushResult]:
+        """Buffer entries, writing out every batch that fills up along the way"""
+        full = []
+        with self._lock:
+            batch = self._batches.setdefault(key, PendingBatch())
+            for entry in entries:
+                log_entry = to_log_entry(entry)
+                size = len(log_entry.data.encode("utf-8")) + ENTRY_OVERHEAD_BYTES
+                if batch.entries and batch.size + size > self.max_batch_bytes:
+                    full.append(batch)
+                    batch = self._batches[key] = PendingBatch()
+                batch.entries.append(log_entry)
+                batch.size += size
+                if len(batch.entries) >= self.max_batch_entries:
+                    full.append(batch)
+                    batch = self._batches[key] = PendingBatch()
+            if not batch.entries:
+                del self._batches[key]
+        self._ensure_flusher()
+        return [self._send(key, batch) for batch in full]
+
+    def flush(
+        self, log_id: Optional[str] = None, older_than: float = 0
+    ) -> list[FlushResult]:
+        """Write out the pending batches of one or all logs"""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                (key, batch)
+                for key, batch in self._batches.items()
+                if (log_id is None or key.log_id == log_id)
+                and now - batch.created_at >= older_than
+            ]
+            for key, _ in due:
+                del self._batches[key]
+        return [self._send(key, batch) for key, batch in due]
+
+    def _send(self, key: LogBatchKey, batch: PendingBatch) -> FlushResult:
+        details = oci.loggingingestion.models.PutLogsDetails(
+            specversion=SPEC_VERSION,
+            log_entry_batches=[
+                oci.loggingingestion.models.LogEntryBatch(
+                    entries=batch.entries,
+                    source=key.source,
+                    type=key.type,
+                    subject=key.subject,
+                    defaultlogentrytime=batch.entries[0].time,
+                )
+            ],
+        )
+        client = None
+        for attempt in range(MAX_RETRIES):
+            try:
+                if client is None:
+                    client = self.client_factory()
+                client.put_logs(log_id=key.log_id, put_logs_details=details)
+                with self._lock:
+                    self.sent_entries += len(batch.entries)
+                return FlushResult(log_id=key.log_id, entries=len(batch.entries))
+            # The batch has already left the buffer, so any failure must be
+            # counted here or its entries would vanish along with later batches
+            except Exception as e:
+                if not is_retryable(e) or attempt == MAX_RETRIES - 1:
+                    logger.warning(
+                        f"Dropping {len(batch.entries)} log entries for {key.log_id}: {e}"
+                    )
+                    with self._lock:
+                        self.dropped_entries += len(batch.entries)
+                    return FlushResult(
+                        log_id=key.log_id, entries=len(batch.entries), error=str(e)
+                    )
+                delay = BACKOFF_BASE_SECONDS * (2**attempt)
+                time.sleep(delay + random.uniform(0, delay))
+
+    def _ensure_flusher(self):
+        with self._lock:
+            if self._stopped.is_set() or (
+                self._flusher is not None and self._flusher.is_alive()
+            ):
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_periodically,
+                name="log-ingestion-flusher",
+                daemon=True,
+            )
+            self._flusher.start()
+
+    def close(self):
+        """Stop the background flusher and write out everything still pending"""
+        self._stopped.set()
+        return self.flush()
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(min(1.0, self.flush_interval)):
+            try:
+                self.flush(older_than=self.flush_interval)
+            except Exception as e:
+                logger.warning(f"Background log flush failed: {e}")
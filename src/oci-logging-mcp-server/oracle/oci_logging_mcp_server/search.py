@@ -0,0 +1,129 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+import oci
+
+SORT_CLAUSE = re.compile(r"\|\s*sort\s+by\b", re.IGNORECASE)
+
+SEARCH_PAGE_SIZE = 1000
+MAX_MESSAGE_LENGTH = 500
+AGGREGATIONS = ("level", "source", "type", "minute")
+
+LEVEL_FIELDS = ("level", "severity", "logLevel", "loglevel")
+MESSAGE_FIELDS = ("message", "msg", "log", "text")
+
+
+def iter_search_results(
+    log_search_client,
+    search_logs_details: oci.loggingsearch.models.SearchLogsDetails,
+    max_rows: Optional[int] = None,
+) -> Iterator[dict]:
+    """
+    Yield the data of each search result, requesting the next page only once the
+    previous one has been consumed and stopping after max_rows results
+    """
+    returned = 0
+    has_next_page = True
+    next_page = None
+    while has_next_page and (max_rows is None or returned < max_rows):
+        limit = SEARCH_PAGE_SIZE
+        if max_rows is not None:
+            limit = min(limit, max_rows - returned)
+        response = log_search_client.search_logs(
+            search_logs_details=search_logs_details, limit=limit, page=next_page
+        )
+        for result in response.data.results or []:
+            yield result.data
+            returned += 1
+            if max_rows is not None and returned >= max_rows:
+                return
+        has_next_page = response.has_next_page
+        next_page = response.next_page if hasattr(response, "next_page") else None
+
+
+def sorted_ascending(search_query: str) -> str:
+    """Sort results oldest first unless the query already specifies an order"""
+    if SORT_CLAUSE.search(search_query):
+        return search_query
+    return f"{search_query} | sort by datetime asc"
+
+
+def parse_timestamp(timestamp: str) -> datetime:
+    """Parse an ISO 8601 timestamp, treating naive values as UTC"""
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def first_field(data: dict, names: tuple[str, ...]) -> Optional[str]:
+    for name in names:
+        value = data.get(name)
+        if value is not None:
+            return str(value)
+    return None
+
+
+def summarize_log_entry(result: dict) -> dict:
+    """Reduce a raw search result to the fields needed to read a log line"""
+    content = result.get("logContent") or {}
+    data = content.get("data")
+    if not isinstance(data, dict):
+        data = {"message": data} if data is not None else {}
+    message = first_field(data, MESSAGE_FIELDS)
+    if message is None and data:
+        message = str(data)
+    if message is not None and len(message) > MAX_MESSAGE_LENGTH:
+        message = message[:MAX_MESSAGE_LENGTH] + "..."
+    return {
+        "id": content.get("id"),
+        "time": content.get("time") or format_epoch_millis(result.get("datetime")),
+        "source": content.get("source"),
+        "type": content.get("type"),
+        "level": first_field(data, LEVEL_FIELDS),
+        "message": message,
+    }
+
+
+def format_epoch_millis(value) -> Optional[str]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc).isoformat()
+
+
+def minute_bucket(entry: dict) -> Optional[str]:
+    # Both RFC 3339 strings and formatted epoch millis start with YYYY-MM-DDTHH:MM
+    return entry["time"][:16] if entry.get("time") else None
+
+
+class LogAggregator:
+    """Counts summarized log entries by the requested fields as they stream in"""
+
+    def __init__(self, fields: list[str]):
+        unknown = set(fields) - set(AGGREGATIONS)
+        if unknown:
+            raise ValueError(f"Unsupported aggregations: {sorted(unknown)}")
+        self.fields = fields
+        self.counters = {field: Counter() for field in fields}
+
+    def add(self, entry: dict):
+        for field, counter in self.counters.items():
+            value = minute_bucket(entry) if field == "minute" else entry.get(field)
+            counter[value if value is not None else "unknown"] += 1
+
+    def result(self, top: Optional[int] = None) -> dict:
+        result = {}
+        for field, counter in self.counters.items():
+            if field == "minute":
+                result[field] = dict(sorted(counter.items()))
+            else:
+                result[field] = dict(counter.most_common(top))
+        return result
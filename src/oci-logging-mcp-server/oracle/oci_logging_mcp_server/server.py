@@ -5,11 +5,29 @@ https://oss.oracle.com/licenses/upl.
 """
 
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
 from logging import Logger
-from typing import Annotated
+from typing import Annotated, Literal, Optional, Union
 
 import oci
 from fastmcp import FastMCP
+from oracle.oci_logging_mcp_server.catalog import LogCatalogCache, LogCatalogKey
+from oracle.oci_logging_mcp_server.cursors import (
+    FollowCursor,
+    FollowCursorKey,
+    FollowCursorStore,
+)
+from oracle.oci_logging_mcp_server.ingestion import LogBatchKey, LogIngestionBuffer
+from oracle.oci_logging_mcp_server.search import (
+    LogAggregator,
+    iter_search_results,
+    parse_timestamp,
+    sorted_ascending,
+    summarize_log_entry,
+)
 
 from . import __project__
 
@@ -17,9 +35,14 @@ logger = Logger(__name__, level="INFO")
 
 mcp = FastMCP(name=__project__)
 
+MAX_CONCURRENT_REQUESTS = 8
 
-def get_logging_client():
-    logger.info("entering get_logging_client")
+follow_cursors = FollowCursorStore()
+log_catalog_cache = LogCatalogCache()
+log_ingestion_buffer = LogIngestionBuffer(lambda: get_logging_ingestion_client())
+
+
+def get_config_and_signer():
     config = oci.config.from_file(
         profile_name=os.getenv("OCI_CONFIG_PROFILE", oci.config.DEFAULT_PROFILE)
     )
@@ -30,9 +53,27 @@ def get_logging_client():
     with open(token_file, "r") as f:
         token = f.read()
     signer = oci.auth.signers.SecurityTokenSigner(token, private_key)
+    return config, signer
+
+
+def get_logging_client():
+    logger.info("entering get_logging_client")
+    config, signer = get_config_and_signer()
     return oci.logging.LoggingManagementClient(config, signer=signer)
 
 
+def get_logging_ingestion_client():
+    logger.info("entering get_logging_ingestion_client")
+    config, signer = get_config_and_signer()
+    return oci.loggingingestion.LoggingClient(config, signer=signer)
+
+
+def get_log_search_client():
+    logger.info("entering get_log_search_client")
+    config, signer = get_config_and_signer()
+    return oci.loggingsearch.LogSearchClient(config, signer=signer)
+
+
 @mcp.tool
 def list_log_groups(
     compartment_id: Annotated[str, "Compartment OCID to list resources in."],
@@ -91,8 +132,316 @@ def get_log(
     }
 
 
+@mcp.tool
+def search_logs(
+    search_query: Annotated[
+        str,
+        "A Logging query language query, for example: "
+        'search "<compartment OCID>/<log group OCID>/<log OCID>" '
+        "| where level = 'ERROR'",
+    ],
+    time_start: Annotated[str, "Start of the time range to search, in ISO 8601"],
+    time_end: Annotated[
+        Optional[str],
+        "End of the time range to search, in ISO 8601. Defaults to now",
+    ] = None,
+    max_rows: Annotated[
+        int,
+        "Maximum number of log entries to read. Results are paged in until "
+        "this many have been read. Default: 1000",
+    ] = 1000,
+    aggregate_by: Annotated[
+        Optional[list[Literal["level", "source", "type", "minute"]]],
+        "Optional fields to count the matching entries by, computed over every "
+        "entry read rather than only the samples",
+    ] = None,
+    sample_size: Annotated[
+        int, "Number of log entries to return as samples. Default: 20"
+    ] = 20,
+) -> dict:
+    """
+    Searches log content and returns a compact summary: how many entries were
+    read, optional counts by level, source, type or minute, and a few sample lines
+    """
+    log_search_client = get_log_search_client()
+    details = oci.loggingsearch.models.SearchLogsDetails(
+        time_start=parse_timestamp(time_start),
+        time_end=(
+            parse_timestamp(time_end) if time_end else datetime.now(timezone.utc)
+        ),
+        search_query=search_query,
+        is_return_field_info=False,
+    )
+    aggregator = LogAggregator(aggregate_by or [])
+
+    returned = 0
+    truncated = False
+    samples = []
+    # Read one entry past the cap to tell whether the results were truncated
+    for result in iter_search_results(log_search_client, details, max_rows + 1):
+        if returned == max_rows:
+            truncated = True
+            break
+        entry = summarize_log_entry(result)
+        aggregator.add(entry)
+        if len(samples) < sample_size:
+            samples.append(entry)
+        returned += 1
+
+    return {
+        "returned": returned,
+        "truncated": truncated,
+        "aggregations": aggregator.result(),
+        "samples": samples,
+    }
+
+
+@mcp.tool
+def follow_logs(
+    cursor_id: Annotated[
+        str,
+        "A name for this follow session. Calls with the same cursor_id and "
+        "search_query continue where the previous call stopped",
+    ],
+    search_query: Annotated[
+        str,
+        "A Logging query language query, for example: "
+        'search "<compartment OCID>/<log group OCID>/<log OCID>" '
+        "| where level = 'ERROR'",
+    ],
+    lookback_minutes: Annotated[
+        int,
+        "How far back to start on the first call of a session. Default: 15",
+    ] = 15,
+    max_rows: Annotated[
+        int,
+        "Maximum number of new entries to return. Any remaining entries are "
+        "returned by the next call. Default: 200",
+    ] = 200,
+    overlap_seconds: Annotated[
+        int,
+        "How far before the newest entry already returned each call searches "
+        "again, to catch entries that were ingested late. Default: 300",
+    ] = 300,
+    reset: Annotated[
+        bool, "Whether to discard the session cursor and start over"
+    ] = False,
+) -> dict:
+    """
+    Returns only the log entries that are new since the previous call with the
+    same cursor_id and query, so repeated polling reads just the delta
+    """
+    key = FollowCursorKey(cursor_id=cursor_id, search_query=search_query)
+    if reset:
+        follow_cursors.delete(key)
+
+    now = datetime.now(timezone.utc)
+    overlap_millis = overlap_seconds * 1000
+    cursor = follow_cursors.get(key)
+    if cursor is None:
+        start = now - timedelta(minutes=lookback_minutes)
+        cursor = FollowCursor(last_time=int(start.timestamp() * 1000))
+    else:
+        cursor = cursor.copy()
+        start = datetime.fromtimestamp(
+            (cursor.last_time - overlap_millis) / 1000, tz=timezone.utc
+        )
+
+    log_search_client = get_log_search_client()
+    details = oci.loggingsearch.models.SearchLogsDetails(
+        time_start=start,
+        time_end=max(now, start + timedelta(milliseconds=1)),
+        search_query=sorted_ascending(search_query),
+        is_return_field_info=False,
+    )
+
+    entries = []
+    truncated = False
+    # Entries in the overlap window that were already returned are read again
+    # and skipped, plus one entry past the cap to tell whether there is more
+    read_limit = max_rows + len(cursor.seen) + 1
+    for result in iter_search_results(log_search_client, details, read_limit):
+        entry = summarize_log_entry(result)
+        entry_time = result.get("datetime")
+        if entry_time is None:
+            continue
+        entry_key = entry["id"] or f"{entry_time}:{entry['message']}"
+        if not cursor.is_new(entry_key):
+            continue
+        if len(entries) == max_rows:
+            truncated = True
+            break
+        cursor.record(int(entry_time), entry_key)
+        entries.append(entry)
+
+    cursor.prune(overlap_millis)
+    follow_cursors.put(key, cursor)
+    return {
+        "cursor_id": cursor_id,
+        "since": start.isoformat(),
+        "returned": len(entries),
+        "truncated": truncated,
+        "entries": entries,
+    }
+
+
+def list_all_pages(operation, **kwargs) -> list:
+    """Call a paginated list operation until there are no more pages"""
+    items = []
+    has_next_page = True
+    next_page = None
+    while has_next_page:
+        response = operation(page=next_page, **kwargs)
+        items.extend(response.data)
+        has_next_page = response.has_next_page
+        next_page = response.next_page if hasattr(response, "next_page") else None
+    return items
+
+
+def load_log_catalog(
+    logging_client, compartment_id: str, include_subcompartments: bool
+) -> list[dict]:
+    log_groups = list_all_pages(
+        logging_client.list_log_groups,
+        compartment_id=compartment_id,
+        is_compartment_id_in_subtree=include_subcompartments,
+    )
+
+    def list_group_logs(log_group) -> list[dict]:
+        logs = list_all_pages(logging_client.list_logs, log_group_id=log_group.id)
+        result = []
+        for log in logs:
+            source = log.configuration.source if log.configuration else None
+            result.append(
+                {
+                    "id": log.id,
+                    "display_name": log.display_name,
+                    "log_type": log.log_type,
+                    "lifecycle_state": log.lifecycle_state,
+                    "is_enabled": log.is_enabled,
+                    "service": getattr(source, "service", None),
+                    "resource": getattr(source, "resource", None),
+                    "category": getattr(source, "category", None),
+                    "log_group_id": log_group.id,
+                    "log_group_name": log_group.display_name,
+                    "compartment_id": log_group.compartment_id,
+                }
+            )
+        return result
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(len(log_groups), MAX_CONCURRENT_REQUESTS))
+    ) as executor:
+        logs = [
+            log for group in executor.map(list_group_logs, log_groups) for log in group
+        ]
+    logger.info(
+        f"Loaded {len(logs)} logs from {len(log_groups)} log groups into the log catalog"
+    )
+    return logs
+
+
+@mcp.tool
+def find_logs(
+    compartment_id: Annotated[
+        str, "Compartment OCID to search, usually the tenancy OCID"
+    ],
+    name: Annotated[
+        Optional[str],
+        "Optional log display name, matched exactly or else as a substring",
+    ] = None,
+    service: Annotated[
+        Optional[str],
+        "Optional source service of service logs, for example flowlogs, "
+        "objectstorage or loadbalancer",
+    ] = None,
+    resource: Annotated[
+        Optional[str],
+        "Optional source resource of service logs, usually the resource OCID",
+    ] = None,
+    include_subcompartments: Annotated[
+        bool, "Whether to include logs from all subcompartments. Default: True"
+    ] = True,
+    limit: Annotated[int, "Maximum number of logs to return. Default: 50"] = 50,
+    refresh: Annotated[
+        bool, "Whether to rebuild the cached log catalog before searching it"
+    ] = False,
+) -> dict:
+    """
+    Finds logs across every log group under a compartment by display name, source
+    service or source resource, using a cached catalog of the whole compartment
+    tree; for example the flow logs of a subnet are service=flowlogs,
+    resource=<subnet OCID>
+    """
+    catalog = log_catalog_cache.get(
+        LogCatalogKey(compartment_id, include_subcompartments),
+        lambda: load_log_catalog(
+            get_logging_client(), compartment_id, include_subcompartments
+        ),
+        refresh=refresh,
+    )
+    logs = catalog.find(name=name, service=service, resource=resource)
+    return {
+        "catalog_size": len(catalog.logs),
+        "catalog_age_seconds": int(time.time() - catalog.fetched_at),
+        "matches": len(logs),
+        "logs": logs[:limit],
+    }
+
+
+@mcp.tool
+def put_log_entries(
+    log_id: Annotated[str, "OCID of the custom log to write to."],
+    entries: Annotated[
+        list[Union[str, dict]],
+        "Log entries to write. Objects are written as JSON",
+    ],
+    source: Annotated[
+        str, "Where the entries come from, for example a host or script name"
+    ] = __project__,
+    type: Annotated[
+        str, "The type of the entries, for example com.example.deployment"
+    ] = "mcp.custom",
+    subject: Annotated[Optional[str], "Optional subject of the entries"] = None,
+    flush: Annotated[
+        bool,
+        "Whether to write the buffered entries now instead of waiting for the "
+        "batch to fill up or age out",
+    ] = False,
+) -> dict:
+    """
+    Buffers entries for a custom log and writes them in batches, when a batch is
+    full or a few seconds after its first entry, rather than one request per entry
+    """
+    key = LogBatchKey(log_id=log_id, source=source, type=type, subject=subject)
+    flushed = log_ingestion_buffer.add(key, entries)
+    if flush:
+        flushed += log_ingestion_buffer.flush(log_id=log_id)
+    return {
+        "accepted": len(entries),
+        "pending": log_ingestion_buffer.pending_entries(log_id),
+        "flushed": [asdict(result) for result in flushed],
+    }
+
+
+@mcp.tool
+def flush_log_entries(
+    log_id: Annotated[
+        Optional[str], "Optional custom log OCID to flush, defaults to every log"
+    ] = None,
+) -> dict:
+    """Writes out log entries buffered by put_log_entries"""
+    flushed = log_ingestion_buffer.flush(log_id=log_id)
+    return {
+        "flushed": [asdict(result) for result in flushed],
+        "sent_entries": log_ingestion_buffer.sent_entries,
+        "dropped_entries": log_ingestion_buffer.dropped_entries,
+    }
+
+
 def main():
     mcp.run()
+    log_ingestion_buffer.close()
 
 
 if __name__ == "__main__":
@@ -4,12 +4,31 @@ Licensed under the Universal Permissive License v1.0 as shown at
 https://oss.oracle.com/licenses/upl.
 """
 
+import time
 from unittest.mock import MagicMock, create_autospec, patch
 
 import oci
 import pytest
 from fastmcp import Client
-from oracle.oci_logging_mcp_server.server import mcp
+from oracle.oci_logging_mcp_server.cursors import (
+    FollowCursor,
+    FollowCursorKey,
+    FollowCursorStore,
+)
+from oracle.oci_logging_mcp_server.ingestion import LogBatchKey, LogIngestionBuffer
+from oracle.oci_logging_mcp_server.server import (
+    follow_cursors,
+    log_catalog_cache,
+    log_ingestion_buffer,
+    mcp,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_server_state():
+    follow_cursors.clear()
+    log_catalog_cache.clear()
+    log_ingestion_buffer.flush()
 
 
 class TestLoggingTools:
@@ -106,3 +125,317 @@ class TestLoggingTools:
             assert result["log_type"] == "SERVICE"
             assert result["retention_duration"] == 30
             assert result["is_enabled"] == "true"
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_logging_mcp_server.server.get_log_search_client")
+    async def test_search_logs(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        def search_response(entries, next_page):
+            response = create_autospec(oci.response.Response)
+            response.data = oci.loggingsearch.models.SearchResponse(
+                results=[
+                    oci.loggingsearch.models.SearchResult(
+                        data={
+                            "datetime": 1735689600000,
+                            "logContent": {
+                                "id": f"entry{i}",
+                                "time": f"2025-01-01T00:0{minute}:00.000Z",
+                                "source": "app1",
+                                "type": "com.oraclecloud.logging.custom.app",
+                                "data": {"level": level, "message": f"line {i}"},
+                            },
+                        }
+                    )
+                    for i, minute, level in entries
+                ]
+            )
+            response.has_next_page = next_page is not None
+            response.next_page = next_page
+            return response
+
+        mock_client.search_logs.side_effect = [
+            search_response([(1, 0, "ERROR"), (2, 0, "INFO")], "page2"),
+            search_response([(3, 1, "ERROR"), (4, 1, "ERROR")], None),
+        ]
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "search_logs",
+                    {
+                        "search_query": 'search "compartment1" | where level = "ERROR"',
+                        "time_start": "2025-01-01T00:00:00Z",
+                        "time_end": "2025-01-01T01:00:00Z",
+                        "max_rows": 3,
+                        "aggregate_by": ["level", "minute"],
+                        "sample_size": 2,
+                    },
+                )
+            ).structured_content
+
+            assert mock_client.search_logs.call_count == 2
+            assert mock_client.search_logs.call_args.kwargs["page"] == "page2"
+            assert result["returned"] == 3
+            assert result["truncated"] is True
+            assert result["aggregations"]["level"] == {"ERROR": 2, "INFO": 1}
+            assert result["aggregations"]["minute"] == {
+                "2025-01-01T00:00": 2,
+                "2025-01-01T00:01": 1,
+            }
+            assert [entry["id"] for entry in result["samples"]] == ["entry1", "entry2"]
+            assert result["samples"][0]["message"] == "line 1"
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_logging_mcp_server.server.get_log_search_client")
+    async def test_follow_logs_returns_only_new_entries(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        def search_response(entries):
+            response = create_autospec(oci.response.Response)
+            response.data = oci.loggingsearch.models.SearchResponse(
+                results=[
+                    oci.loggingsearch.models.SearchResult(
+                        data={
+                            "datetime": millis,
+                            "logContent": {
+                                "id": entry_id,
+                                "data": {"message": entry_id},
+                            },
+                        }
+                    )
+                    for entry_id, millis in entries
+                ]
+            )
+            response.has_next_page = False
+            response.next_page = None
+            return response
+
+        base = int(time.time() * 1000) - 60_000
+        mock_client.search_logs.side_effect = [
+            search_response([("entry1", base), ("entry2", base + 1_000)]),
+            # The second search re-reads the overlap window before the newest entry
+            # already returned, where entry1b was ingested late
+            search_response(
+                [
+                    ("entry1", base),
+                    ("entry1b", base + 500),
+                    ("entry2", base + 1_000),
+                    ("entry3", base + 2_000),
+                ]
+            ),
+        ]
+        arguments = {"cursor_id": "incident1", "search_query": 'search "compartment1"'}
+
+        async with Client(mcp) as client:
+            first = (
+                await client.call_tool("follow_logs", arguments)
+            ).structured_content
+            second = (
+                await client.call_tool("follow_logs", arguments)
+            ).structured_content
+
+        assert [entry["id"] for entry in first["entries"]] == ["entry1", "entry2"]
+        assert [entry["id"] for entry in second["entries"]] == ["entry1b", "entry3"]
+        details = mock_client.search_logs.call_args.kwargs["search_logs_details"]
+        # The default overlap is 300 seconds
+        assert int(details.time_start.timestamp() * 1000) == base + 1_000 - 300_000
+        assert details.search_query.endswith("| sort by datetime asc")
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_logging_mcp_server.server.get_logging_client")
+    async def test_find_logs(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        def page_of(data, next_page=None):
+            response = create_autospec(oci.response.Response)
+            response.data = data
+            response.has_next_page = next_page is not None
+            response.next_page = next_page
+            return response
+
+        mock_client.list_log_groups.side_effect = [
+            page_of(
+                [
+                    oci.logging.models.LogGroupSummary(
+                        id="logGroup1", display_name="network", compartment_id="c1"
+                    )
+                ],
+                "page2",
+            ),
+            page_of(
+                [
+                    oci.logging.models.LogGroupSummary(
+                        id="logGroup2", display_name="apps", compartment_id="c2"
+                    )
+                ]
+            ),
+        ]
+
+        def service_log(log_id, display_name, service, resource):
+            return oci.logging.models.LogSummary(
+                id=log_id,
+                display_name=display_name,
+                log_type="SERVICE",
+                configuration=oci.logging.models.Configuration(
+                    source=oci.logging.models.OciService(
+                        service=service, resource=resource, category="all"
+                    )
+                ),
+            )
+
+        logs = {
+            "logGroup1": [
+                service_log("log1", "subnet1_flowlogs", "flowlogs", "subnet1"),
+                service_log("log2", "subnet2_flowlogs", "flowlogs", "subnet2"),
+            ],
+            "logGroup2": [
+                oci.logging.models.LogSummary(
+                    id="log3", display_name="app_events", log_type="CUSTOM"
+                )
+            ],
+        }
+        mock_client.list_logs.side_effect = lambda log_group_id, page: (
+            page_of(logs[log_group_id])
+        )
+
+        async with Client(mcp) as client:
+            flow_logs = (
+                await client.call_tool(
+                    "find_logs",
+                    {
+                        "compartment_id": "tenancy1",
+                        "service": "flowlogs",
+                        "resource": "subnet2",
+                    },
+                )
+            ).structured_content
+            by_name = (
+                await client.call_tool(
+                    "find_logs", {"compartment_id": "tenancy1", "name": "APP"}
+                )
+            ).structured_content
+
+        # The second lookup is served from the cached catalog
+        assert mock_client.list_log_groups.call_count == 2
+        assert mock_client.list_log_groups.call_args.kwargs[
+            "is_compartment_id_in_subtree"
+        ]
+        assert flow_logs["catalog_size"] == 3
+        assert [log["id"] for log in flow_logs["logs"]] == ["log2"]
+        assert flow_logs["logs"][0]["log_group_name"] == "network"
+        assert [log["id"] for log in by_name["logs"]] == ["log3"]
+        assert by_name["logs"][0]["compartment_id"] == "c2"
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_logging_mcp_server.ingestion.time.sleep")
+    @patch("oracle.oci_logging_mcp_server.server.get_logging_ingestion_client")
+    async def test_put_log_entries_batches_and_retries(
+        self, mock_get_client, mock_sleep
+    ):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.put_logs.side_effect = [
+            oci.exceptions.ServiceError(429, "TooManyRequests", {}, "throttled"),
+            create_autospec(oci.response.Response),
+        ]
+
+        async with Client(mcp) as client:
+            buffered = (
+                await client.call_tool(
+                    "put_log_entries",
+                    {"log_id": "log1", "entries": ["deploy started", {"step": 1}]},
+                )
+            ).structured_content
+            flushed = (
+                await client.call_tool(
+                    "put_log_entries",
+                    {"log_id": "log1", "entries": ["deploy done"], "flush": True},
+                )
+            ).structured_content
+
+        assert buffered["pending"] == 2
+        assert buffered["flushed"] == []
+        assert flushed["pending"] == 0
+        assert flushed["flushed"] == [{"log_id": "log1", "entries": 3, "error": None}]
+        # One batched request, retried once after being throttled
+        assert mock_client.put_logs.call_count == 2
+        assert mock_sleep.call_count == 1
+        details = mock_client.put_logs.call_args.kwargs["put_logs_details"]
+        batch = details.log_entry_batches[0]
+        assert [entry.data for entry in batch.entries] == [
+            "deploy started",
+            '{"step": 1}',
+            "deploy done",
+        ]
+
+
+class TestLogIngestionBuffer:
+    @patch("oracle.oci_logging_mcp_server.ingestion.time.sleep")
+    def test_flush_accounts_for_every_batch_on_any_error(self, mock_sleep):
+        mock_client = MagicMock()
+
+        def put_logs(log_id, put_logs_details):
+            if log_id == "log2":
+                raise ValueError("malformed entry")
+            if mock_client.put_logs.call_count == 1:
+                raise oci.exceptions.ConnectTimeout("connect timed out")
+
+        mock_client.put_logs.side_effect = put_logs
+        buffer = LogIngestionBuffer(lambda: mock_client, flush_interval=3600)
+        for log_id in ("log1", "log2", "log3"):
+            buffer.add(LogBatchKey(log_id, "source", "type", None), [log_id])
+
+        results = buffer.close()
+
+        assert [(r.log_id, r.error) for r in results] == [
+            ("log1", None),
+            ("log2", "malformed entry"),
+            ("log3", None),
+        ]
+        # The connection timeout is retried, the unexpected error is not
+        assert mock_sleep.call_count == 1
+        assert buffer.sent_entries == 2
+        assert buffer.dropped_entries == 1
+        assert buffer.pending_entries() == 0
+
+    def test_client_failures_drop_the_batch(self):
+        def client_factory():
+            raise oci.exceptions.InvalidConfig("missing key_file")
+
+        buffer = LogIngestionBuffer(client_factory, flush_interval=3600)
+        buffer.add(LogBatchKey("log1", "source", "type", None), ["a", "b"])
+
+        results = buffer.close()
+
+        assert results[0].error is not None
+        assert buffer.dropped_entries == 2
+
+
+class TestFollowCursorStore:
+    def test_least_recently_used_cursor_is_evicted(self):
+        store = FollowCursorStore(max_cursors=2)
+        keys = [FollowCursorKey(f"cursor{i}", "search") for i in range(3)]
+        store.put(keys[0], FollowCursor(last_time=0))
+        store.put(keys[1], FollowCursor(last_time=0))
+        store.get(keys[0])
+        store.put(keys[2], FollowCursor(last_time=0))
+
+        assert len(store) == 2
+        assert store.get(keys[1]) is None
+        assert store.get(keys[0]) is not None
+
+    def test_cursor_forgets_entries_outside_the_overlap(self):
+        cursor = FollowCursor(last_time=0)
+        cursor.record(1_000, "old")
+        cursor.record(10_000, "recent")
+        cursor.record(11_000, "newest")
+
+        cursor.prune(overlap_millis=5_000)
+        assert list(cursor.seen) == ["recent", "newest"]
+
+        cursor.prune(overlap_millis=5_000, max_seen=1)
+        assert list(cursor.seen) == ["newest"]
@@ -0,0 +1,224 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from logging import Logger
+from typing import NamedTuple, Optional
+
+import numpy as np
+from oracle.oci_monitoring_mcp_server.series import MetricSeries
+
+logger = Logger(__name__, level="INFO")
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+class MetricCacheKey(NamedTuple):
+    compartment_id: str
+    compartment_id_in_subtree: bool
+    namespace: str
+    query: str
+    resolution: str
+
+
+@dataclass
+class MetricCacheEntry:
+    metric: str
+    # Sorted, non-overlapping [start, end) ranges in epoch milliseconds that are
+    # fully closed and have been fetched
+    covered: list[tuple[int, int]] = field(default_factory=list)
+    # Series keyed by their serialized dimensions
+    series: dict[str, MetricSeries] = field(default_factory=dict)
+
+
+def dimensions_key(dimensions: dict) -> str:
+    return json.dumps(dimensions, sort_keys=True)
+
+
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(r for r in ranges if r[0] < r[1]):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class MetricCache:
+    """
+    A local time-series cache of aggregated datapoints.
+
+    Each query key keeps the time ranges already fetched and, per series, contiguous
+    sorted timestamp and value arrays. Callers ask for the missing sub-ranges of a
+    window, fetch only those, store them and read the whole window back. Only ranges
+    that are fully in the past are marked as covered, so the still-open tail of a
+    window is always refetched. When persist_dir is set, entries are also written
+    to and lazily loaded from disk.
+    """
+
+    def __init__(
+        self,
+        persist_dir: Optional[str] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.persist_dir = persist_dir
+        self.max_entries = max_entries
+        self._entries: OrderedDict[MetricCacheKey, MetricCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def missing_ranges(
+        self, key: MetricCacheKey, start: int, end: int
+    ) -> list[tuple[int, int]]:
+        with self._lock:
+            entry = self._get_entry(key)
+            covered = entry.covered if entry else []
+        missing = []
+        cursor = start
+        for covered_start, covered_end in covered:
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            missing.append((cursor, end))
+        return missing
+
+    def store(
+        self,
+        key: MetricCacheKey,
+        metric: str,
+        start: int,
+        end: int,
+        series_list: list[MetricSeries],
+        closed_until: int,
+    ):
+        """Merge fetched series for [start, end), newer datapoints win on overlap"""
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                entry = MetricCacheEntry(metric=metric)
+                self._entries[key] = entry
+                self._evict()
+
+            for s in series_list:
+                dims = dimensions_key(s.dimensions)
+                cached = entry.series.get(dims)
+                if cached is None:
+                    entry.series[dims] = s
+                    continue
+                timestamps = np.concatenate([s.timestamps, cached.timestamps])
+                values = np.concatenate([s.values, cached.values])
+                # np.unique returns the first occurrence, i.e. the fresh datapoint
+                timestamps, index = np.unique(timestamps, return_index=True)
+                entry.series[dims] = MetricSeries(
+                    metric=cached.metric,
+                    dimensions=cached.dimensions,
+                    timestamps=timestamps,
+                    values=values[index],
+                )
+
+            closed_end = min(end, closed_until)
+            if start < closed_end:
+                entry.covered = merge_ranges(entry.covered + [(start, closed_end)])
+                self._persist(key, entry)
+
+    def get(self, key: MetricCacheKey, start: int, end: int) -> list[MetricSeries]:
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                return []
+            result = []
+            for s in entry.series.values():
+                lo, hi = np.searchsorted(s.timestamps, [start, end])
+                if lo < hi:
+                    result.append(
+                        MetricSeries(
+                            metric=s.metric,
+                            dimensions=s.dimensions,
+                            timestamps=s.timestamps[lo:hi],
+                            values=s.values[lo:hi],
+                        )
+                    )
+            return result
+
+    def _get_entry(self, key: MetricCacheKey) -> Optional[MetricCacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load(key)
+            if entry is not None:
+                self._entries[key] = entry
+                self._evict()
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: MetricCacheKey) -> str:
+        digest = hashlib.sha256(json.dumps(list(key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.persist_dir, f"{digest}.npz")
+
+    def _persist(self, key: MetricCacheKey, entry: MetricCacheEntry):
+        if not self.persist_dir:
+            return
+        try:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            series = list(entry.series.values())
+            meta = {
+                "key": list(key),
+                "metric": entry.metric,
+                "covered": entry.covered,
+                "dimensions": [s.dimensions for s in series],
+            }
+            arrays = {"meta": np.array(json.dumps(meta))}
+            for i, s in enumerate(series):
+                arrays[f"timestamps_{i}"] = s.timestamps
+                arrays[f"values_{i}"] = s.values
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Unable to persist metric cache entry: {e}")
+
+    def _load(self, key: MetricCacheKey) -> Optional[MetricCacheEntry]:
+        if not self.persist_dir or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with np.load(self._path(key)) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta["key"] != list(key):
+                    return None
+                entry = MetricCacheEntry(
+                    metric=meta["metric"],
+                    covered=[tuple(r) for r in meta["covered"]],
+                )
+                for i, dimensions in enumerate(meta["dimensions"]):
+                    entry.series[dimensions_key(dimensions)] = MetricSeries(
+                        metric=meta["metric"],
+                        dimensions=dimensions,
+                        timestamps=data[f"timestamps_{i}"],
+                        values=data[f"values_{i}"],
+                    )
+                return entry
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Unable to load metric cache entry: {e}")
+            return None
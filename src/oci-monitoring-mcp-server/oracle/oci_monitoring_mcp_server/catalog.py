@@ -0,0 +1,95 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import re
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+
+DEFAULT_TTL_SECONDS = 900
+
+# MetricName[interval]{dimensionName = "value", ...}.statistic()
+QUERY_PATTERN = re.compile(
+    r"^\s*(?P<name>[A-Za-z0-9_.\-]+)\s*\[[^\]]+\]\s*(?:\{(?P<filters>[^}]*)\})?"
+)
+FILTER_PATTERN = re.compile(r'(?P<key>[A-Za-z0-9_.\-]+)\s*=~?\s*"(?P<value>[^"]*)"')
+
+
+class MetricCatalogKey(NamedTuple):
+    compartment_id: str
+    compartment_id_in_subtree: bool
+
+
+class MetricCatalog:
+    """
+    An index of the metrics reported in a compartment: namespace -> metric name ->
+    dimension key -> dimension values, plus a reverse index from dimension key to
+    the (namespace, metric name) pairs reporting it.
+    """
+
+    def __init__(self, metrics: Iterable, fetched_at: Optional[float] = None):
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.namespaces: dict[str, dict[str, dict[str, set[str]]]] = {}
+        self.by_dimension: dict[str, set[tuple[str, str]]] = {}
+        for metric in metrics:
+            dimensions = self.namespaces.setdefault(metric.namespace, {}).setdefault(
+                metric.name, {}
+            )
+            for key, value in (metric.dimensions or {}).items():
+                dimensions.setdefault(key, set()).add(value)
+                self.by_dimension.setdefault(key, set()).add(
+                    (metric.namespace, metric.name)
+                )
+
+    def validate_query(self, namespace: str, query: str) -> list[str]:
+        """Return the problems found checking a MQL query against the catalog"""
+        metrics = self.namespaces.get(namespace)
+        if metrics is None:
+            return [f"Namespace {namespace} has no metrics in this compartment"]
+
+        match = QUERY_PATTERN.match(query)
+        if not match:
+            return [f"Unable to parse metric query: {query}"]
+        name = match.group("name")
+        dimensions = metrics.get(name)
+        if dimensions is None:
+            return [f"Metric {name} is not reported in namespace {namespace}"]
+
+        errors = []
+        for f in FILTER_PATTERN.finditer(match.group("filters") or ""):
+            key, value = f.group("key"), f.group("value")
+            if key not in dimensions:
+                errors.append(f"Metric {name} has no dimension {key}")
+            elif "=~" not in f.group(0) and value not in dimensions[key]:
+                errors.append(f"No {name} datapoints have {key} = {value}")
+        return errors
+
+
+class MetricCatalogCache:
+    """Caches one MetricCatalog per compartment scope for ttl seconds"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        self._catalogs: dict[MetricCatalogKey, MetricCatalog] = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._catalogs.clear()
+
+    def get(
+        self,
+        key: MetricCatalogKey,
+        load: Callable[[], Iterable],
+        refresh: bool = False,
+    ) -> MetricCatalog:
+        with self._lock:
+            catalog = self._catalogs.get(key)
+        if refresh or catalog is None or time.time() - catalog.fetched_at > self.ttl:
+            catalog = MetricCatalog(load())
+            with self._lock:
+                self._catalogs[key] = catalog
+        return catalog
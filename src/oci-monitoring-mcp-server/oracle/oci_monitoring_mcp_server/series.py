@@ -0,0 +1,279 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+
+RESOLUTION_UNITS_MILLIS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000}
+
+# Keep each summarize_metrics_data call well inside the API's datapoint and time
+# range limits: at most this many datapoints per series and at most 90 days
+MAX_DATAPOINTS_PER_SERIES = 1440
+# LTTB always keeps the first and last points plus at least one in between
+MIN_DOWNSAMPLE_POINTS = 3
+MAX_QUERY_RANGE_MILLIS = 90 * RESOLUTION_UNITS_MILLIS["d"]
+
+
+def to_epoch_millis(timestamp) -> int:
+    """Convert a datapoint timestamp (datetime or ISO 8601 string) to epoch milliseconds"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp() * 1000)
+
+
+def format_epoch_millis(timestamp: int) -> str:
+    """Format epoch milliseconds as an ISO 8601 UTC string accepted by the API"""
+    formatted = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).isoformat()
+    return formatted.replace("+00:00", "Z")
+
+
+def resolution_millis(resolution: str) -> int:
+    """Convert a resolution such as 1m, 5m, 1h or 1d to milliseconds"""
+    return int(resolution[:-1]) * RESOLUTION_UNITS_MILLIS[resolution[-1]]
+
+
+def split_range(start: int, end: int, resolution: str) -> list[tuple[int, int]]:
+    """Split [start, end) into consecutive, resolution-aligned chunks the API accepts"""
+    step = resolution_millis(resolution)
+    span = max(step, min(MAX_DATAPOINTS_PER_SERIES * step, MAX_QUERY_RANGE_MILLIS))
+    span = span // step * step
+    chunks = []
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(end, (chunk_start // step) * step + span)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    return chunks
+
+
+def format_timestamps(timestamps: np.ndarray) -> list[str]:
+    """Format epoch milliseconds as ISO 8601 UTC strings"""
+    formatted = np.datetime_as_string(timestamps.astype("datetime64[ms]"), unit="s")
+    return [f"{ts}Z" for ts in formatted]
+
+
+@dataclass
+class MetricSeries:
+    metric: str
+    dimensions: dict
+    timestamps: np.ndarray
+    values: np.ndarray
+
+
+def to_metric_series(metric: str, metric_data) -> MetricSeries:
+    points = getattr(metric_data, "aggregated_datapoints", None) or []
+    timestamps = np.fromiter(
+        (to_epoch_millis(p.timestamp) for p in points),
+        dtype=np.int64,
+        count=len(points),
+    )
+    values = np.fromiter(
+        (np.nan if p.value is None else p.value for p in points),
+        dtype=np.float64,
+        count=len(points),
+    )
+    order = np.argsort(timestamps, kind="stable")
+    return MetricSeries(
+        metric=metric,
+        dimensions=getattr(metric_data, "dimensions", None) or {},
+        timestamps=timestamps[order],
+        values=values[order],
+    )
+
+
+def to_columnar(series_list: list[MetricSeries], shared_axis: bool = True) -> dict:
+    """
+    Lay out series on one shared, sorted timestamp axis. Each series contributes a
+    value array aligned to that axis, with null where it has no datapoint.
+
+    Without a shared axis (used for downsampled series, which keep different
+    datapoints) each series carries its own timestamps array instead.
+    """
+    if not shared_axis:
+        return {
+            "series": [
+                {
+                    "metric": s.metric,
+                    "dimensions": s.dimensions,
+                    "timestamps": format_timestamps(s.timestamps),
+                    "values": np.where(np.isnan(s.values), None, s.values).tolist(),
+                }
+                for s in series_list
+            ]
+        }
+
+    if not series_list:
+        return {"timestamps": [], "series": []}
+
+    timestamps = np.unique(np.concatenate([s.timestamps for s in series_list]))
+    series = []
+    for s in series_list:
+        values = np.full(timestamps.shape, np.nan)
+        values[np.searchsorted(timestamps, s.timestamps)] = s.values
+        series.append(
+            {
+                "metric": s.metric,
+                "dimensions": s.dimensions,
+                "values": np.where(np.isnan(values), None, values).tolist(),
+            }
+        )
+    return {"timestamps": format_timestamps(timestamps), "series": series}
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: keep the first and last points and, from each
+    of max_points - 2 buckets in between, the point forming the largest triangle
+    with the previously kept point and the average of the next bucket.
+    """
+    n = len(x)
+    if max_points < 3:
+        raise ValueError("LTTB downsampling needs max_points of at least 3")
+    if max_points >= n:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo = edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        areas = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Keep the minimum and maximum of each of max_points / 2 equal-count buckets"""
+    n = len(y)
+    buckets = max_points // 2
+    if buckets < 1:
+        raise ValueError("Min/max downsampling needs max_points of at least 2")
+    if max_points >= n:
+        return np.arange(n)
+
+    bucket = np.arange(n) * buckets // n
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(buckets))
+    ends = np.append(starts[1:], n)
+    return np.unique(np.concatenate([order[starts], order[ends - 1]]))
+
+
+def downsample(series: MetricSeries, max_points: int, method: str) -> MetricSeries:
+    """Reduce a series to at most max_points datapoints, preserving its shape"""
+    if max_points < MIN_DOWNSAMPLE_POINTS:
+        raise ValueError(
+            f"max_points must be at least {MIN_DOWNSAMPLE_POINTS}, got {max_points}"
+        )
+    valid = ~np.isnan(series.values)
+    timestamps = series.timestamps[valid]
+    values = series.values[valid]
+    if method == "lttb":
+        index = lttb_indices(timestamps.astype(np.float64), values, max_points)
+    elif method == "minmax":
+        index = minmax_indices(values, max_points)
+    else:
+        raise ValueError(f"Unsupported downsampling method: {method}")
+    return MetricSeries(
+        metric=series.metric,
+        dimensions=series.dimensions,
+        timestamps=timestamps[index],
+        values=values[index],
+    )
+
+
+def stitch_series(series_list: list[MetricSeries]) -> list[MetricSeries]:
+    """
+    Join the chunks of each (metric, dimensions) series, in order of first
+    appearance, dropping datapoints duplicated at chunk boundaries
+    """
+    groups: dict[tuple[str, str], list[MetricSeries]] = {}
+    for s in series_list:
+        key = (s.metric, json.dumps(s.dimensions, sort_keys=True))
+        groups.setdefault(key, []).append(s)
+
+    stitched = []
+    for chunks in groups.values():
+        timestamps = np.concatenate([c.timestamps for c in chunks])
+        values = np.concatenate([c.values for c in chunks])
+        timestamps, index = np.unique(timestamps, return_index=True)
+        stitched.append(
+            MetricSeries(
+                metric=chunks[0].metric,
+                dimensions=chunks[0].dimensions,
+                timestamps=timestamps,
+                values=values[index],
+            )
+        )
+    return stitched
+
+
+def trim_series(
+    series_list: list[MetricSeries], start: int, end: int
+) -> list[MetricSeries]:
+    """Keep only the datapoints in [start, end), dropping series left empty"""
+    trimmed = []
+    for s in series_list:
+        lo, hi = np.searchsorted(s.timestamps, [start, end])
+        if lo < hi:
+            trimmed.append(
+                MetricSeries(
+                    metric=s.metric,
+                    dimensions=s.dimensions,
+                    timestamps=s.timestamps[lo:hi],
+                    values=s.values[lo:hi],
+                )
+            )
+    return trimmed
+
+
+def series_statistics(series_list: list[MetricSeries], statistic: str) -> np.ndarray:
+    """
+    Compute one statistic per series over a NaN-padded matrix of their values.
+    Supported statistics are mean, max, min, sum, count and percentiles written
+    as p<number>, for example p95.
+    """
+    if not series_list:
+        return np.empty(0)
+
+    lengths = np.array([len(s.values) for s in series_list])
+    matrix = np.full((len(series_list), max(1, lengths.max())), np.nan)
+    mask = np.arange(matrix.shape[1]) < lengths[:, None]
+    matrix[mask] = np.concatenate([s.values for s in series_list])
+    if statistic == "count":
+        return np.sum(~np.isnan(matrix), axis=1).astype(np.float64)
+
+    # Leave all-NaN rows out of the reductions, they would only raise warnings
+    has_values = ~np.all(np.isnan(matrix), axis=1)
+    rows = matrix[has_values]
+    result = np.full(len(series_list), np.nan)
+    if not rows.size:
+        return result
+    if statistic == "mean":
+        result[has_values] = np.nanmean(rows, axis=1)
+    elif statistic == "max":
+        result[has_values] = np.nanmax(rows, axis=1)
+    elif statistic == "min":
+        result[has_values] = np.nanmin(rows, axis=1)
+    elif statistic == "sum":
+        result[has_values] = np.nansum(rows, axis=1)
+    elif statistic.startswith("p") and statistic[1:].replace(".", "", 1).isdigit():
+        result[has_values] = np.nanpercentile(rows, float(statistic[1:]), axis=1)
+    else:
+        raise ValueError(f"Unsupported statistic: {statistic}")
+    return result
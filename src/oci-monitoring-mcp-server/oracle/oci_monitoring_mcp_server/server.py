@@ -4,13 +4,40 @@ Licensed under the Universal Permissive License v1.0 as shown at
 https://oss.oracle.com/licenses/upl.
 """
 
+import heapq
 import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from logging import Logger
-from typing import Annotated
+from typing import Annotated, Literal, Optional, Union
 
+import numpy as np
 import oci
 from fastmcp import FastMCP
-from oci.monitoring.models import SummarizeMetricsDataDetails
+from oci.monitoring.models import ListMetricsDetails, SummarizeMetricsDataDetails
+from oracle.oci_monitoring_mcp_server.cache import MetricCache, MetricCacheKey
+from oracle.oci_monitoring_mcp_server.catalog import (
+    MetricCatalog,
+    MetricCatalogCache,
+    MetricCatalogKey,
+)
+from oracle.oci_monitoring_mcp_server.series import (
+    MIN_DOWNSAMPLE_POINTS,
+    MetricSeries,
+    downsample,
+    format_epoch_millis,
+    resolution_millis,
+    series_statistics,
+    split_range,
+    stitch_series,
+    to_columnar,
+    to_epoch_millis,
+    to_metric_series,
+    trim_series,
+)
 
 from . import __project__, __version__
 
@@ -18,6 +45,16 @@ logger = Logger(__name__, level="INFO")
 
 mcp = FastMCP(name=__project__)
 
+MAX_CONCURRENT_QUERIES = 8
+MAX_QUERIES_PER_SECOND = 10
+MAX_CATALOG_DIMENSION_VALUES = 50
+MAX_DASHBOARD_HISTORY_ALARMS = 50
+SEVERITY_ORDER = {"CRITICAL": 0, "ERROR": 1, "WARNING": 2, "INFO": 3}
+
+# Set OCI_MONITORING_CACHE_DIR to persist closed metric windows across restarts
+metric_cache = MetricCache(persist_dir=os.getenv("OCI_MONITORING_CACHE_DIR"))
+metric_catalog_cache = MetricCatalogCache()
+
 
 def get_monitoring_client():
     logger.info("entering get_monitoring_client")
@@ -36,14 +73,116 @@ def get_monitoring_client():
     return oci.monitoring.MonitoringClient(config, signer=signer)
 
 
+class RateLimiter:
+    """Spaces calls evenly so that at most `rate` start per second, across threads"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+monitoring_rate_limiter = RateLimiter(MAX_QUERIES_PER_SECOND)
+
+
+def summarize_metric(
+    monitoring_client,
+    key: MetricCacheKey,
+    metric: str,
+    start: int,
+    end: int,
+) -> list[MetricSeries]:
+    monitoring_rate_limiter.acquire()
+    series_list = monitoring_client.summarize_metrics_data(
+        compartment_id=key.compartment_id,
+        summarize_metrics_data_details=SummarizeMetricsDataDetails(
+            namespace=key.namespace,
+            query=key.query,
+            start_time=format_epoch_millis(start),
+            end_time=format_epoch_millis(end),
+            resolution=key.resolution,
+        ),
+        compartment_id_in_subtree=key.compartment_id_in_subtree,
+    ).data
+    return [to_metric_series(metric, series) for series in series_list]
+
+
+def fetch_metrics(
+    monitoring_client,
+    queries: list[tuple[str, MetricCacheKey]],
+    start_time: str,
+    end_time: str,
+    use_cache: bool = True,
+) -> list[MetricSeries]:
+    """
+    Fetch the series for each (metric, key) query over the time range. With the
+    cache enabled only the sub-ranges not already cached are requested from
+    Monitoring. Ranges are split into chunks the API accepts, fetched concurrently
+    under a rate limit and stitched back together in order.
+    """
+    start = to_epoch_millis(start_time)
+    end = to_epoch_millis(end_time)
+
+    tasks = []
+    for metric, key in queries:
+        step = resolution_millis(key.resolution)
+        ranges = (
+            metric_cache.missing_ranges(key, start, end)
+            if use_cache
+            else [(start, end)]
+        )
+        for range_start, range_end in ranges:
+            aligned_end = -(-range_end // step) * step
+            for chunk in split_range(
+                range_start // step * step, aligned_end, key.resolution
+            ):
+                tasks.append((metric, key, *chunk))
+
+    def fetch(task) -> list[MetricSeries]:
+        metric, key, task_start, task_end = task
+        return summarize_metric(monitoring_client, key, metric, task_start, task_end)
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(len(tasks), MAX_CONCURRENT_QUERIES))
+    ) as executor:
+        results = list(executor.map(fetch, tasks))
+
+    if not use_cache:
+        # Chunks are aligned to whole buckets, trim them back to the requested range
+        # the way metric_cache.get does on the cached path
+        stitched = stitch_series([series for result in results for series in result])
+        return trim_series(stitched, start, end)
+
+    now = int(time.time() * 1000)
+    for (metric, key, task_start, task_end), result in zip(tasks, results):
+        step = resolution_millis(key.resolution)
+        # Leave the latest complete bucket open too, datapoints may still arrive late
+        closed_until = now // step * step - step
+        metric_cache.store(key, metric, task_start, task_end, result, closed_until)
+    logger.info(f"Fetched {len(tasks)} uncached chunks for {len(queries)} queries")
+
+    return [
+        series for _, key in queries for series in metric_cache.get(key, start, end)
+    ]
+
+
 @mcp.tool
 def get_compute_metrics(
     compartment_id: str,
     start_time: str,
     end_time: str,
     metricName: Annotated[
-        str,
-        "The metric that the user wants to fetch. Currently we only support:"
+        Union[str, list[str]],
+        "The metric, or list of metrics, that the user wants to fetch. "
+        "Metrics in a list are queried concurrently. Currently we only support:"
         "CpuUtilization, MemoryUtilization, DiskIopsRead, DiskIopsWritten,"
         "DiskBytesRead, DiskBytesWritten, NetworksBytesIn,"
         "NetworksBytesOut, LoadAverage, MemoryAllocationStalls",
@@ -65,44 +204,267 @@ def get_compute_metrics(
         bool,
         "Whether to include metrics from all subcompartments of the specified compartment",
     ] = False,
-) -> list[dict]:
+    use_cache: Annotated[
+        bool,
+        "Whether to serve already fetched, closed time ranges from the local "
+        "metric cache and only query Monitoring for the rest. Default: True",
+    ] = True,
+    max_points: Annotated[
+        Optional[int],
+        "Optional maximum number of datapoints to return per series, at least 3. "
+        "Longer series "
+        "are downsampled, keeping their shape, and each series then carries its own "
+        "timestamps array instead of the shared one",
+    ] = None,
+    downsample_method: Annotated[
+        Literal["lttb", "minmax"],
+        "How to downsample when max_points is set: lttb "
+        "(Largest-Triangle-Three-Buckets) or minmax (minimum and maximum per "
+        "bucket). Default: lttb",
+    ] = "lttb",
+) -> dict:
+    """
+    Returns the metrics in a columnar layout: a shared "timestamps" array and,
+    for each series, its metric name, dimensions and a "values" array aligned
+    to the timestamps (null where the series has no datapoint).
+    """
+    if max_points is not None and max_points < MIN_DOWNSAMPLE_POINTS:
+        raise ValueError(
+            f"max_points must be at least {MIN_DOWNSAMPLE_POINTS}, got {max_points}"
+        )
     monitoring_client = get_monitoring_client()
     namespace = "oci_computeagent"
     filter_clause = f'{{resourceId="{instance_id}"}}' if instance_id else ""
-    query = f"{metricName}[{resolution}]{filter_clause}.{aggregation}()"
+    metrics = [metricName] if isinstance(metricName, str) else list(metricName)
+    queries = [
+        (
+            metric,
+            MetricCacheKey(
+                compartment_id=compartment_id,
+                compartment_id_in_subtree=compartment_id_in_subtree,
+                namespace=namespace,
+                query=f"{metric}[{resolution}]{filter_clause}.{aggregation}()",
+                resolution=resolution,
+            ),
+        )
+        for metric in metrics
+    ]
 
-    series_list = monitoring_client.summarize_metrics_data(
+    series_list = fetch_metrics(
+        monitoring_client, queries, start_time, end_time, use_cache
+    )
+    if max_points is not None:
+        series_list = [
+            downsample(s, max_points, downsample_method) for s in series_list
+        ]
+    return to_columnar(series_list, shared_axis=max_points is None)
+
+
+@mcp.tool
+def rank_resources_by_metric(
+    compartment_id: str,
+    start_time: str,
+    end_time: str,
+    metricName: Annotated[str, "The metric to rank resources by, e.g. CpuUtilization"],
+    statistic: Annotated[
+        str,
+        "The statistic computed over each resource's datapoints: mean, max, min, "
+        "sum, count or a percentile such as p50, p90, p95, p99. Default: mean",
+    ] = "mean",
+    limit: Annotated[int, "The number of resources to return. Default: 10"] = 10,
+    order: Annotated[
+        Literal["top", "bottom"],
+        "Whether to return the highest (top) or lowest (bottom) ranked resources",
+    ] = "top",
+    namespace: Annotated[
+        str, "The metric namespace. Default: oci_computeagent"
+    ] = "oci_computeagent",
+    resolution: Annotated[
+        str,
+        "The granularity of the datapoints the statistic is computed over. "
+        "Currently we only support: 1m, 5m, 1h, 1d. Default: 5m",
+    ] = "5m",
+    aggregation: Annotated[
+        str,
+        "The aggregation applied per datapoint. Currently we only support: "
+        "mean, sum, max, min, count. Default: mean",
+    ] = "mean",
+    compartment_id_in_subtree: Annotated[
+        bool,
+        "Whether to include resources from all subcompartments. Default: True",
+    ] = True,
+) -> list[dict]:
+    """
+    Ranks the resources reporting a metric by a statistic over the time range and
+    returns only the top or bottom N, e.g. the 10 instances with the highest p95 CPU
+    """
+    monitoring_client = get_monitoring_client()
+    key = MetricCacheKey(
         compartment_id=compartment_id,
-        summarize_metrics_data_details=SummarizeMetricsDataDetails(
-            namespace=namespace,
-            query=query,
-            start_time=start_time,
-            end_time=end_time,
-            resolution=resolution,
-        ),
         compartment_id_in_subtree=compartment_id_in_subtree,
-    ).data
+        namespace=namespace,
+        query=f"{metricName}[{resolution}].{aggregation}()",
+        resolution=resolution,
+    )
+    series_list = fetch_metrics(
+        monitoring_client, [(metricName, key)], start_time, end_time
+    )
+    values = series_statistics(series_list, statistic)
 
-    result: list[dict] = []
-    for series in series_list:
-        dims = getattr(series, "dimensions", None)
-        points = []
-        for p in getattr(series, "aggregated_datapoints", []):
-            points.append(
-                {
-                    "timestamp": getattr(p, "timestamp", None),
-                    "value": getattr(p, "value", None),
-                }
-            )
+    ranked = [i for i in range(len(series_list)) if not np.isnan(values[i])]
+    select = heapq.nlargest if order == "top" else heapq.nsmallest
+    ranked = select(limit, ranked, key=values.__getitem__)
+
+    result = []
+    for rank, i in enumerate(ranked, start=1):
+        dimensions = series_list[i].dimensions
         result.append(
             {
-                "dimensions": dims,
-                "datapoints": points,
+                "rank": rank,
+                "resource_id": dimensions.get("resourceId"),
+                "resource_name": dimensions.get("resourceDisplayName"),
+                "value": float(values[i]),
+                "datapoints": int(np.count_nonzero(~np.isnan(series_list[i].values))),
+                "dimensions": dimensions,
             }
         )
     return result
 
 
+def list_all_pages(operation, **kwargs) -> list:
+    """Call a paginated list operation until there are no more pages"""
+    items = []
+    has_next_page = True
+    next_page = None
+    while has_next_page:
+        monitoring_rate_limiter.acquire()
+        response = operation(page=next_page, **kwargs)
+        items.extend(response.data)
+        has_next_page = response.has_next_page
+        next_page = response.next_page if hasattr(response, "next_page") else None
+    return items
+
+
+def list_all_metrics(
+    monitoring_client, compartment_id: str, compartment_id_in_subtree: bool
+) -> list:
+    metrics = list_all_pages(
+        monitoring_client.list_metrics,
+        compartment_id=compartment_id,
+        list_metrics_details=ListMetricsDetails(),
+        compartment_id_in_subtree=compartment_id_in_subtree,
+    )
+    logger.info(f"Loaded {len(metrics)} metrics into the metric catalog")
+    return metrics
+
+
+def get_metric_catalog(
+    compartment_id: str, compartment_id_in_subtree: bool, refresh: bool = False
+) -> MetricCatalog:
+    return metric_catalog_cache.get(
+        MetricCatalogKey(compartment_id, compartment_id_in_subtree),
+        lambda: list_all_metrics(
+            get_monitoring_client(), compartment_id, compartment_id_in_subtree
+        ),
+        refresh=refresh,
+    )
+
+
+@mcp.tool
+def describe_metric_catalog(
+    compartment_id: str,
+    namespace: Annotated[
+        Optional[str],
+        "Optional namespace. Without it, the namespaces and their metric counts are "
+        "returned, with it, the metrics in the namespace and their dimension keys",
+    ] = None,
+    metric_name: Annotated[
+        Optional[str],
+        "Optional metric name within the namespace, returns its dimension values",
+    ] = None,
+    dimension_key: Annotated[
+        Optional[str],
+        "Optional dimension key, returns the metrics reporting that dimension",
+    ] = None,
+    compartment_id_in_subtree: Annotated[
+        bool,
+        "Whether to include metrics from all subcompartments of the specified compartment",
+    ] = False,
+    refresh: Annotated[
+        bool, "Whether to reload the catalog instead of using the cached copy"
+    ] = False,
+) -> dict:
+    """
+    Discovers the metric namespaces, metric names and dimensions available in a
+    compartment, from a locally cached catalog of list_metrics results
+    """
+    catalog = get_metric_catalog(compartment_id, compartment_id_in_subtree, refresh)
+
+    if dimension_key:
+        pairs = sorted(catalog.by_dimension.get(dimension_key, set()))
+        return {
+            "dimension_key": dimension_key,
+            "metrics": [
+                {"namespace": ns, "metric_name": name}
+                for ns, name in pairs
+                if not namespace or ns == namespace
+            ],
+        }
+
+    if not namespace:
+        return {
+            "namespaces": [
+                {"namespace": ns, "metric_count": len(metrics)}
+                for ns, metrics in sorted(catalog.namespaces.items())
+            ]
+        }
+
+    metrics = catalog.namespaces.get(namespace, {})
+    if not metric_name:
+        return {
+            "namespace": namespace,
+            "metrics": [
+                {"metric_name": name, "dimension_keys": sorted(dimensions)}
+                for name, dimensions in sorted(metrics.items())
+            ],
+        }
+
+    dimensions = metrics.get(metric_name, {})
+    return {
+        "namespace": namespace,
+        "metric_name": metric_name,
+        "dimensions": [
+            {
+                "key": key,
+                "value_count": len(values),
+                "values": sorted(values)[:MAX_CATALOG_DIMENSION_VALUES],
+            }
+            for key, values in sorted(dimensions.items())
+        ],
+    }
+
+
+@mcp.tool
+def validate_metric_query(
+    compartment_id: str,
+    namespace: Annotated[str, "The metric namespace, e.g. oci_computeagent"],
+    query: Annotated[
+        str, 'The MQL query, e.g. CpuUtilization[1m]{resourceId="ocid..."}.mean()'
+    ],
+    compartment_id_in_subtree: Annotated[
+        bool,
+        "Whether to include metrics from all subcompartments of the specified compartment",
+    ] = False,
+) -> dict:
+    """
+    Checks a metric query's namespace, metric name and dimension filters against
+    the cached metric catalog, without querying metric data
+    """
+    catalog = get_metric_catalog(compartment_id, compartment_id_in_subtree)
+    errors = catalog.validate_query(namespace, query)
+    return {"valid": not errors, "errors": errors}
+
+
 @mcp.tool
 def list_alarms(
     compartment_id: Annotated[
@@ -129,6 +491,106 @@ def list_alarms(
     return result
 
 
+@mcp.tool
+def get_alarm_dashboard(
+    compartment_id: Annotated[
+        str,
+        "The ID of the compartment containing the resources"
+        "monitored by the metric that you are searching for.",
+    ],
+    compartment_id_in_subtree: Annotated[
+        bool,
+        "Whether to include alarms from all subcompartments of the specified compartment",
+    ] = False,
+    history_hours: Annotated[
+        int, "How many hours of state transitions to include for firing alarms"
+    ] = 24,
+) -> dict:
+    """
+    Summarizes which alarms are firing: pages through every alarm and alarm status
+    concurrently, fetches recent state transitions for the firing alarms, and joins
+    them by alarm ID into counts plus a compact list of firing alarms. History is
+    looked up for the most severe firing alarms only; the rest have
+    recent_transitions set to null and history_truncated is true
+    """
+    monitoring_client = get_monitoring_client()
+    scope = {
+        "compartment_id": compartment_id,
+        "compartment_id_in_subtree": compartment_id_in_subtree,
+    }
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        alarms_future = executor.submit(
+            list_all_pages, monitoring_client.list_alarms, **scope
+        )
+        statuses_future = executor.submit(
+            list_all_pages, monitoring_client.list_alarms_status, **scope
+        )
+        alarms = {alarm.id: alarm for alarm in alarms_future.result()}
+        statuses = {status.id: status for status in statuses_future.result()}
+
+    firing = sorted(
+        (status for status in statuses.values() if status.status == "FIRING"),
+        key=lambda status: (
+            SEVERITY_ORDER.get(status.severity, len(SEVERITY_ORDER)),
+            status.display_name or "",
+        ),
+    )
+    since = datetime.now(timezone.utc) - timedelta(hours=history_hours)
+
+    def fetch_history(alarm_id: str) -> list:
+        monitoring_rate_limiter.acquire()
+        history = monitoring_client.get_alarm_history(
+            alarm_id=alarm_id,
+            alarm_historytype="STATE_TRANSITION_HISTORY",
+            timestamp_greater_than_or_equal_to=since,
+        ).data
+        return history.entries or []
+
+    with_history = firing[:MAX_DASHBOARD_HISTORY_ALARMS]
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(len(with_history), MAX_CONCURRENT_QUERIES))
+    ) as executor:
+        histories = dict(
+            zip(
+                (status.id for status in with_history),
+                executor.map(fetch_history, (status.id for status in with_history)),
+            )
+        )
+
+    firing_alarms = []
+    for status in firing:
+        alarm = alarms.get(status.id)
+        firing_alarms.append(
+            {
+                "id": status.id,
+                "display_name": status.display_name,
+                "severity": status.severity,
+                "timestamp_triggered": status.timestamp_triggered,
+                "namespace": getattr(alarm, "namespace", None),
+                "query": getattr(alarm, "query", None),
+                # None when the alarm was past the history cap and not looked up
+                "recent_transitions": (
+                    [
+                        {"timestamp": entry.timestamp, "summary": entry.summary}
+                        for entry in histories[status.id]
+                    ]
+                    if status.id in histories
+                    else None
+                ),
+            }
+        )
+
+    status_counts = Counter(status.status for status in statuses.values())
+    return {
+        "total_alarms": len(alarms),
+        "enabled_alarms": sum(1 for alarm in alarms.values() if alarm.is_enabled),
+        "status_counts": dict(status_counts),
+        "firing_by_severity": dict(Counter(status.severity for status in firing)),
+        "history_truncated": len(firing) > len(with_history),
+        "firing": firing_alarms,
+    }
+
+
 def main():
     mcp.run()
 
@@ -4,12 +4,26 @@ Licensed under the Universal Permissive License v1.0 as shown at
 https://oss.oracle.com/licenses/upl.
 """
 
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, create_autospec, patch
 
+import numpy as np
 import oci
 import pytest
 from fastmcp import Client
-from oracle.oci_monitoring_mcp_server.server import mcp
+from oracle.oci_monitoring_mcp_server.cache import MetricCache, MetricCacheKey
+from oracle.oci_monitoring_mcp_server.series import MetricSeries, downsample
+from oracle.oci_monitoring_mcp_server.server import (
+    mcp,
+    metric_cache,
+    metric_catalog_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_metric_cache():
+    metric_cache.clear()
+    metric_catalog_cache.clear()
 
 
 class TestMonitoringTools:
@@ -46,16 +60,448 @@ class TestMonitoringTools:
                         "compartment_id_in_subtree": False,
                     },
                 )
-            ).structured_content["result"]
+            ).structured_content
 
             # Validate result structure and values
-            assert isinstance(result, list)
-            assert len(result) == 1
-            assert result[0]["dimensions"] == {"resourceId": "instance1"}
-            assert "datapoints" in result[0]
-            assert len(result[0]["datapoints"]) == 2
-            assert result[0]["datapoints"][0]["timestamp"] == "2023-01-01T00:00:00Z"
-            assert result[0]["datapoints"][0]["value"] == pytest.approx(42.0)
+            assert result["timestamps"] == [
+                "2023-01-01T00:00:00Z",
+                "2023-01-01T00:01:00Z",
+            ]
+            assert len(result["series"]) == 1
+            assert result["series"][0]["metric"] == "CpuUtilization"
+            assert result["series"][0]["dimensions"] == {"resourceId": "instance1"}
+            assert result["series"][0]["values"] == [
+                pytest.approx(42.0),
+                pytest.approx(43.5),
+            ]
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_monitoring_mcp_server.server.get_monitoring_client")
+    async def test_get_compute_metrics_multiple_metrics(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        minute = timedelta(minutes=1)
+
+        def summarize_metrics_data(**kwargs):
+            details = kwargs["summarize_metrics_data_details"]
+            series = MagicMock()
+            series.dimensions = {"resourceId": "instance1"}
+            if details.query.startswith("CpuUtilization"):
+                series.aggregated_datapoints = [
+                    MagicMock(timestamp=start, value=10.0),
+                    MagicMock(timestamp=start + minute, value=20.0),
+                ]
+            else:
+                series.aggregated_datapoints = [
+                    MagicMock(timestamp=start + minute, value=55.0),
+                    MagicMock(timestamp=start + 2 * minute, value=None),
+                ]
+            response = create_autospec(oci.response.Response)
+            response.data = [series]
+            return response
+
+        mock_client.summarize_metrics_data.side_effect = summarize_metrics_data
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "get_compute_metrics",
+                    {
+                        "compartment_id": "compartment1",
+                        "start_time": "2023-01-01T00:00:00Z",
+                        "end_time": "2023-01-01T01:00:00Z",
+                        "metricName": ["CpuUtilization", "MemoryUtilization"],
+                    },
+                )
+            ).structured_content
+
+            assert mock_client.summarize_metrics_data.call_count == 2
+            assert result["timestamps"] == [
+                "2023-01-01T00:00:00Z",
+                "2023-01-01T00:01:00Z",
+                "2023-01-01T00:02:00Z",
+            ]
+            series = {s["metric"]: s["values"] for s in result["series"]}
+            assert series["CpuUtilization"] == [10.0, 20.0, None]
+            assert series["MemoryUtilization"] == [None, 55.0, None]
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_monitoring_mcp_server.server.get_monitoring_client")
+    async def test_get_compute_metrics_fetches_only_uncached_ranges(
+        self, mock_get_client
+    ):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        def summarize_metrics_data(**kwargs):
+            details = kwargs["summarize_metrics_data_details"]
+            start = datetime.fromisoformat(details.start_time)
+            end = datetime.fromisoformat(details.end_time)
+            series = MagicMock()
+            series.dimensions = {"resourceId": "instance1"}
+            series.aggregated_datapoints = []
+            timestamp = start
+            while timestamp < end:
+                series.aggregated_datapoints.append(
+                    MagicMock(timestamp=timestamp, value=float(timestamp.minute))
+                )
+                timestamp += timedelta(minutes=10)
+            response = create_autospec(oci.response.Response)
+            response.data = [series]
+            return response
+
+        mock_client.summarize_metrics_data.side_effect = summarize_metrics_data
+
+        async with Client(mcp) as client:
+            arguments = {
+                "compartment_id": "compartment1",
+                "metricName": "CpuUtilization",
+                "resolution": "5m",
+            }
+            first = (
+                await client.call_tool(
+                    "get_compute_metrics",
+                    {
+                        **arguments,
+                        "start_time": "2023-01-01T00:00:00Z",
+                        "end_time": "2023-01-01T01:00:00Z",
+                    },
+                )
+            ).structured_content
+            second = (
+                await client.call_tool(
+                    "get_compute_metrics",
+                    {
+                        **arguments,
+                        "start_time": "2023-01-01T00:30:00Z",
+                        "end_time": "2023-01-01T01:30:00Z",
+                    },
+                )
+            ).structured_content
+
+            calls = mock_client.summarize_metrics_data.call_args_list
+            assert len(calls) == 2
+            gap = calls[1][1]["summarize_metrics_data_details"]
+            assert gap.start_time == "2023-01-01T01:00:00Z"
+            assert gap.end_time == "2023-01-01T01:30:00Z"
+
+            assert len(first["timestamps"]) == 6
+            assert second["timestamps"][0] == "2023-01-01T00:30:00Z"
+            assert second["timestamps"][-1] == "2023-01-01T01:20:00Z"
+            assert second["series"][0]["values"] == [30.0, 40.0, 50.0, 0.0, 10.0, 20.0]
+
+            # A fully cached window needs no further calls
+            await client.call_tool(
+                "get_compute_metrics",
+                {
+                    **arguments,
+                    "start_time": "2023-01-01T00:10:00Z",
+                    "end_time": "2023-01-01T01:10:00Z",
+                },
+            )
+            assert mock_client.summarize_metrics_data.call_count == 2
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_monitoring_mcp_server.server.get_monitoring_client")
+    async def test_get_compute_metrics_splits_long_ranges(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        def summarize_metrics_data(**kwargs):
+            details = kwargs["summarize_metrics_data_details"]
+            start = datetime.fromisoformat(details.start_time)
+            end = datetime.fromisoformat(details.end_time)
+            series = MagicMock()
+            series.dimensions = {"resourceId": "instance1"}
+            series.aggregated_datapoints = []
+            # Include the end boundary so consecutive chunks overlap
+            timestamp = start
+            while timestamp <= end:
+                series.aggregated_datapoints.append(
+                    MagicMock(timestamp=timestamp, value=1.0)
+                )
+                timestamp += timedelta(hours=6)
+            response = create_autospec(oci.response.Response)
+            response.data = [series]
+            return response
+
+        mock_client.summarize_metrics_data.side_effect = summarize_metrics_data
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "get_compute_metrics",
+                    {
+                        "compartment_id": "compartment1",
+                        "start_time": "2023-01-01T00:00:00Z",
+                        "end_time": "2023-01-04T00:00:00Z",
+                        "metricName": "CpuUtilization",
+                        "resolution": "1m",
+                        "use_cache": False,
+                    },
+                )
+            ).structured_content
+
+            ranges = [
+                (
+                    c[1]["summarize_metrics_data_details"].start_time,
+                    c[1]["summarize_metrics_data_details"].end_time,
+                )
+                for c in mock_client.summarize_metrics_data.call_args_list
+            ]
+            assert sorted(ranges) == [
+                ("2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z"),
+                ("2023-01-02T00:00:00Z", "2023-01-03T00:00:00Z"),
+                ("2023-01-03T00:00:00Z", "2023-01-04T00:00:00Z"),
+            ]
+            assert len(result["series"]) == 1
+            # The datapoint at the exclusive end of the range is trimmed
+            assert len(result["timestamps"]) == 12
+            assert result["timestamps"] == sorted(result["timestamps"])
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_monitoring_mcp_server.server.get_monitoring_client")
+    async def test_get_compute_metrics_uncached_trims_to_range(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        def summarize_metrics_data(**kwargs):
+            details = kwargs["summarize_metrics_data_details"]
+            start = datetime.fromisoformat(details.start_time)
+            end = datetime.fromisoformat(details.end_time)
+            series = MagicMock()
+            series.dimensions = {"resourceId": "instance1"}
+            series.aggregated_datapoints = [
+                MagicMock(timestamp=start + timedelta(hours=i), value=float(i))
+                for i in range(int((end - start) / timedelta(hours=1)) + 1)
+            ]
+            response = create_autospec(oci.response.Response)
+            response.data = [series]
+            return response
+
+        mock_client.summarize_metrics_data.side_effect = summarize_metrics_data
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "get_compute_metrics",
+                    {
+                        "compartment_id": "compartment1",
+                        "start_time": "2023-01-01T00:00:00Z",
+                        "end_time": "2023-01-01T05:30:00Z",
+                        "metricName": "CpuUtilization",
+                        "resolution": "1h",
+                        "use_cache": False,
+                    },
+                )
+            ).structured_content
+
+        details = mock_client.summarize_metrics_data.call_args.kwargs[
+            "summarize_metrics_data_details"
+        ]
+        assert details.end_time == "2023-01-01T06:00:00Z"
+        assert len(result["timestamps"]) == 6
+        assert result["series"][0]["values"] == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_monitoring_mcp_server.server.get_monitoring_client")
+    async def test_get_compute_metrics_downsamples(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        series = MagicMock()
+        series.dimensions = {"resourceId": "instance1"}
+        series.aggregated_datapoints = [
+            MagicMock(
+                timestamp=start + timedelta(hours=i), value=99.0 if i == 500 else 1.0
+            )
+            for i in range(1000)
+        ]
+        mock_summarize_response = create_autospec(oci.response.Response)
+        mock_summarize_response.data = [series]
+        mock_client.summarize_metrics_data.return_value = mock_summarize_response
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "get_compute_metrics",
+                    {
+                        "compartment_id": "compartment1",
+                        "start_time": "2023-01-01T00:00:00Z",
+                        "end_time": "2023-02-12T00:00:00Z",
+                        "metricName": "CpuUtilization",
+                        "resolution": "1h",
+                        "max_points": 10,
+                    },
+                )
+            ).structured_content
+
+            assert "timestamps" not in result
+            [downsampled] = result["series"]
+            assert len(downsampled["timestamps"]) == 10
+            assert len(downsampled["values"]) == 10
+            assert downsampled["timestamps"][0] == "2023-01-01T00:00:00Z"
+            assert downsampled["timestamps"][-1] == "2023-02-11T15:00:00Z"
+            assert 99.0 in downsampled["values"]
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_monitoring_mcp_server.server.get_monitoring_client")
+    async def test_rank_resources_by_metric(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        series_list = []
+        for i in range(20):
+            series = MagicMock()
+            series.dimensions = {
+                "resourceId": f"instance{i}",
+                "resourceDisplayName": f"vm-{i}",
+            }
+            # instance i has values i..i+99, so p95 grows with i
+            series.aggregated_datapoints = [
+                MagicMock(timestamp=start + timedelta(minutes=5 * j), value=i + j)
+                for j in range(100)
+            ]
+            series_list.append(series)
+        mock_summarize_response = create_autospec(oci.response.Response)
+        mock_summarize_response.data = series_list
+        mock_client.summarize_metrics_data.return_value = mock_summarize_response
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "rank_resources_by_metric",
+                    {
+                        "compartment_id": "compartment1",
+                        "start_time": "2023-01-01T00:00:00Z",
+                        "end_time": "2023-01-01T08:20:00Z",
+                        "metricName": "CpuUtilization",
+                        "statistic": "p95",
+                        "limit": 3,
+                    },
+                )
+            ).structured_content["result"]
+
+            assert [row["resource_id"] for row in result] == [
+                "instance19",
+                "instance18",
+                "instance17",
+            ]
+            assert result[0]["rank"] == 1
+            assert result[0]["resource_name"] == "vm-19"
+            assert result[0]["value"] == pytest.approx(
+                19 + np.percentile(range(100), 95)
+            )
+            assert result[0]["datapoints"] == 100
+            details = mock_client.summarize_metrics_data.call_args[1][
+                "summarize_metrics_data_details"
+            ]
+            assert details.query == "CpuUtilization[5m].mean()"
+            assert mock_client.summarize_metrics_data.call_args[1][
+                "compartment_id_in_subtree"
+            ]
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_monitoring_mcp_server.server.get_monitoring_client")
+    async def test_metric_catalog(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        first_page = create_autospec(oci.response.Response)
+        first_page.data = [
+            oci.monitoring.models.Metric(
+                name="CpuUtilization",
+                namespace="oci_computeagent",
+                dimensions={"resourceId": "instance1", "shape": "E5"},
+            ),
+            oci.monitoring.models.Metric(
+                name="CpuUtilization",
+                namespace="oci_computeagent",
+                dimensions={"resourceId": "instance2", "shape": "E5"},
+            ),
+        ]
+        first_page.has_next_page = True
+        first_page.next_page = "page2"
+        second_page = create_autospec(oci.response.Response)
+        second_page.data = [
+            oci.monitoring.models.Metric(
+                name="BytesFromIgw",
+                namespace="oci_vcn",
+                dimensions={"resourceId": "vcn1"},
+            ),
+        ]
+        second_page.has_next_page = False
+        second_page.next_page = None
+        mock_client.list_metrics.side_effect = [first_page, second_page]
+
+        async with Client(mcp) as client:
+            namespaces = (
+                await client.call_tool(
+                    "describe_metric_catalog", {"compartment_id": "compartment1"}
+                )
+            ).structured_content
+            assert namespaces["namespaces"] == [
+                {"namespace": "oci_computeagent", "metric_count": 1},
+                {"namespace": "oci_vcn", "metric_count": 1},
+            ]
+
+            dimensions = (
+                await client.call_tool(
+                    "describe_metric_catalog",
+                    {
+                        "compartment_id": "compartment1",
+                        "namespace": "oci_computeagent",
+                        "metric_name": "CpuUtilization",
+                    },
+                )
+            ).structured_content["dimensions"]
+            assert dimensions[0] == {
+                "key": "resourceId",
+                "value_count": 2,
+                "values": ["instance1", "instance2"],
+            }
+
+            by_dimension = (
+                await client.call_tool(
+                    "describe_metric_catalog",
+                    {"compartment_id": "compartment1", "dimension_key": "resourceId"},
+                )
+            ).structured_content["metrics"]
+            assert len(by_dimension) == 2
+
+            valid = (
+                await client.call_tool(
+                    "validate_metric_query",
+                    {
+                        "compartment_id": "compartment1",
+                        "namespace": "oci_computeagent",
+                        "query": 'CpuUtilization[1m]{resourceId = "instance1"}.mean()',
+                    },
+                )
+            ).structured_content
+            assert valid == {"valid": True, "errors": []}
+
+            invalid = (
+                await client.call_tool(
+                    "validate_metric_query",
+                    {
+                        "compartment_id": "compartment1",
+                        "namespace": "oci_computeagent",
+                        "query": 'CpuUtilization[1m]{region = "us-ashburn-1"}.mean()',
+                    },
+                )
+            ).structured_content
+            assert not invalid["valid"]
+            assert invalid["errors"] == [
+                "Metric CpuUtilization has no dimension region"
+            ]
+
+            # Every lookup after the first one is served from the cached catalog
+            assert mock_client.list_metrics.call_count == 2
 
     @pytest.mark.asyncio
     @patch("oracle.oci_monitoring_mcp_server.server.get_monitoring_client")
@@ -99,3 +545,181 @@ class TestMonitoringTools:
             assert result[0]["display_name"] == "Test Alarm 1"
             assert result[1]["id"] == "alarm2"
             assert result[1]["display_name"] == "Test Alarm 2"
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_monitoring_mcp_server.server.get_monitoring_client")
+    async def test_get_alarm_dashboard(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        alarms = [
+            oci.monitoring.models.AlarmSummary(
+                id=f"alarm{i}",
+                display_name=f"Alarm {i}",
+                namespace="oci_computeagent",
+                query=f"CpuUtilization[1m].mean() > {i}0",
+                is_enabled=True,
+            )
+            for i in range(1, 4)
+        ]
+        first_page = create_autospec(oci.response.Response)
+        first_page.data = alarms[:2]
+        first_page.has_next_page = True
+        first_page.next_page = "page2"
+        second_page = create_autospec(oci.response.Response)
+        second_page.data = alarms[2:]
+        second_page.has_next_page = False
+        second_page.next_page = None
+        mock_client.list_alarms.side_effect = [first_page, second_page]
+
+        triggered = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        statuses = create_autospec(oci.response.Response)
+        statuses.data = [
+            oci.monitoring.models.AlarmStatusSummary(
+                id="alarm1",
+                display_name="Alarm 1",
+                severity="WARNING",
+                status="FIRING",
+                timestamp_triggered=triggered,
+            ),
+            oci.monitoring.models.AlarmStatusSummary(
+                id="alarm2", display_name="Alarm 2", severity="CRITICAL", status="OK"
+            ),
+            oci.monitoring.models.AlarmStatusSummary(
+                id="alarm3",
+                display_name="Alarm 3",
+                severity="CRITICAL",
+                status="FIRING",
+                timestamp_triggered=triggered,
+            ),
+        ]
+        statuses.has_next_page = False
+        statuses.next_page = None
+        mock_client.list_alarms_status.return_value = statuses
+
+        def get_alarm_history(alarm_id, **kwargs):
+            history = create_autospec(oci.response.Response)
+            history.data = oci.monitoring.models.AlarmHistoryCollection(
+                alarm_id=alarm_id,
+                entries=[
+                    oci.monitoring.models.AlarmHistoryEntry(
+                        summary=f"{alarm_id} transitioned to FIRING",
+                        timestamp=triggered,
+                    )
+                ],
+            )
+            return history
+
+        mock_client.get_alarm_history.side_effect = get_alarm_history
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "get_alarm_dashboard", {"compartment_id": "compartment1"}
+                )
+            ).structured_content
+
+        assert mock_client.list_alarms.call_count == 2
+        assert mock_client.list_alarms.call_args.kwargs["page"] == "page2"
+        # History is only fetched for firing alarms
+        assert mock_client.get_alarm_history.call_count == 2
+        assert result["total_alarms"] == 3
+        assert result["enabled_alarms"] == 3
+        assert result["status_counts"] == {"FIRING": 2, "OK": 1}
+        assert result["firing_by_severity"] == {"CRITICAL": 1, "WARNING": 1}
+        assert [alarm["id"] for alarm in result["firing"]] == ["alarm3", "alarm1"]
+        assert result["firing"][0]["query"] == "CpuUtilization[1m].mean() > 30"
+        assert result["firing"][0]["recent_transitions"][0]["summary"] == (
+            "alarm3 transitioned to FIRING"
+        )
+        assert result["history_truncated"] is False
+
+        mock_client.list_alarms.side_effect = [first_page, second_page]
+        mock_client.get_alarm_history.reset_mock()
+        with patch(
+            "oracle.oci_monitoring_mcp_server.server.MAX_DASHBOARD_HISTORY_ALARMS", 1
+        ):
+            async with Client(mcp) as client:
+                capped = (
+                    await client.call_tool(
+                        "get_alarm_dashboard", {"compartment_id": "compartment1"}
+                    )
+                ).structured_content
+
+        assert mock_client.get_alarm_history.call_count == 1
+        assert capped["history_truncated"] is True
+        assert len(capped["firing"][0]["recent_transitions"]) == 1
+        # Skipped alarms are marked as not looked up rather than as quiet
+        assert capped["firing"][1]["recent_transitions"] is None
+
+
+class TestMetricCache:
+    def test_persisted_entries_are_reloaded(self, tmp_path):
+        key = MetricCacheKey(
+            compartment_id="compartment1",
+            compartment_id_in_subtree=False,
+            namespace="oci_computeagent",
+            query="CpuUtilization[1m].mean()",
+            resolution="1m",
+        )
+        series = MetricSeries(
+            metric="CpuUtilization",
+            dimensions={"resourceId": "instance1"},
+            timestamps=np.array([0, 60_000, 120_000], dtype=np.int64),
+            values=np.array([1.0, 2.0, 3.0]),
+        )
+        MetricCache(persist_dir=str(tmp_path)).store(
+            key, "CpuUtilization", 0, 180_000, [series], closed_until=120_000
+        )
+
+        reloaded = MetricCache(persist_dir=str(tmp_path))
+        assert reloaded.missing_ranges(key, 0, 180_000) == [(120_000, 180_000)]
+        [cached] = reloaded.get(key, 60_000, 180_000)
+        assert cached.dimensions == {"resourceId": "instance1"}
+        assert cached.timestamps.tolist() == [60_000, 120_000]
+        assert cached.values.tolist() == [2.0, 3.0]
+
+
+class TestDownsample:
+    def test_minmax_keeps_extremes(self):
+        values = np.sin(np.linspace(0, 20, 5000))
+        values[1234] = 5.0
+        values[4321] = -5.0
+        series = MetricSeries(
+            metric="CpuUtilization",
+            dimensions={},
+            timestamps=np.arange(5000, dtype=np.int64) * 60_000,
+            values=values,
+        )
+
+        result = downsample(series, 100, "minmax")
+
+        assert len(result.values) <= 100
+        assert result.values.max() == 5.0
+        assert result.values.min() == -5.0
+        assert np.all(np.diff(result.timestamps) > 0)
+
+    @pytest.mark.parametrize(
+        "max_points, method", [(2, "lttb"), (1, "minmax"), (0, "lttb"), (-5, "minmax")]
+    )
+    def test_rejects_max_points_below_minimum(self, max_points, method):
+        series = MetricSeries(
+            metric="CpuUtilization",
+            dimensions={},
+            timestamps=np.arange(10_000, dtype=np.int64) * 60_000,
+            values=np.random.default_rng(0).random(10_000),
+        )
+
+        with pytest.raises(ValueError):
+            downsample(series, max_points, method)
+
+    def test_lttb_honours_small_caps(self):
+        series = MetricSeries(
+            metric="CpuUtilization",
+            dimensions={},
+            timestamps=np.arange(10_000, dtype=np.int64) * 60_000,
+            values=np.random.default_rng(0).random(10_000),
+        )
+
+        assert len(downsample(series, 3, "lttb").values) == 3
+        assert len(downsample(series, 3, "minmax").values) <= 3
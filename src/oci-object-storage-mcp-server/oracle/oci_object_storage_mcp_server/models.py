@@ -387,6 +387,119 @@ class ObjectVersionCollection(BaseModel):
         extra = "forbid"
 
 
+class BulkObjectFailure(BaseModel):
+    object_name: str = Field(
+        ...,
+        description="The name of the object the operation failed for.",
+    )
+    error: str = Field(
+        ...,
+        description="The error returned for the object.",
+    )
+
+
+class BulkOperationResult(BaseModel):
+    operation: str = Field(
+        ...,
+        description="The bulk operation that was performed.",
+    )
+    total: int = Field(
+        ...,
+        description="The number of objects the operation was applied to.",
+    )
+    succeeded: int = Field(
+        ...,
+        description="The number of objects the operation succeeded for.",
+    )
+    accepted: int = Field(
+        0,
+        description="The number of objects whose asynchronous operation was accepted "
+        "but not yet confirmed complete. Track them with their work requests.",
+    )
+    failed: int = Field(
+        ...,
+        description="The number of objects the operation failed for.",
+    )
+    failures: List[BulkObjectFailure] = Field(
+        default_factory=list,
+        description="The per-object failures, if any.",
+    )
+    work_request_ids: Dict[str, str] = Field(
+        default_factory=dict,
+        description="The work request ID of each object, for asynchronous "
+        "operations such as copy.",
+    )
+
+
+class SyncResult(BaseModel):
+    files_scanned: int = Field(
+        ...,
+        description="The number of local files compared against the bucket.",
+    )
+    unchanged: int = Field(
+        ...,
+        description="The number of files skipped because the remote object matched.",
+    )
+    bytes_uploaded: int = Field(
+        ...,
+        description="The number of bytes read from new or changed local files.",
+    )
+    upload: BulkOperationResult = Field(
+        ...,
+        description="The result of uploading new or changed files.",
+    )
+    delete: Optional[BulkOperationResult] = Field(
+        None,
+        description="The result of deleting remote objects with no local file, "
+        "if orphan deletion was requested.",
+    )
+
+
+class PreauthenticatedRequest(BaseModel):
+    id: str = Field(
+        ...,
+        description="The unique identifier to use when directly addressing the "
+        "pre-authenticated request.",
+    )
+    name: Optional[str] = Field(
+        None,
+        description="The user-provided name of the pre-authenticated request.",
+    )
+    namespace: Optional[str] = Field(
+        None,
+        description="The Object Storage namespace of the bucket.",
+    )
+    bucket_name: Optional[str] = Field(
+        None,
+        description="The name of the bucket the pre-authenticated request is for.",
+    )
+    object_name: Optional[str] = Field(
+        None,
+        description="The name of the object, or the object name prefix for "
+        "AnyObject access types.",
+    )
+    access_type: Optional[str] = Field(
+        None,
+        description="The operation that can be performed on this resource.",
+    )
+    time_expires: Optional[datetime] = Field(
+        None,
+        description="The expiration date for the pre-authenticated request.",
+    )
+    url: Optional[str] = Field(
+        None,
+        description="The full URL to use for direct transfers. "
+        "Only returned when the request is created.",
+    )
+
+    class Config:
+        extra = "allow"
+        arbitrary_types_allowed = True
+        json_encoders = {
+            datetime: lambda dt: dt.isoformat(),
+        }
+
+
 def map_object_summary(obj: oci.object_storage.models.ObjectSummary) -> ObjectSummary:
     """
     Convert an oci.object_storage.models.ObjectSummary to an
@@ -467,3 +580,21 @@ def map_object_version_summary(obj: oci.object_storage.models.ObjectVersionSumma
         version_id=getattr(obj, "version_id", None),
         is_delete_marker=getattr(obj, "is_delete_marker", None),
     )
+
+
+def map_preauthenticated_request(
+    par: oci.object_storage.models.PreauthenticatedRequest,
+    namespace: str,
+    bucket_name: str,
+    url: Optional[str] = None,
+) -> PreauthenticatedRequest:
+    return PreauthenticatedRequest(
+        id=par.id,
+        name=getattr(par, "name", None),
+        namespace=namespace,
+        bucket_name=bucket_name,
+        object_name=getattr(par, "object_name", None),
+        access_type=getattr(par, "access_type", None),
+        time_expires=getattr(par, "time_expires", None),
+        url=url,
+    )
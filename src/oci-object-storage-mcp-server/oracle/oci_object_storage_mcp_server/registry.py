@@ -0,0 +1,97 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from logging import Logger
+from typing import List, Optional
+
+from oracle.oci_object_storage_mcp_server.models import PreauthenticatedRequest
+
+logger = Logger(__name__, level="INFO")
+
+
+class PreauthenticatedRequestRegistry:
+    """
+    The pre-authenticated requests issued by this server, keyed by PAR id and
+    saved to a JSON file so they can still be listed and revoked after a restart.
+    The access URLs are secrets and are never stored.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._pars: Optional[dict[str, PreauthenticatedRequest]] = None
+        self._lock = threading.Lock()
+
+    def add(self, par: PreauthenticatedRequest):
+        with self._lock:
+            self._load()[par.id] = par.model_copy(update={"url": None})
+            self._save()
+
+    def remove(self, par_id: str):
+        with self._lock:
+            if self._load().pop(par_id, None) is not None:
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            self._pars = {}
+            self._save()
+
+    def select(
+        self,
+        par_ids: Optional[List[str]] = None,
+        bucket_name: str = "",
+    ) -> List[PreauthenticatedRequest]:
+        """Return the unexpired PARs matching the ids and bucket, if given"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            pars = self._load()
+            expired = [
+                par_id
+                for par_id, par in pars.items()
+                if par.time_expires is not None and par.time_expires <= now
+            ]
+            for par_id in expired:
+                del pars[par_id]
+            if expired:
+                self._save()
+            return [
+                par
+                for par_id, par in pars.items()
+                if (not par_ids or par_id in par_ids)
+                and (not bucket_name or par.bucket_name == bucket_name)
+            ]
+
+    def _load(self) -> dict[str, PreauthenticatedRequest]:
+        if self._pars is not None:
+            return self._pars
+        self._pars = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    for item in json.load(f):
+                        par = PreauthenticatedRequest.model_validate(item)
+                        self._pars[par.id] = par
+            except (OSError, ValueError) as e:
+                logger.warning(f"Unable to load pre-authenticated requests: {e}")
+        return self._pars
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(
+                    [par.model_dump(mode="json") for par in self._pars.values()], f
+                )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Unable to save pre-authenticated requests: {e}")
@@ -4,22 +4,42 @@ Licensed under the Universal Permissive License v1.0 as shown at
 https://oss.oracle.com/licenses/upl.
 """
 
+import asyncio
+import base64
+import hashlib
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from logging import Logger
-from typing import Annotated, List
+from typing import Annotated, Callable, List, Literal, Optional
 
 import oci
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 from oracle.oci_object_storage_mcp_server.models import (
     Bucket,
     BucketSummary,
+    BulkObjectFailure,
+    BulkOperationResult,
     ListObjects,
     ObjectSummary,
     ObjectVersionCollection,
+    PreauthenticatedRequest,
+    SyncResult,
     map_bucket,
     map_bucket_summary,
     map_object_summary,
     map_object_version_summary,
+    map_preauthenticated_request,
+)
+from oracle.oci_object_storage_mcp_server.registry import (
+    PreauthenticatedRequestRegistry,
+)
+from oracle.oci_object_storage_mcp_server.streams import (
+    CONTENT_ENCODINGS,
+    CompressingReader,
 )
 
 from . import __project__, __version__
@@ -28,6 +48,27 @@ logger = Logger(__name__, level="INFO")
 
 mcp = FastMCP(name=__project__)
 
+BULK_DEFAULT_MAX_WORKERS = 16
+BULK_MAX_RETRIES = 6
+BULK_BACKOFF_BASE_SECONDS = 0.5
+BULK_PROGRESS_INTERVAL = 100
+WORK_REQUEST_POLL_SECONDS = 2
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Pre-authenticated requests issued by this server, kept across restarts. Set
+# OCI_OBJECT_STORAGE_PAR_REGISTRY to change where they are saved
+issued_preauthenticated_requests = PreauthenticatedRequestRegistry(
+    os.getenv(
+        "OCI_OBJECT_STORAGE_PAR_REGISTRY",
+        os.path.join(
+            os.path.expanduser("~"),
+            ".oci",
+            __project__,
+            "preauthenticated_requests.json",
+        ),
+    )
+)
+
 
 def get_object_storage_client():
     config = oci.config.from_file(
@@ -191,12 +232,27 @@ def upload_object(
         "Optional name of the object to upload"
         "If the object name is not provided, use the file name as the object name",
     ] = "",
+    compression: Annotated[
+        Literal["none", "gzip", "zstd"],
+        "Optional compression applied while uploading, the object's content "
+        "encoding is set accordingly. Useful for logs and text exports. Default: none",
+    ] = "none",
 ):
     object_storage_client = get_object_storage_client()
     namespace_name = get_object_storage_namespace(compartment_id)
+    object_name = object_name or os.path.basename(file_path)
     logger.info("Got Namespace: %s", namespace_name)
     logger.info("Checking file at path: %s", file_path)
     try:
+        if compression != "none":
+            return upload_compressed_object(
+                object_storage_client,
+                namespace_name,
+                bucket_name,
+                object_name,
+                file_path,
+                compression,
+            )
         with open(file_path, "rb") as file:
             object_storage_client.put_object(
                 namespace_name, bucket_name, object_name, file
@@ -206,6 +262,589 @@ def upload_object(
         return {"error": str(e)}
 
 
+def upload_compressed_object(
+    object_storage_client,
+    namespace_name: str,
+    bucket_name: str,
+    object_name: str,
+    file_path: str,
+    compression: str,
+) -> dict:
+    """Compress the file as a streaming multipart upload, without a staged copy"""
+    upload_manager = oci.object_storage.UploadManager(
+        object_storage_client, allow_parallel_uploads=True
+    )
+    with open(file_path, "rb") as file:
+        reader = CompressingReader(file, compression)
+        upload_manager.upload_stream(
+            namespace_name,
+            bucket_name,
+            object_name,
+            reader,
+            content_encoding=CONTENT_ENCODINGS[compression],
+        )
+    return {
+        "message": "Object uploaded successfully",
+        "object_name": object_name,
+        "content_encoding": CONTENT_ENCODINGS[compression],
+        "original_length": reader.original_length,
+        "content_length": reader.content_length,
+        "md5": base64.b64encode(reader.md5.digest()).decode("ascii"),
+    }
+
+
+# Bulk operations
+def call_with_backoff(operation: Callable, *args, **kwargs):
+    """Call an OCI operation, retrying with exponential backoff when throttled (429)"""
+    for attempt in range(BULK_MAX_RETRIES):
+        try:
+            return operation(*args, **kwargs)
+        except oci.exceptions.ServiceError as e:
+            if e.status != 429 or attempt == BULK_MAX_RETRIES - 1:
+                raise
+            delay = BULK_BACKOFF_BASE_SECONDS * (2**attempt)
+            time.sleep(delay + random.uniform(0, delay))
+
+
+def list_all_objects(
+    object_storage_client,
+    namespace_name: str,
+    bucket_name: str,
+    prefix: str = "",
+    fields: str = "name",
+) -> list:
+    """Page through list_objects and return every object under the prefix"""
+    objects = []
+    start = None
+    while True:
+        response = call_with_backoff(
+            object_storage_client.list_objects,
+            namespace_name,
+            bucket_name,
+            prefix=prefix,
+            start=start,
+            fields=fields,
+        ).data
+        objects.extend(response.objects)
+        start = response.next_start_with
+        if not start:
+            return objects
+
+
+def resolve_object_names(
+    object_storage_client,
+    namespace_name: str,
+    bucket_name: str,
+    prefix: str,
+    object_names: Optional[List[str]],
+    storage_tier: Optional[str] = None,
+) -> List[str]:
+    """
+    The listed object names, or every object under the prefix, only those in
+    storage_tier if one is given
+    """
+    if object_names:
+        return list(dict.fromkeys(object_names))
+    if not prefix:
+        raise ValueError("Either a prefix or a list of object names must be provided")
+    objects = list_all_objects(
+        object_storage_client,
+        namespace_name,
+        bucket_name,
+        prefix,
+        fields="name,storageTier" if storage_tier else "name",
+    )
+    return [
+        obj.name
+        for obj in objects
+        if storage_tier is None or obj.storage_tier == storage_tier
+    ]
+
+
+@dataclass
+class WorkRequestStarted:
+    """Returned by bulk actions that start an asynchronous work request"""
+
+    work_request_id: Optional[str]
+
+
+async def run_bulk_operation(
+    operation: str,
+    object_names: List[str],
+    action: Callable[[str], object],
+    max_workers: int = BULK_DEFAULT_MAX_WORKERS,
+    ctx: Optional[Context] = None,
+    accepted_only: bool = False,
+) -> BulkOperationResult:
+    """
+    Apply action to every object name using a bounded pool of workers, reporting
+    progress to the client. When accepted_only is set the action only starts an
+    asynchronous operation and returns a WorkRequestStarted, so objects are
+    counted as accepted rather than succeeded.
+    """
+    total = len(object_names)
+    failures: List[BulkObjectFailure] = []
+    work_request_ids: dict[str, str] = {}
+    done = 0
+    reported = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            asyncio.wrap_future(executor.submit(call_with_backoff, action, name)): name
+            for name in object_names
+        }
+        pending = set(futures)
+        while pending:
+            finished, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in finished:
+                name = futures[future]
+                try:
+                    result = future.result()
+                    if (
+                        isinstance(result, WorkRequestStarted)
+                        and result.work_request_id
+                    ):
+                        work_request_ids[name] = result.work_request_id
+                except Exception as e:
+                    failures.append(BulkObjectFailure(object_name=name, error=str(e)))
+            done += len(finished)
+            if ctx is not None and (
+                done - reported >= BULK_PROGRESS_INTERVAL or done == total
+            ):
+                reported = done
+                await ctx.report_progress(
+                    done,
+                    total,
+                    f"{operation}: {done}/{total} objects, " f"{len(failures)} failed",
+                )
+
+    completed = total - len(failures)
+    return BulkOperationResult(
+        operation=operation,
+        total=total,
+        succeeded=0 if accepted_only else completed,
+        accepted=completed if accepted_only else 0,
+        failed=len(failures),
+        failures=failures,
+        work_request_ids=work_request_ids,
+    )
+
+
+def wait_for_work_request(object_storage_client, work_request_id: str):
+    """Poll a work request until it finishes, raising if it did not complete"""
+    while True:
+        work_request = call_with_backoff(
+            object_storage_client.get_work_request, work_request_id
+        ).data
+        if work_request.status == "COMPLETED":
+            return
+        if work_request.status in ("FAILED", "CANCELED"):
+            raise RuntimeError(
+                f"Work request {work_request_id} finished as {work_request.status}"
+            )
+        time.sleep(WORK_REQUEST_POLL_SECONDS)
+
+
+@mcp.tool(
+    description="Delete many objects from an object storage bucket concurrently, "
+    "selected by prefix or by a list of object names"
+)
+async def bulk_delete_objects(
+    bucket_name: Annotated[str, "The name of the bucket"],
+    compartment_id: Annotated[
+        str,
+        "The OCID of the compartment."
+        "If compartment id is not provided, use the root compartment id or the tenancy id",
+    ],
+    prefix: Annotated[str, "Delete every object whose name starts with prefix"] = "",
+    object_names: Annotated[
+        Optional[List[str]],
+        "Optional list of object names to delete. Takes precedence over prefix",
+    ] = None,
+    max_workers: Annotated[
+        int, "The maximum number of concurrent requests"
+    ] = BULK_DEFAULT_MAX_WORKERS,
+    ctx: Context = None,
+) -> BulkOperationResult:
+    object_storage_client = get_object_storage_client()
+    namespace_name = get_object_storage_namespace(compartment_id)
+    names = resolve_object_names(
+        object_storage_client, namespace_name, bucket_name, prefix, object_names
+    )
+
+    def delete(name: str):
+        return object_storage_client.delete_object(namespace_name, bucket_name, name)
+
+    return await run_bulk_operation("delete", names, delete, max_workers, ctx)
+
+
+@mcp.tool(
+    description="Restore many archived objects in an object storage bucket concurrently, "
+    "selected by prefix or by a list of object names"
+)
+async def bulk_restore_objects(
+    bucket_name: Annotated[str, "The name of the bucket"],
+    compartment_id: Annotated[
+        str,
+        "The OCID of the compartment."
+        "If compartment id is not provided, use the root compartment id or the tenancy id",
+    ],
+    prefix: Annotated[
+        str, "Restore every Archive tier object whose name starts with prefix"
+    ] = "",
+    object_names: Annotated[
+        Optional[List[str]],
+        "Optional list of object names to restore. Takes precedence over prefix",
+    ] = None,
+    hours: Annotated[
+        Optional[int],
+        "Optional number of hours the restored objects stay available. Default: 24",
+    ] = None,
+    max_workers: Annotated[
+        int, "The maximum number of concurrent requests"
+    ] = BULK_DEFAULT_MAX_WORKERS,
+    ctx: Context = None,
+) -> BulkOperationResult:
+    object_storage_client = get_object_storage_client()
+    namespace_name = get_object_storage_namespace(compartment_id)
+    names = resolve_object_names(
+        object_storage_client,
+        namespace_name,
+        bucket_name,
+        prefix,
+        object_names,
+        storage_tier="Archive",
+    )
+
+    def restore(name: str):
+        return object_storage_client.restore_objects(
+            namespace_name,
+            bucket_name,
+            oci.object_storage.models.RestoreObjectsDetails(
+                object_name=name, hours=hours
+            ),
+        )
+
+    return await run_bulk_operation("restore", names, restore, max_workers, ctx)
+
+
+@mcp.tool(
+    description="Copy many objects from an object storage bucket to another bucket "
+    "concurrently, selected by prefix or by a list of object names. Copies run as "
+    "asynchronous work requests whose IDs are returned per object"
+)
+async def bulk_copy_objects(
+    bucket_name: Annotated[str, "The name of the source bucket"],
+    compartment_id: Annotated[
+        str,
+        "The OCID of the compartment."
+        "If compartment id is not provided, use the root compartment id or the tenancy id",
+    ],
+    destination_bucket_name: Annotated[str, "The name of the destination bucket"],
+    destination_region: Annotated[
+        str, "The region of the destination bucket, for example us-ashburn-1"
+    ],
+    destination_namespace: Annotated[
+        str,
+        "Optional namespace of the destination bucket."
+        "If not provided, the namespace of the source bucket is used",
+    ] = "",
+    prefix: Annotated[str, "Copy every object whose name starts with prefix"] = "",
+    object_names: Annotated[
+        Optional[List[str]],
+        "Optional list of object names to copy. Takes precedence over prefix",
+    ] = None,
+    wait_for_completion: Annotated[
+        bool,
+        "Whether to wait for every copy work request to finish, so objects are "
+        "only reported as succeeded once copied. Otherwise they are reported as "
+        "accepted",
+    ] = False,
+    max_workers: Annotated[
+        int, "The maximum number of concurrent requests"
+    ] = BULK_DEFAULT_MAX_WORKERS,
+    ctx: Context = None,
+) -> BulkOperationResult:
+    object_storage_client = get_object_storage_client()
+    namespace_name = get_object_storage_namespace(compartment_id)
+    names = resolve_object_names(
+        object_storage_client, namespace_name, bucket_name, prefix, object_names
+    )
+
+    def copy(name: str) -> WorkRequestStarted:
+        response = object_storage_client.copy_object(
+            namespace_name,
+            bucket_name,
+            oci.object_storage.models.CopyObjectDetails(
+                source_object_name=name,
+                destination_region=destination_region,
+                destination_namespace=destination_namespace or namespace_name,
+                destination_bucket=destination_bucket_name,
+                destination_object_name=name,
+            ),
+        )
+        work_request_id = response.headers.get("opc-work-request-id")
+        if wait_for_completion:
+            wait_for_work_request(object_storage_client, work_request_id)
+        return WorkRequestStarted(work_request_id)
+
+    return await run_bulk_operation(
+        "copy",
+        names,
+        copy,
+        max_workers,
+        ctx,
+        accepted_only=not wait_for_completion,
+    )
+
+
+# Directory sync
+def file_md5(file_path: str) -> str:
+    """Return the base64-encoded MD5 of a file, in the format Object Storage reports"""
+    digest = hashlib.md5()
+    with open(file_path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return base64.b64encode(digest.digest()).decode("ascii")
+
+
+def walk_directory(directory: str, prefix: str = "") -> dict[str, str]:
+    """Map object names to local file paths for every file under directory"""
+    files = {}
+    for root, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            file_path = os.path.join(root, file_name)
+            relative_path = os.path.relpath(file_path, directory)
+            files[prefix + relative_path.replace(os.sep, "/")] = file_path
+    return files
+
+
+def is_file_changed(file_path: str, remote) -> bool:
+    """Compare a local file with a remote object summary by size, then by MD5.
+
+    Objects uploaded in multiple parts do not report a plain MD5, so for those an
+    object modified after the local file is considered up to date.
+    """
+    if remote is None:
+        return True
+    stat = os.stat(file_path)
+    if remote.size != stat.st_size:
+        return True
+    if remote.md5 and "-" not in remote.md5:
+        return file_md5(file_path) != remote.md5
+    if remote.time_modified is not None:
+        return remote.time_modified.timestamp() < stat.st_mtime
+    return True
+
+
+@mcp.tool(
+    description="Sync a local directory to an object storage bucket, "
+    "uploading only files that are new or whose size or MD5 changed"
+)
+async def sync_directory_to_bucket(
+    bucket_name: Annotated[str, "The name of the bucket"],
+    compartment_id: Annotated[
+        str,
+        "The OCID of the compartment."
+        "If compartment id is not provided, use the root compartment id or the tenancy id",
+    ],
+    directory: Annotated[str, "The path to the local directory to sync"],
+    prefix: Annotated[
+        str, "Optional prefix prepended to every object name, for example build/"
+    ] = "",
+    delete_orphans: Annotated[
+        bool,
+        "Whether to delete objects under the prefix that have no matching local file",
+    ] = False,
+    max_workers: Annotated[
+        int, "The maximum number of concurrent requests"
+    ] = BULK_DEFAULT_MAX_WORKERS,
+    ctx: Context = None,
+) -> SyncResult:
+    if not os.path.isdir(directory):
+        raise ValueError(f"{directory} is not a directory")
+
+    object_storage_client = get_object_storage_client()
+    namespace_name = get_object_storage_namespace(compartment_id)
+    local_files = walk_directory(directory, prefix)
+    remote_objects = {
+        obj.name: obj
+        for obj in list_all_objects(
+            object_storage_client,
+            namespace_name,
+            bucket_name,
+            prefix,
+            fields="name,size,md5,timeModified",
+        )
+    }
+
+    names = sorted(local_files)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        changed_flags = executor.map(
+            lambda name: is_file_changed(local_files[name], remote_objects.get(name)),
+            names,
+        )
+        changed = [name for name, flag in zip(names, changed_flags) if flag]
+    if ctx is not None:
+        await ctx.info(
+            f"Sync found {len(changed)} of {len(local_files)} files new or changed"
+        )
+
+    upload_manager = oci.object_storage.UploadManager(
+        object_storage_client, allow_parallel_uploads=True
+    )
+
+    def upload(name: str):
+        return upload_manager.upload_file(
+            namespace_name, bucket_name, name, local_files[name]
+        )
+
+    upload_result = await run_bulk_operation(
+        "upload", changed, upload, max_workers, ctx
+    )
+    failed_uploads = {failure.object_name for failure in upload_result.failures}
+
+    delete_result = None
+    if delete_orphans:
+        orphans = sorted(set(remote_objects) - set(local_files))
+
+        def delete(name: str):
+            return object_storage_client.delete_object(
+                namespace_name, bucket_name, name
+            )
+
+        delete_result = await run_bulk_operation(
+            "delete", orphans, delete, max_workers, ctx
+        )
+
+    return SyncResult(
+        files_scanned=len(local_files),
+        unchanged=len(local_files) - len(changed),
+        bytes_uploaded=sum(
+            os.path.getsize(local_files[name])
+            for name in changed
+            if name not in failed_uploads
+        ),
+        upload=upload_result,
+        delete=delete_result,
+    )
+
+
+# Pre-authenticated requests
+@mcp.tool(
+    description="Create a time-limited pre-authenticated request (PAR) URL so clients "
+    "can read or write an object, or objects under a prefix, directly with Object Storage"
+)
+def create_preauthenticated_request(
+    bucket_name: Annotated[str, "The name of the bucket"],
+    compartment_id: Annotated[
+        str,
+        "The OCID of the compartment."
+        "If compartment id is not provided, use the root compartment id or the tenancy id",
+    ],
+    access_type: Annotated[
+        Literal[
+            "ObjectRead",
+            "ObjectWrite",
+            "ObjectReadWrite",
+            "AnyObjectRead",
+            "AnyObjectWrite",
+            "AnyObjectReadWrite",
+        ],
+        "Object* access types grant access to a single object, "
+        "AnyObject* access types grant access to every object under the prefix",
+    ],
+    object_name: Annotated[
+        str,
+        "The object name, or the object name prefix for AnyObject access types",
+    ] = "",
+    expires_in_hours: Annotated[
+        float, "The number of hours until the PAR expires. Default: 24"
+    ] = 24,
+    name: Annotated[str, "Optional name of the PAR"] = "",
+    allow_listing: Annotated[
+        bool,
+        "Whether anyone with the URL of an AnyObject* PAR may also list the "
+        "objects under the prefix. Default: False",
+    ] = False,
+) -> PreauthenticatedRequest:
+    if access_type.startswith("Object") and not object_name:
+        raise ValueError(f"An object name is required for {access_type} access")
+
+    object_storage_client = get_object_storage_client()
+    namespace_name = get_object_storage_namespace(compartment_id)
+    time_expires = datetime.now(timezone.utc) + timedelta(hours=expires_in_hours)
+    par = object_storage_client.create_preauthenticated_request(
+        namespace_name,
+        bucket_name,
+        oci.object_storage.models.CreatePreauthenticatedRequestDetails(
+            name=name or f"{bucket_name}-{access_type}-{int(time.time())}",
+            object_name=object_name or None,
+            access_type=access_type,
+            time_expires=time_expires,
+            bucket_listing_action=(
+                "ListObjects"
+                if allow_listing and access_type.startswith("AnyObject")
+                else "Deny"
+            ),
+        ),
+    ).data
+
+    url = getattr(par, "full_path", None) or (
+        object_storage_client.base_client.endpoint + par.access_uri
+    )
+    issued = map_preauthenticated_request(par, namespace_name, bucket_name)
+    issued_preauthenticated_requests.add(issued)
+    return issued.model_copy(update={"url": url})
+
+
+@mcp.tool(
+    description="List the unexpired pre-authenticated requests issued by this server"
+)
+def list_issued_preauthenticated_requests(
+    bucket_name: Annotated[str, "Optional bucket name to filter by"] = "",
+) -> List[PreauthenticatedRequest]:
+    return issued_preauthenticated_requests.select(bucket_name=bucket_name)
+
+
+@mcp.tool(
+    description="Revoke pre-authenticated requests issued by this server, "
+    "by id or by bucket. Revokes every issued request if neither is given"
+)
+async def revoke_preauthenticated_requests(
+    par_ids: Annotated[
+        Optional[List[str]], "Optional list of PAR ids to revoke"
+    ] = None,
+    bucket_name: Annotated[
+        str, "Optional bucket name; revoke every PAR issued for the bucket"
+    ] = "",
+    max_workers: Annotated[
+        int, "The maximum number of concurrent requests"
+    ] = BULK_DEFAULT_MAX_WORKERS,
+    ctx: Context = None,
+) -> BulkOperationResult:
+    pars = {
+        par.id: par
+        for par in issued_preauthenticated_requests.select(par_ids, bucket_name)
+    }
+
+    object_storage_client = get_object_storage_client()
+
+    def revoke(par_id: str):
+        par = pars[par_id]
+        try:
+            object_storage_client.delete_preauthenticated_request(
+                par.namespace, par.bucket_name, par_id
+            )
+        except oci.exceptions.ServiceError as e:
+            if e.status != 404:
+                raise
+        issued_preauthenticated_requests.remove(par_id)
+
+    return await run_bulk_operation("revoke", list(pars), revoke, max_workers, ctx)
+
+
 def main():
     mcp.run()
 
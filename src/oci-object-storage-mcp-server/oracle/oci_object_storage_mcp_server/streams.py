@@ -0,0 +1,77 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import hashlib
+import zlib
+from typing import BinaryIO
+
+READ_CHUNK_SIZE = 1024 * 1024
+CONTENT_ENCODINGS = {"gzip": "gzip", "zstd": "zstd"}
+
+
+def get_compressor(compression: str):
+    """
+    Return a streaming compressor exposing compress(data) and flush()
+    for the given compression algorithm
+    """
+    if compression == "gzip":
+        # wbits=31 writes a gzip header and trailer rather than a raw zlib stream
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        try:
+            from compression import zstd
+
+            return zstd.ZstdCompressor()
+        except ImportError:
+            pass
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "zstd compression requires the zstandard package, install it with "
+                "the oracle.oci-object-storage-mcp-server[zstd] extra"
+            )
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+class CompressingReader:
+    """
+    A read-only file-like object that compresses a source stream as it is read,
+    computing the MD5 and length of the compressed output in the same pass.
+    """
+
+    def __init__(self, source: BinaryIO, compression: str):
+        self.source = source
+        self.compressor = get_compressor(compression)
+        self.md5 = hashlib.md5()
+        self.content_length = 0
+        self.original_length = 0
+        self._pending = bytearray()
+        self._eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        # Fill the request completely unless the source is exhausted, callers such
+        # as the multipart uploader treat a short read as the end of the stream
+        while not self._eof and (size < 0 or len(self._pending) < size):
+            chunk = self.source.read(READ_CHUNK_SIZE)
+            if chunk:
+                self.original_length += len(chunk)
+                self._pending += self.compressor.compress(chunk)
+            else:
+                self._pending += self.compressor.flush()
+                self._eof = True
+
+        if size < 0 or size > len(self._pending):
+            size = len(self._pending)
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        self.md5.update(data)
+        self.content_length += len(data)
+        return data
+
+    def readable(self) -> bool:
+        return True
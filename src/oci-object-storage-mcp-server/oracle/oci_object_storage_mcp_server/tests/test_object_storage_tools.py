@@ -4,7 +4,11 @@ Licensed under the Universal Permissive License v1.0 as shown at
 https://oss.oracle.com/licenses/upl.
 """
 
+import base64
+import gzip
+import hashlib
 import json
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, create_autospec, patch
 
 import oci
@@ -18,7 +22,20 @@ from oracle.oci_object_storage_mcp_server.models import (
     ObjectVersionCollection,
     ObjectVersionSummary,
 )
-from oracle.oci_object_storage_mcp_server.server import mcp
+from oracle.oci_object_storage_mcp_server.registry import (
+    PreauthenticatedRequestRegistry,
+)
+from oracle.oci_object_storage_mcp_server.server import (
+    issued_preauthenticated_requests,
+    mcp,
+)
+
+
+@pytest.fixture(autouse=True)
+def isolate_par_registry(tmp_path_factory):
+    registry_dir = tmp_path_factory.mktemp("registry")
+    issued_preauthenticated_requests.path = str(registry_dir / "pars.json")
+    issued_preauthenticated_requests.clear()
 
 
 def parse(double_encoded_text: str):
@@ -190,3 +207,407 @@ class TestObjectStorageTools:
             assert len(result["items"]) == 1
             assert result["items"][0]["name"] == "object1"
             assert result["items"][0]["version_id"] == "version_1"
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_object_storage_mcp_server.server.get_object_storage_client")
+    async def test_bulk_delete_objects(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        mock_namespace_response = create_autospec(oci.response.Response)
+        mock_namespace_response.data = "test_namespace"
+        mock_client.get_namespace.return_value = mock_namespace_response
+
+        first_page = create_autospec(oci.response.Response)
+        first_page.data = oci.object_storage.models.ListObjects(
+            objects=[
+                oci.object_storage.models.ObjectSummary(name="logs/a"),
+                oci.object_storage.models.ObjectSummary(name="logs/b"),
+            ],
+            next_start_with="logs/c",
+        )
+        second_page = create_autospec(oci.response.Response)
+        second_page.data = oci.object_storage.models.ListObjects(
+            objects=[oci.object_storage.models.ObjectSummary(name="logs/c")],
+        )
+        mock_client.list_objects.side_effect = [first_page, second_page]
+
+        def delete_object(namespace_name, bucket_name, object_name):
+            if object_name == "logs/b":
+                raise oci.exceptions.ServiceError(404, "ObjectNotFound", {}, "missing")
+
+        mock_client.delete_object.side_effect = delete_object
+        progress = []
+
+        async def progress_handler(done, total, message):
+            progress.append((done, total))
+
+        async with Client(mcp, progress_handler=progress_handler) as client:
+            result = (
+                await client.call_tool(
+                    "bulk_delete_objects",
+                    {
+                        "bucket_name": "bucket1",
+                        "compartment_id": "test_compartment",
+                        "prefix": "logs/",
+                    },
+                )
+            ).structured_content
+
+            assert mock_client.list_objects.call_count == 2
+            assert result["total"] == 3
+            assert result["succeeded"] == 2
+            # Progress is reported to the client once every object is done
+            assert progress[-1] == (3, 3)
+            assert result["failed"] == 1
+            assert result["failures"][0]["object_name"] == "logs/b"
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_object_storage_mcp_server.server.time.sleep")
+    @patch("oracle.oci_object_storage_mcp_server.server.get_object_storage_client")
+    async def test_bulk_restore_objects_retries_throttled(
+        self, mock_get_client, mock_sleep
+    ):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        mock_namespace_response = create_autospec(oci.response.Response)
+        mock_namespace_response.data = "test_namespace"
+        mock_client.get_namespace.return_value = mock_namespace_response
+
+        mock_client.restore_objects.side_effect = [
+            oci.exceptions.ServiceError(429, "TooManyRequests", {}, "throttled"),
+            None,
+        ]
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "bulk_restore_objects",
+                    {
+                        "bucket_name": "bucket1",
+                        "compartment_id": "test_compartment",
+                        "object_names": ["archive/a"],
+                        "hours": 48,
+                    },
+                )
+            ).structured_content
+
+            assert result["succeeded"] == 1
+            assert result["failed"] == 0
+            assert mock_client.restore_objects.call_count == 2
+            assert mock_sleep.call_count == 1
+            details = mock_client.restore_objects.call_args[0][2]
+            assert details.object_name == "archive/a"
+            assert details.hours == 48
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_object_storage_mcp_server.server.get_object_storage_client")
+    async def test_bulk_restore_objects_by_prefix_skips_other_tiers(
+        self, mock_get_client
+    ):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        mock_namespace_response = create_autospec(oci.response.Response)
+        mock_namespace_response.data = "test_namespace"
+        mock_client.get_namespace.return_value = mock_namespace_response
+
+        mock_list_response = create_autospec(oci.response.Response)
+        mock_list_response.data = oci.object_storage.models.ListObjects(
+            objects=[
+                oci.object_storage.models.ObjectSummary(
+                    name="backups/a", storage_tier="Archive"
+                ),
+                oci.object_storage.models.ObjectSummary(
+                    name="backups/b", storage_tier="Standard"
+                ),
+                oci.object_storage.models.ObjectSummary(
+                    name="backups/c", storage_tier="InfrequentAccess"
+                ),
+            ],
+        )
+        mock_client.list_objects.return_value = mock_list_response
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "bulk_restore_objects",
+                    {
+                        "bucket_name": "bucket1",
+                        "compartment_id": "test_compartment",
+                        "prefix": "backups/",
+                    },
+                )
+            ).structured_content
+
+            assert result["total"] == 1
+            assert result["succeeded"] == 1
+            assert mock_client.list_objects.call_args.kwargs["fields"] == (
+                "name,storageTier"
+            )
+            mock_client.restore_objects.assert_called_once()
+            assert mock_client.restore_objects.call_args[0][2].object_name == (
+                "backups/a"
+            )
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_object_storage_mcp_server.server.get_object_storage_client")
+    async def test_bulk_copy_objects(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        mock_namespace_response = create_autospec(oci.response.Response)
+        mock_namespace_response.data = "test_namespace"
+        mock_client.get_namespace.return_value = mock_namespace_response
+
+        def copy_object(namespace_name, bucket_name, details):
+            response = create_autospec(oci.response.Response)
+            response.headers = {
+                "opc-work-request-id": f"wr-{details.source_object_name}"
+            }
+            return response
+
+        mock_client.copy_object.side_effect = copy_object
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "bulk_copy_objects",
+                    {
+                        "bucket_name": "bucket1",
+                        "compartment_id": "test_compartment",
+                        "destination_bucket_name": "bucket2",
+                        "destination_region": "us-ashburn-1",
+                        "object_names": ["a", "b", "a"],
+                    },
+                )
+            ).structured_content
+
+            assert result["total"] == 2
+            # Copies have only been accepted, not confirmed
+            assert result["succeeded"] == 0
+            assert result["accepted"] == 2
+            assert result["work_request_ids"] == {"a": "wr-a", "b": "wr-b"}
+            copied = sorted(
+                c[0][2].source_object_name
+                for c in mock_client.copy_object.call_args_list
+            )
+            assert copied == ["a", "b"]
+            details = mock_client.copy_object.call_args[0][2]
+            assert details.destination_namespace == "test_namespace"
+            assert details.destination_bucket == "bucket2"
+
+            def get_work_request(work_request_id):
+                response = create_autospec(oci.response.Response)
+                response.data = oci.object_storage.models.WorkRequest(
+                    id=work_request_id,
+                    status="COMPLETED" if work_request_id == "wr-a" else "FAILED",
+                )
+                return response
+
+            mock_client.get_work_request.side_effect = get_work_request
+            waited = (
+                await client.call_tool(
+                    "bulk_copy_objects",
+                    {
+                        "bucket_name": "bucket1",
+                        "compartment_id": "test_compartment",
+                        "destination_bucket_name": "bucket2",
+                        "destination_region": "us-ashburn-1",
+                        "object_names": ["a", "b"],
+                        "wait_for_completion": True,
+                    },
+                )
+            ).structured_content
+
+            assert waited["succeeded"] == 1
+            assert waited["accepted"] == 0
+            assert waited["failed"] == 1
+            assert waited["failures"][0]["object_name"] == "b"
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_object_storage_mcp_server.server.get_object_storage_client")
+    async def test_sync_directory_to_bucket(self, mock_get_client, tmp_path):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        mock_namespace_response = create_autospec(oci.response.Response)
+        mock_namespace_response.data = "test_namespace"
+        mock_client.get_namespace.return_value = mock_namespace_response
+
+        (tmp_path / "nested").mkdir()
+        (tmp_path / "unchanged.txt").write_bytes(b"same")
+        (tmp_path / "changed.txt").write_bytes(b"new contents")
+        (tmp_path / "nested" / "new.txt").write_bytes(b"brand new")
+        unchanged_md5 = base64.b64encode(hashlib.md5(b"same").digest()).decode()
+
+        mock_list_response = create_autospec(oci.response.Response)
+        mock_list_response.data = oci.object_storage.models.ListObjects(
+            objects=[
+                oci.object_storage.models.ObjectSummary(
+                    name="build/unchanged.txt", size=4, md5=unchanged_md5
+                ),
+                oci.object_storage.models.ObjectSummary(
+                    name="build/changed.txt", size=3, md5="AAAA"
+                ),
+                oci.object_storage.models.ObjectSummary(
+                    name="build/orphan.txt", size=1, md5="BBBB"
+                ),
+            ],
+        )
+        mock_client.list_objects.return_value = mock_list_response
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "sync_directory_to_bucket",
+                    {
+                        "bucket_name": "bucket1",
+                        "compartment_id": "test_compartment",
+                        "directory": str(tmp_path),
+                        "prefix": "build/",
+                        "delete_orphans": True,
+                    },
+                )
+            ).structured_content
+
+            assert result["files_scanned"] == 3
+            assert result["unchanged"] == 1
+            assert result["upload"]["succeeded"] == 2
+            assert result["bytes_uploaded"] == len(b"new contents") + len(b"brand new")
+            uploaded = sorted(c[0][2] for c in mock_client.put_object.call_args_list)
+            assert uploaded == ["build/changed.txt", "build/nested/new.txt"]
+            assert result["delete"]["total"] == 1
+            mock_client.delete_object.assert_called_once_with(
+                "test_namespace", "bucket1", "build/orphan.txt"
+            )
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_object_storage_mcp_server.server.get_object_storage_client")
+    async def test_preauthenticated_request_lifecycle(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        mock_namespace_response = create_autospec(oci.response.Response)
+        mock_namespace_response.data = "test_namespace"
+        mock_client.get_namespace.return_value = mock_namespace_response
+
+        mock_create_response = create_autospec(oci.response.Response)
+        mock_create_response.data = oci.object_storage.models.PreauthenticatedRequest(
+            id="par1",
+            name="export",
+            access_uri="/p/secret/n/test_namespace/b/bucket1/o/export.csv",
+            full_path="https://objectstorage.example.com/p/secret/n/test_namespace"
+            "/b/bucket1/o/export.csv",
+            object_name="export.csv",
+            access_type="ObjectRead",
+            time_expires=datetime.now(timezone.utc) + timedelta(hours=1),
+        )
+        mock_client.create_preauthenticated_request.return_value = mock_create_response
+
+        async with Client(mcp) as client:
+            created = (
+                await client.call_tool(
+                    "create_preauthenticated_request",
+                    {
+                        "bucket_name": "bucket1",
+                        "compartment_id": "test_compartment",
+                        "access_type": "ObjectRead",
+                        "object_name": "export.csv",
+                        "expires_in_hours": 1,
+                    },
+                )
+            ).structured_content
+            assert created["id"] == "par1"
+            assert created["url"].endswith("/o/export.csv")
+            details = mock_client.create_preauthenticated_request.call_args[0][2]
+            assert details.bucket_listing_action == "Deny"
+
+            # The registry survives a restart, without the secret URL
+            restarted = PreauthenticatedRequestRegistry(
+                issued_preauthenticated_requests.path
+            )
+            assert [par.id for par in restarted.select()] == ["par1"]
+            with open(issued_preauthenticated_requests.path) as f:
+                assert "secret" not in f.read()
+
+            listed = (
+                await client.call_tool(
+                    "list_issued_preauthenticated_requests",
+                    {"bucket_name": "bucket1"},
+                )
+            ).structured_content["result"]
+            assert [par["id"] for par in listed] == ["par1"]
+            assert listed[0]["url"] is None
+
+            revoked = (
+                await client.call_tool("revoke_preauthenticated_requests", {})
+            ).structured_content
+            assert revoked["succeeded"] == 1
+            mock_client.delete_preauthenticated_request.assert_called_once_with(
+                "test_namespace", "bucket1", "par1"
+            )
+            assert issued_preauthenticated_requests.select() == []
+            assert (
+                PreauthenticatedRequestRegistry(
+                    issued_preauthenticated_requests.path
+                ).select()
+                == []
+            )
+
+    @pytest.mark.asyncio
+    @patch(
+        "oracle.oci_object_storage_mcp_server.server.oci.object_storage.UploadManager"
+    )
+    @patch("oracle.oci_object_storage_mcp_server.server.get_object_storage_client")
+    async def test_upload_object_gzip(
+        self, mock_get_client, mock_upload_manager, tmp_path
+    ):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        mock_namespace_response = create_autospec(oci.response.Response)
+        mock_namespace_response.data = "test_namespace"
+        mock_client.get_namespace.return_value = mock_namespace_response
+
+        contents = b"2025-01-01 INFO request served\n" * 10000
+        file_path = tmp_path / "app.log"
+        file_path.write_bytes(contents)
+
+        uploaded = bytearray()
+
+        def upload_stream(namespace_name, bucket_name, object_name, stream, **kwargs):
+            # Read in fixed-size parts, like the multipart uploader
+            while part := stream.read(4096):
+                uploaded.extend(part)
+                if len(part) < 4096:
+                    break
+
+        mock_upload_manager.return_value.upload_stream.side_effect = upload_stream
+
+        async with Client(mcp) as client:
+            result = (
+                await client.call_tool(
+                    "upload_object",
+                    {
+                        "bucket_name": "bucket1",
+                        "compartment_id": "test_compartment",
+                        "file_path": str(file_path),
+                        "compression": "gzip",
+                    },
+                )
+            ).structured_content
+
+            assert "error" not in result
+            assert result["object_name"] == "app.log"
+            assert result["content_encoding"] == "gzip"
+            assert result["original_length"] == len(contents)
+            assert result["content_length"] == len(uploaded) < len(contents)
+            assert (
+                result["md5"]
+                == base64.b64encode(hashlib.md5(bytes(uploaded)).digest()).decode()
+            )
+            assert gzip.decompress(bytes(uploaded)) == contents
+            kwargs = mock_upload_manager.return_value.upload_stream.call_args[1]
+            assert kwargs["content_encoding"] == "gzip"
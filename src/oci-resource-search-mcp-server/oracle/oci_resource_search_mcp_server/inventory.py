@@ -0,0 +1,360 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, NamedTuple, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    scope TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    resource_type TEXT,
+    display_name TEXT,
+    compartment_id TEXT,
+    lifecycle_state TEXT,
+    time_created TEXT,
+    freeform_tags TEXT,
+    defined_tags TEXT,
+    tags TEXT,
+    PRIMARY KEY (scope, identifier)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS resources_fts USING fts5(
+    identifier,
+    display_name,
+    resource_type,
+    compartment_id,
+    lifecycle_state,
+    tags,
+    content='resources'
+);
+CREATE TRIGGER IF NOT EXISTS resources_ai AFTER INSERT ON resources BEGIN
+    INSERT INTO resources_fts(
+        rowid, identifier, display_name, resource_type, compartment_id,
+        lifecycle_state, tags
+    ) VALUES (
+        new.rowid, new.identifier, new.display_name, new.resource_type,
+        new.compartment_id, new.lifecycle_state, new.tags
+    );
+END;
+CREATE TRIGGER IF NOT EXISTS resources_ad AFTER DELETE ON resources BEGIN
+    INSERT INTO resources_fts(
+        resources_fts, rowid, identifier, display_name, resource_type,
+        compartment_id, lifecycle_state, tags
+    ) VALUES (
+        'delete', old.rowid, old.identifier, old.display_name, old.resource_type,
+        old.compartment_id, old.lifecycle_state, old.tags
+    );
+END;
+CREATE TABLE IF NOT EXISTS resource_tags (
+    scope TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    -- Empty for freeform tags
+    namespace TEXT NOT NULL COLLATE NOCASE,
+    key TEXT NOT NULL COLLATE NOCASE,
+    value TEXT,
+    PRIMARY KEY (scope, identifier, namespace, key)
+);
+CREATE INDEX IF NOT EXISTS resource_tags_key
+    ON resource_tags (scope, key, namespace, value);
+CREATE TRIGGER IF NOT EXISTS resources_tags_ad AFTER DELETE ON resources BEGIN
+    DELETE FROM resource_tags
+    WHERE scope = old.scope AND identifier = old.identifier;
+END;
+CREATE TABLE IF NOT EXISTS sync_state (
+    scope TEXT PRIMARY KEY,
+    cursor TEXT,
+    time_full_sync TEXT,
+    time_synced TEXT
+);
+"""
+# Keys of the resource dicts stored, in column order
+COLUMNS = (
+    "resource_id",
+    "resource_type",
+    "display_name",
+    "compartment_id",
+    "lifecycle_state",
+    "time_created",
+    "freeform_tags",
+    "defined_tags",
+)
+
+
+class SyncState(NamedTuple):
+    # Newest timeCreated indexed so far, where incremental syncs resume
+    cursor: Optional[datetime]
+    time_full_sync: Optional[datetime]
+    time_synced: Optional[datetime]
+
+
+def tag_text(freeform_tags: Optional[dict], defined_tags: Optional[dict]) -> str:
+    """Tags as indexed text: key=value for freeform and namespace.key=value for defined"""
+    tags = [f"{key}={value}" for key, value in (freeform_tags or {}).items()]
+    for namespace, values in (defined_tags or {}).items():
+        tags.extend(f"{namespace}.{key}={value}" for key, value in values.items())
+    return "\n".join(tags)
+
+
+def match_phrase(text: str) -> str:
+    """Quote text as an FTS5 phrase so operators in it are matched literally"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def match_query(text: Optional[str]) -> Optional[str]:
+    """An FTS5 query matching every word of text as a prefix in any column"""
+    return (
+        " AND ".join(f"{match_phrase(word)}*" for word in (text or "").split()) or None
+    )
+
+
+def tag_rows(scope: str, resource: dict) -> list[tuple]:
+    rows = [
+        (scope, resource["resource_id"], "", key, str(value))
+        for key, value in (resource["freeform_tags"] or {}).items()
+    ]
+    for namespace, values in (resource["defined_tags"] or {}).items():
+        rows.extend(
+            (scope, resource["resource_id"], namespace, key, str(value))
+            for key, value in values.items()
+        )
+    return rows
+
+
+def tag_condition(tag: str) -> tuple[str, list]:
+    """
+    An SQL condition on resource_tags t matching a tag given as key,
+    key=value or namespace.key=value. Keys and namespaces match
+    case-insensitively and values exactly; a dotted name matches a defined
+    tag or a freeform key containing the dot.
+    """
+    name, has_value, value = tag.partition("=")
+    name = name.strip()
+    namespace, _, key = name.rpartition(".")
+    if namespace:
+        condition = (
+            "((t.namespace = '' AND t.key = ?) OR (t.namespace = ? AND t.key = ?))"
+        )
+        parameters = [name, namespace, key]
+    else:
+        condition = "t.namespace = '' AND t.key = ?"
+        parameters = [name]
+    if has_value:
+        condition += " AND t.value = ?"
+        parameters.append(value.strip())
+    return condition, parameters
+
+
+class ResourceInventory:
+    """
+    Resources of each scope (a tenancy) in SQLite, with an FTS5 index over their
+    identifier, name, type, compartment, lifecycle state and tags. The database
+    is kept in memory unless a path is given.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._sync_locks: dict[str, threading.Lock] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path or ":memory:", check_same_thread=False
+            )
+            self._connection.row_factory = sqlite3.Row
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def sync_lock(self, scope: str) -> threading.Lock:
+        """A lock serializing the syncs of a scope"""
+        with self._lock:
+            return self._sync_locks.setdefault(scope, threading.Lock())
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM resources")
+                connection.execute("DELETE FROM resource_tags")
+                connection.execute("DELETE FROM sync_state")
+
+    def sync_state(self, scope: str) -> SyncState:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT * FROM sync_state WHERE scope = ?", (scope,))
+                .fetchone()
+            )
+        if row is None:
+            return SyncState(None, None, None)
+        return SyncState(
+            *(
+                datetime.fromisoformat(row[column]) if row[column] else None
+                for column in ("cursor", "time_full_sync", "time_synced")
+            )
+        )
+
+    def write(
+        self,
+        scope: str,
+        resources: Iterable[dict],
+        time_synced: datetime,
+        replace: bool = False,
+    ) -> int:
+        """
+        Insert or replace resources and record the sync. A full sync replaces
+        every resource of the scope, dropping those that no longer exist.
+        Returns the number of resources written.
+        """
+        resources = list(resources)
+        rows = [
+            (
+                scope,
+                *(
+                    (
+                        json.dumps(resource[column])
+                        if column.endswith("_tags")
+                        else resource[column]
+                    )
+                    for column in COLUMNS
+                ),
+                tag_text(resource["freeform_tags"], resource["defined_tags"]),
+            )
+            for resource in resources
+        ]
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                state = connection.execute(
+                    "SELECT cursor, time_full_sync FROM sync_state WHERE scope = ?",
+                    (scope,),
+                ).fetchone()
+                cursor = None if replace or state is None else state["cursor"]
+                time_full_sync = (
+                    time_synced.isoformat()
+                    if replace or state is None
+                    else state["time_full_sync"]
+                )
+                if replace:
+                    connection.execute(
+                        "DELETE FROM resources WHERE scope = ?", (scope,)
+                    )
+                # Deleting first keeps the FTS index in step through the triggers
+                connection.executemany(
+                    "DELETE FROM resources WHERE scope = ? AND identifier = ?",
+                    [(row[0], row[1]) for row in rows],
+                )
+                connection.executemany(
+                    "INSERT INTO resources VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                connection.executemany(
+                    "INSERT INTO resource_tags VALUES (?, ?, ?, ?, ?)",
+                    [
+                        row
+                        for resource in resources
+                        for row in tag_rows(scope, resource)
+                    ],
+                )
+                newest = max(
+                    [
+                        row[6]
+                        for row in rows
+                        if row[6] is not None and (cursor is None or row[6] > cursor)
+                    ],
+                    default=cursor,
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                    (scope, newest, time_full_sync, time_synced.isoformat()),
+                )
+        return len(rows)
+
+    def count(self, scope: str) -> int:
+        with self._lock:
+            return (
+                self._connect()
+                .execute("SELECT COUNT(*) FROM resources WHERE scope = ?", (scope,))
+                .fetchone()[0]
+            )
+
+    def search(
+        self,
+        scope: str,
+        text: Optional[str] = None,
+        tags: Optional[list[str]] = None,
+        resource_type: Optional[str] = None,
+        compartment_id: Optional[str] = None,
+        lifecycle_state: Optional[str] = None,
+        limit: int = 100,
+    ) -> tuple[list[dict], int]:
+        """
+        Find resources matching the text through the full-text index and the
+        tags and other filters exactly, best matches first.
+        Returns up to limit resources and the total number of matches.
+        """
+        conditions = ["r.scope = ?"]
+        parameters: list = [scope]
+        query = match_query(text)
+        if query:
+            source = "resources_fts JOIN resources r ON r.rowid = resources_fts.rowid"
+            conditions.append("resources_fts MATCH ?")
+            parameters.append(query)
+            order = "bm25(resources_fts)"
+        else:
+            source = "resources r"
+            order = "r.display_name COLLATE NOCASE"
+        for column, value in (
+            ("resource_type", resource_type),
+            ("compartment_id", compartment_id),
+            ("lifecycle_state", lifecycle_state),
+        ):
+            if value:
+                conditions.append(f"r.{column} = ? COLLATE NOCASE")
+                parameters.append(value)
+        for tag in tags or []:
+            condition, tag_parameters = tag_condition(tag)
+            conditions.append(
+                "EXISTS (SELECT 1 FROM resource_tags t WHERE t.scope = r.scope"
+                f" AND t.identifier = r.identifier AND {condition})"
+            )
+            parameters.extend(tag_parameters)
+        where = " AND ".join(conditions)
+        with self._lock:
+            connection = self._connect()
+            total = connection.execute(
+                f"SELECT COUNT(*) FROM {source} WHERE {where}", parameters
+            ).fetchone()[0]
+            rows = connection.execute(
+                f"SELECT r.* FROM {source} WHERE {where} ORDER BY {order} LIMIT ?",
+                [*parameters, limit],
+            ).fetchall()
+        return [
+            {
+                "resource_id": row["identifier"],
+                "compartment_id": row["compartment_id"],
+                "display_name": row["display_name"],
+                "resource_type": row["resource_type"],
+                "lifecycle_state": row["lifecycle_state"],
+                "time_created": row["time_created"],
+                "freeform_tags": json.loads(row["freeform_tags"]),
+                "defined_tags": json.loads(row["defined_tags"]),
+            }
+            for row in rows
+        ], total
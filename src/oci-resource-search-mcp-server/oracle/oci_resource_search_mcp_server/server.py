@@ -5,19 +5,33 @@ https://oss.oracle.com/licenses/upl.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from logging import Logger
-from typing import Annotated
+from typing import Annotated, Optional
 
 import oci
 from fastmcp import FastMCP
 from oci.resource_search.models import FreeTextSearchDetails, StructuredSearchDetails
 
 from . import __project__, __version__
+from .inventory import ResourceInventory
 
 logger = Logger(__name__, level="INFO")
 
 mcp = FastMCP(name=__project__)
 
+# Largest page search_resources returns
+SEARCH_PAGE_SIZE = 1000
+DEFAULT_RESULT_LIMIT = 1000
+# How often the inventory is rebuilt from scratch, dropping deleted resources
+# and picking up changes to existing ones, which incremental syncs miss
+INVENTORY_FULL_SYNC_SECONDS = 3600
+DEFAULT_INVENTORY_MAX_AGE_SECONDS = 300
+
+# Kept in memory unless OCI_RESOURCE_SEARCH_INVENTORY names a database file
+inventory = ResourceInventory(os.getenv("OCI_RESOURCE_SEARCH_INVENTORY"))
+
 
 def get_search_client():
     logger.info("entering get_search_client")
@@ -37,36 +51,113 @@ def get_search_client():
     return oci.resource_search.ResourceSearchClient(config, signer=signer)
 
 
+def map_resource(resource, compartment_id: str) -> dict:
+    return {
+        "resource_id": resource.identifier,
+        "compartment_id": compartment_id,
+        "display_name": resource.display_name,
+        "resource_type": resource.resource_type,
+        "lifecycle_state": resource.lifecycle_state,
+        "freeform_tags": resource.freeform_tags,
+        "defined_tags": resource.defined_tags,
+    }
+
+
+def map_inventory_resource(resource) -> dict:
+    time_created = resource.time_created
+    return dict(
+        map_resource(resource, resource.compartment_id),
+        time_created=(
+            time_created.astimezone(timezone.utc).isoformat() if time_created else None
+        ),
+    )
+
+
+def iter_search_pages(search_client, search_details, max_items=None, **kwargs):
+    """
+    Yield each page of search_resources results along with whether more pages
+    follow. The next page is fetched in the background while the current one
+    is consumed, at most one page ahead, and no page is requested once
+    max_items results have been fetched. Other keyword arguments, such as
+    tenant_id, are passed to search_resources.
+    """
+    page_size = min(max_items or SEARCH_PAGE_SIZE, SEARCH_PAGE_SIZE)
+
+    def fetch_page(page):
+        return search_client.search_resources(
+            search_details, limit=page_size, page=page, **kwargs
+        )
+
+    fetched = 0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(fetch_page, None)
+        while pending is not None:
+            response = pending.result()
+            items = response.data.items
+            fetched += len(items)
+            next_page = response.next_page if response.has_next_page else None
+            pending = (
+                executor.submit(fetch_page, next_page)
+                if next_page and (max_items is None or fetched < max_items)
+                else None
+            )
+            yield items, next_page is not None
+
+
+def search_all_pages(search_client, search_details, compartment_id: str, limit: int):
+    """Page through search_resources, mapping resources until limit are mapped"""
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    resources = []
+    truncated = False
+    for items, has_more in iter_search_pages(
+        search_client, search_details, max_items=limit
+    ):
+        room = limit - len(resources)
+        resources.extend(
+            map_resource(resource, compartment_id) for resource in items[:room]
+        )
+        if len(items) > room or (has_more and len(resources) == limit):
+            truncated = True
+    return {
+        "resources": resources,
+        "returned": len(resources),
+        "truncated": truncated,
+    }
+
+
 @mcp.tool
-def list_all_resources(compartment_id: str) -> list[dict]:
-    """Returns all resources"""
-    search_client = get_search_client()
+def list_all_resources(
+    compartment_id: str,
+    limit: Annotated[
+        int, "Maximum number of resources to return"
+    ] = DEFAULT_RESULT_LIMIT,
+) -> dict:
+    """
+    Returns all resources, following every page of results up to limit;
+    truncated is true when more resources matched than were returned
+    """
     structured_search = StructuredSearchDetails(
         type="Structured",
         query=f"query all resources where compartmentId = '{compartment_id}'",
     )
-    response = search_client.search_resources(structured_search).data
-    return [
-        {
-            "resource_id": resource.identifier,
-            "compartment_id": compartment_id,
-            "display_name": resource.display_name,
-            "resource_type": resource.resource_type,
-            "lifecycle_state": resource.lifecycle_state,
-            "freeform_tags": resource.freeform_tags,
-            "defined_tags": resource.defined_tags,
-        }
-        for resource in response.items
-    ]
+    return search_all_pages(
+        get_search_client(), structured_search, compartment_id, limit
+    )
 
 
 @mcp.tool
 def search_resources(
     compartment_id: str,
     display_name: Annotated[str, "Full display name or display name substring"],
-) -> list[dict]:
-    """Searches for resources by display name"""
-    search_client = get_search_client()
+    limit: Annotated[
+        int, "Maximum number of resources to return"
+    ] = DEFAULT_RESULT_LIMIT,
+) -> dict:
+    """
+    Searches for resources by display name, following every page of results
+    up to limit; truncated is true when more resources matched than were returned
+    """
     structured_search = StructuredSearchDetails(
         type="Structured",
         query=(
@@ -74,50 +165,35 @@ def search_resources(
             f"&& displayName =~ '{display_name}'"
         ),
     )
-    response = search_client.search_resources(structured_search).data
-    return [
-        {
-            "resource_id": resource.identifier,
-            "compartment_id": compartment_id,
-            "display_name": resource.display_name,
-            "resource_type": resource.resource_type,
-            "lifecycle_state": resource.lifecycle_state,
-            "freeform_tags": resource.freeform_tags,
-            "defined_tags": resource.defined_tags,
-        }
-        for resource in response.items
-    ]
+    return search_all_pages(
+        get_search_client(), structured_search, compartment_id, limit
+    )
 
 
 @mcp.tool
 def search_resources_free_form(
     compartment_id: str,
     text: Annotated[str, "Free-form search string"],
-) -> list[dict]:
-    """Searches for the presence of the search string in all resource fields"""
-    search_client = get_search_client()
+    limit: Annotated[
+        int, "Maximum number of resources to return"
+    ] = DEFAULT_RESULT_LIMIT,
+) -> dict:
+    """
+    Searches for the presence of the search string in all resource fields,
+    following every page of results up to limit; truncated is true when more
+    resources matched than were returned
+    """
     freetext_search = FreeTextSearchDetails(
         type="FreeText",
         text=text,
     )
-    response = search_client.search_resources(freetext_search).data
-    return [
-        {
-            "resource_id": resource.identifier,
-            "compartment_id": compartment_id,
-            "display_name": resource.display_name,
-            "resource_type": resource.resource_type,
-            "lifecycle_state": resource.lifecycle_state,
-            "freeform_tags": resource.freeform_tags,
-            "defined_tags": resource.defined_tags,
-        }
-        for resource in response.items
-    ]
-
-
-def search_resources_by_type(compartment_id: str, resource_type: str):
+    return search_all_pages(get_search_client(), freetext_search, compartment_id, limit)
+
+
+def search_resources_by_type(
+    compartment_id: str, resource_type: str, limit: int = DEFAULT_RESULT_LIMIT
+):
     """Search for resources by resource type"""
-    search_client = get_search_client()
     structured_search = StructuredSearchDetails(
         type="Structured",
         query=(
@@ -125,19 +201,100 @@ def search_resources_by_type(compartment_id: str, resource_type: str):
             f"resources where compartmentId = '{compartment_id}'"
         ),
     )
-    response = search_client.search_resources(structured_search).data
-    return [
-        {
-            "resource_id": resource.identifier,
-            "compartment_id": compartment_id,
-            "display_name": resource.display_name,
-            "resource_type": resource.resource_type,
-            "lifecycle_state": resource.lifecycle_state,
-            "freeform_tags": resource.freeform_tags,
-            "defined_tags": resource.defined_tags,
-        }
-        for resource in response.items
-    ]
+    return search_all_pages(
+        get_search_client(), structured_search, compartment_id, limit
+    )
+
+
+def sync_inventory(
+    tenancy_id: str,
+    refresh: bool = False,
+    max_age_seconds: float = DEFAULT_INVENTORY_MAX_AGE_SECONDS,
+):
+    """
+    Bring the inventory of a tenancy up to date. The first sync, forced ones
+    and those due every INVENTORY_FULL_SYNC_SECONDS fetch every resource; the
+    others only fetch resources created since the newest one indexed.
+    """
+    with inventory.sync_lock(tenancy_id):
+        state = inventory.sync_state(tenancy_id)
+        now = datetime.now(timezone.utc)
+        full = (
+            refresh
+            or state.time_full_sync is None
+            or now - state.time_full_sync
+            > timedelta(seconds=INVENTORY_FULL_SYNC_SECONDS)
+        )
+        if not full and now - state.time_synced <= timedelta(seconds=max_age_seconds):
+            return
+        query = "query all resources"
+        if not full and state.cursor is not None:
+            # Whole seconds: resources created in the cursor's second are
+            # fetched again and replace their stored copies
+            query += f" where timeCreated >= '{state.cursor:%Y-%m-%dT%H:%M:%SZ}'"
+        resources = [
+            map_inventory_resource(resource)
+            for items, _ in iter_search_pages(
+                get_search_client(),
+                StructuredSearchDetails(type="Structured", query=query),
+                tenant_id=tenancy_id,
+            )
+            for resource in items
+        ]
+        inventory.write(tenancy_id, resources, now, replace=full)
+
+
+@mcp.tool
+def search_inventory(
+    tenancy_id: Annotated[str, "OCID of the tenancy whose resources are searched"],
+    text: Annotated[
+        Optional[str],
+        "Words matched as prefixes against resource OCIDs, names, types, "
+        "compartments, lifecycle states and tags",
+    ] = None,
+    tags: Annotated[
+        Optional[list[str]],
+        "Tags the resources must have, each as key, key=value or "
+        "namespace.key=value for defined tags",
+    ] = None,
+    resource_type: Annotated[Optional[str], "Resource type, e.g. Instance"] = None,
+    compartment_id: Annotated[
+        Optional[str], "OCID of the compartment holding the resources"
+    ] = None,
+    lifecycle_state: Annotated[Optional[str], "Lifecycle state"] = None,
+    limit: Annotated[int, "Maximum number of resources to return"] = 100,
+    refresh: Annotated[
+        bool, "Rebuild the inventory from every resource before searching"
+    ] = False,
+    max_age_seconds: Annotated[
+        float, "Sync resources created since the last sync if it is older than this"
+    ] = DEFAULT_INVENTORY_MAX_AGE_SECONDS,
+) -> dict:
+    """
+    Searches a local full-text index of every resource in the tenancy, best
+    matches first, syncing it with Resource Search when it is stale. Resources
+    created since the last sync are added incrementally, and the inventory is
+    rebuilt hourly to drop deleted resources and pick up changed ones
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    sync_inventory(tenancy_id, refresh, max_age_seconds)
+    resources, total = inventory.search(
+        tenancy_id,
+        text=text,
+        tags=tags,
+        resource_type=resource_type,
+        compartment_id=compartment_id,
+        lifecycle_state=lifecycle_state,
+        limit=limit,
+    )
+    return {
+        "resources": resources,
+        "returned": len(resources),
+        "truncated": total > len(resources),
+        "inventory_size": inventory.count(tenancy_id),
+        "synced_at": inventory.sync_state(tenancy_id).time_synced.isoformat(),
+    }
 
 
 @mcp.tool
@@ -4,14 +4,63 @@ Licensed under the Universal Permissive License v1.0 as shown at
 https://oss.oracle.com/licenses/upl.
 """
 
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, create_autospec, patch
 
 import oci
 import pytest
 from fastmcp import Client
+from oracle.oci_resource_search_mcp_server import server
 from oracle.oci_resource_search_mcp_server.server import mcp
 
 
+@pytest.fixture(autouse=True)
+def clear_inventory():
+    server.inventory.clear()
+    yield
+    server.inventory.clear()
+
+
+def search_response(identifiers, next_page=None):
+    response = create_autospec(oci.response.Response)
+    response.data = oci.resource_search.models.ResourceSummaryCollection(
+        items=[
+            oci.resource_search.models.ResourceSummary(
+                identifier=identifier,
+                display_name=identifier,
+                resource_type="instance",
+                lifecycle_state="RUNNING",
+            )
+            for identifier in identifiers
+        ]
+    )
+    response.has_next_page = next_page is not None
+    response.next_page = next_page
+    return response
+
+
+def inventory_response(resources, next_page=None):
+    response = create_autospec(oci.response.Response)
+    response.data = oci.resource_search.models.ResourceSummaryCollection(
+        items=[
+            oci.resource_search.models.ResourceSummary(
+                identifier=identifier,
+                display_name=display_name,
+                resource_type="Instance",
+                compartment_id="compartment1",
+                lifecycle_state="RUNNING",
+                time_created=datetime(2025, 1, day, tzinfo=timezone.utc),
+                freeform_tags=freeform_tags,
+                defined_tags={"Ops": {"CostCenter": "42"}},
+            )
+            for identifier, display_name, day, freeform_tags in resources
+        ]
+    )
+    response.has_next_page = next_page is not None
+    response.next_page = next_page
+    return response
+
+
 class TestResourceSearchTools:
     @pytest.mark.asyncio
     @patch("oracle.oci_resource_search_mcp_server.server.get_search_client")
@@ -32,6 +81,7 @@ class TestResourceSearchTools:
                 ]
             )
         )
+        mock_search_response.has_next_page = False
         mock_client.search_resources.return_value = mock_search_response
 
         async with Client(mcp) as client:
@@ -42,10 +92,11 @@ class TestResourceSearchTools:
                         "compartment_id": "compartment1",
                     },
                 )
-            ).structured_content["result"]
+            ).structured_content
 
-            assert len(result) == 1
-            assert result[0]["resource_id"] == "resource1"
+            assert result["returned"] == 1
+            assert result["truncated"] is False
+            assert result["resources"][0]["resource_id"] == "resource1"
 
     @pytest.mark.asyncio
     @patch("oracle.oci_resource_search_mcp_server.server.get_search_client")
@@ -66,6 +117,7 @@ class TestResourceSearchTools:
                 ]
             )
         )
+        mock_search_response.has_next_page = False
         mock_client.search_resources.return_value = mock_search_response
 
         async with Client(mcp) as client:
@@ -77,10 +129,11 @@ class TestResourceSearchTools:
                         "display_name": "Resource",
                     },
                 )
-            ).structured_content["result"]
+            ).structured_content
 
-            assert len(result) == 1
-            assert result[0]["resource_id"] == "resource1"
+            assert result["returned"] == 1
+            assert result["truncated"] is False
+            assert result["resources"][0]["resource_id"] == "resource1"
 
     @pytest.mark.asyncio
     @patch("oracle.oci_resource_search_mcp_server.server.get_search_client")
@@ -101,6 +154,7 @@ class TestResourceSearchTools:
                 ]
             )
         )
+        mock_search_response.has_next_page = False
         mock_client.search_resources.return_value = mock_search_response
 
         async with Client(mcp) as client:
@@ -112,10 +166,144 @@ class TestResourceSearchTools:
                         "text": "Resource",
                     },
                 )
-            ).structured_content["result"]
+            ).structured_content
+
+            assert result["returned"] == 1
+            assert result["truncated"] is False
+            assert result["resources"][0]["resource_id"] == "resource1"
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_resource_search_mcp_server.server.get_search_client")
+    async def test_list_all_resources_follows_pages_up_to_limit(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        pages = {
+            None: search_response(["r1", "r2"], next_page="page2"),
+            "page2": search_response(["r3", "r4"], next_page="page3"),
+            "page3": search_response(["r5"]),
+        }
+        mock_client.search_resources.side_effect = lambda details, limit, page: pages[
+            page
+        ]
+
+        async with Client(mcp) as client:
+            complete = (
+                await client.call_tool(
+                    "list_all_resources", {"compartment_id": "compartment1"}
+                )
+            ).structured_content
+            mock_client.search_resources.reset_mock()
+            limited = (
+                await client.call_tool(
+                    "list_all_resources", {"compartment_id": "compartment1", "limit": 3}
+                )
+            ).structured_content
+
+        assert complete["returned"] == 5
+        assert complete["truncated"] is False
+        assert [r["resource_id"] for r in limited["resources"]] == ["r1", "r2", "r3"]
+        assert limited["truncated"] is True
+        # Pages past the limit are not fetched
+        assert mock_client.search_resources.call_count == 2
+        assert mock_client.search_resources.call_args.kwargs["limit"] == 3
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_resource_search_mcp_server.server.get_search_client")
+    async def test_search_inventory_syncs_incrementally(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        pages = {
+            None: inventory_response(
+                [("web1", "web-frontend-1", 1, {"env": "prod"})], next_page="page2"
+            ),
+            "page2": inventory_response([("db1", "database-1", 2, {"env": "dev"})]),
+        }
+        mock_client.search_resources.side_effect = (
+            lambda details, limit, page, tenant_id: pages[page]
+        )
+
+        async with Client(mcp) as client:
+            initial = (
+                await client.call_tool(
+                    "search_inventory", {"tenancy_id": "tenancy1", "text": "web"}
+                )
+            ).structured_content
+            full_query = mock_client.search_resources.call_args_list[0].args[0].query
+
+            mock_client.search_resources.reset_mock()
+            mock_client.search_resources.side_effect = None
+            mock_client.search_resources.return_value = inventory_response(
+                [("web2", "web-frontend-2", 3, {"env": "prod"})]
+            )
+            tagged = (
+                await client.call_tool(
+                    "search_inventory",
+                    {
+                        "tenancy_id": "tenancy1",
+                        "tags": ["env=prod", "Ops.CostCenter=42"],
+                        "max_age_seconds": 0,
+                    },
+                )
+            ).structured_content
+            incremental_query = mock_client.search_resources.call_args.args[0].query
 
-            assert len(result) == 1
-            assert result[0]["resource_id"] == "resource1"
+            mock_client.search_resources.reset_mock()
+            cached = (
+                await client.call_tool(
+                    "search_inventory",
+                    {"tenancy_id": "tenancy1", "text": "database", "limit": 1},
+                )
+            ).structured_content
+
+        assert full_query == "query all resources"
+        assert all(
+            call.kwargs["tenant_id"] == "tenancy1"
+            for call in mock_client.search_resources.call_args_list
+        )
+        assert [r["resource_id"] for r in initial["resources"]] == ["web1"]
+        assert initial["inventory_size"] == 2
+        assert incremental_query == (
+            "query all resources where timeCreated >= '2025-01-02T00:00:00Z'"
+        )
+        assert sorted(r["resource_id"] for r in tagged["resources"]) == [
+            "web1",
+            "web2",
+        ]
+        assert tagged["inventory_size"] == 3
+        # A fresh inventory is searched without calling Resource Search
+        mock_client.search_resources.assert_not_called()
+        assert cached["returned"] == 1
+        assert cached["resources"][0]["resource_id"] == "db1"
+        assert cached["resources"][0]["freeform_tags"] == {"env": "dev"}
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_resource_search_mcp_server.server.get_search_client")
+    async def test_search_inventory_matches_tags_exactly(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.search_resources.return_value = inventory_response(
+            [
+                ("web1", "web-1", 1, {"env": "prod"}),
+                ("web2", "web-2", 1, {"owner": "env"}),
+            ]
+        )
+
+        async def search(tags):
+            result = (
+                await client.call_tool(
+                    "search_inventory", {"tenancy_id": "tenancy1", "tags": tags}
+                )
+            ).structured_content
+            return sorted(r["resource_id"] for r in result["resources"])
+
+        async with Client(mcp) as client:
+            assert await search(["env"]) == ["web1"]
+            assert await search(["prod"]) == []
+            assert await search(["env=prod"]) == ["web1"]
+            assert await search(["ENV=prod"]) == ["web1"]
+            assert await search(["owner=prod"]) == []
+            assert await search(["Ops.CostCenter"]) == ["web1", "web2"]
+            assert await search(["CostCenter"]) == []
 
     @pytest.mark.asyncio
     @patch("oracle.oci_resource_search_mcp_server.server.get_search_client")
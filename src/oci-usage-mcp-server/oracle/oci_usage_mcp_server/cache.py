@@ -0,0 +1,103 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from logging import Logger
+from typing import NamedTuple, Optional
+
+logger = Logger(__name__, level="INFO")
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+class UsageCacheKey(NamedTuple):
+    tenant_id: str
+    query_type: str
+    granularity: str
+    group_by: tuple[str, ...]
+    compartment_depth: Optional[float]
+    is_aggregate_by_time: bool
+    window_start: str
+    window_end: str
+
+
+class UsageCache:
+    """
+    Caches the usage summaries of closed windows, which never change once the
+    billing period is over. Up to max_entries windows are kept in memory, least
+    recently used first out, and, when persist_dir is set, written to and
+    lazily loaded from one JSON file per window.
+    """
+
+    def __init__(
+        self,
+        persist_dir: Optional[str] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.persist_dir = persist_dir
+        self.max_entries = max_entries
+        self._entries: OrderedDict[UsageCacheKey, list[dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, key: UsageCacheKey) -> Optional[list[dict]]:
+        with self._lock:
+            items = self._entries.get(key)
+            if items is not None:
+                self._entries.move_to_end(key)
+        if items is None:
+            items = self._load(key)
+            if items is not None:
+                self._remember(key, items)
+        return items
+
+    def put(self, key: UsageCacheKey, items: list[dict]):
+        self._remember(key, items)
+        self._persist(key, items)
+
+    def _remember(self, key: UsageCacheKey, items: list[dict]):
+        with self._lock:
+            self._entries[key] = items
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key: UsageCacheKey) -> str:
+        digest = hashlib.sha256(json.dumps(list(key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.persist_dir, f"{digest}.json")
+
+    def _persist(self, key: UsageCacheKey, items: list[dict]):
+        if not self.persist_dir:
+            return
+        try:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"key": list(key), "items": items}, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Unable to persist usage cache entry: {e}")
+
+    def _load(self, key: UsageCacheKey) -> Optional[list[dict]]:
+        if not self.persist_dir or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key)) as f:
+                data = json.load(f)
+            # JSON turns the group_by tuple into a list
+            if data["key"] != json.loads(json.dumps(list(key))):
+                return None
+            return data["items"]
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Unable to load usage cache entry: {e}")
+            return None
@@ -0,0 +1,76 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+
+Forecasts and anomaly scores over daily usage series. Every function takes a
+(groups x days) matrix with one row per cost dimension and works on all rows
+at once.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+WEEK_DAYS = 7
+
+
+class Baseline(NamedTuple):
+    mean: np.ndarray
+    std: np.ndarray
+
+
+def trailing_baseline(series: np.ndarray, window: int) -> Baseline:
+    """Mean and standard deviation of each row over its last window days"""
+    recent = series[:, -window:]
+    return Baseline(mean=recent.mean(axis=1), std=recent.std(axis=1))
+
+
+def z_scores(values: np.ndarray, baseline: Baseline) -> np.ndarray:
+    """
+    How many standard deviations each value lies from its baseline mean.
+    Rows with a flat baseline score 0 when the value matches it and an
+    infinite score of the right sign otherwise.
+    """
+    deviation = values - baseline.mean
+    flat = baseline.std == 0
+    return np.where(
+        flat,
+        np.where(deviation == 0, 0.0, np.copysign(np.inf, deviation)),
+        deviation / np.where(flat, 1.0, baseline.std),
+    )
+
+
+def linear_forecast(series: np.ndarray, horizon: int) -> np.ndarray:
+    """Extend each row's least-squares trend line over the next horizon days"""
+    days = series.shape[1]
+    x = np.arange(days, dtype=np.float64)
+    x_centered = x - x.mean()
+    y_mean = series.mean(axis=1, keepdims=True)
+    denominator = (x_centered**2).sum()
+    slope = (
+        ((series - y_mean) * x_centered).sum(axis=1, keepdims=True) / denominator
+        if denominator
+        else np.zeros_like(y_mean)
+    )
+    future = np.arange(days, days + horizon, dtype=np.float64) - x.mean()
+    return np.clip(y_mean + slope * future, 0, None)
+
+
+def seasonal_forecast(
+    series: np.ndarray, horizon: int, period: int = WEEK_DAYS
+) -> np.ndarray:
+    """
+    Forecast each future day as the row's average over the past days at the same
+    position in the period, e.g. the same weekday. Falls back to the linear
+    forecast for series shorter than one period.
+    """
+    days = series.shape[1]
+    if days < period:
+        return linear_forecast(series, horizon)
+    first_whole_day = days % period
+    whole = series[:, first_whole_day:]
+    profile = whole.reshape(series.shape[0], -1, period).mean(axis=1)
+    # whole starts a period before the first forecast day, so forecast day h
+    # falls on position h % period of the profile
+    return profile[:, np.arange(horizon) % period]
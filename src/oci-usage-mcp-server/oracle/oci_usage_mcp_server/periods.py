@@ -0,0 +1,69 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+
+class UsageWindow(NamedTuple):
+    start: datetime
+    end: datetime
+
+
+def parse_timestamp(timestamp) -> datetime:
+    """Parse an ISO 8601 timestamp (or datetime), treating naive values as UTC"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def start_of_day(timestamp: datetime) -> datetime:
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_day(timestamp: datetime) -> datetime:
+    return start_of_day(timestamp) + timedelta(days=1)
+
+
+def next_month(timestamp: datetime) -> datetime:
+    month_start = start_of_day(timestamp).replace(day=1)
+    if month_start.month == 12:
+        return month_start.replace(year=month_start.year + 1, month=1)
+    return month_start.replace(month=month_start.month + 1)
+
+
+def closed_until(now: datetime) -> datetime:
+    """Usage before the start of the current UTC day no longer changes"""
+    return start_of_day(now.astimezone(timezone.utc))
+
+
+def split_windows(
+    start: datetime, end: datetime, granularity: str, now: datetime
+) -> list[UsageWindow]:
+    """
+    Split [start, end) into windows that can be fetched independently.
+
+    MONTHLY queries are split on month boundaries. Finer granularities use a
+    whole-month window for each closed calendar month and day windows otherwise,
+    so the days of the open month can be cached one by one as they close.
+    """
+    closed = closed_until(now)
+    windows = []
+    cursor = start
+    while cursor < end:
+        month_end = next_month(cursor)
+        is_month_start = cursor == start_of_day(cursor).replace(day=1)
+        if granularity == "MONTHLY" or (
+            is_month_start and month_end <= min(end, closed)
+        ):
+            window_end = min(month_end, end)
+        else:
+            window_end = min(next_day(cursor), end)
+        windows.append(UsageWindow(cursor, window_end))
+        cursor = window_end
+    return windows
@@ -4,13 +4,42 @@ Licensed under the Universal Permissive License v1.0 as shown at
 https://oss.oracle.com/licenses/upl.
 """
 
+import json
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from logging import Logger
-from typing import Annotated
+from typing import Annotated, Optional
 
+import numpy as np
 import oci
 from fastmcp import FastMCP
 from oci.usage_api.models import RequestSummarizedUsagesDetails
+from oracle.oci_usage_mcp_server.cache import UsageCache, UsageCacheKey
+from oracle.oci_usage_mcp_server.forecast import (
+    linear_forecast,
+    seasonal_forecast,
+    trailing_baseline,
+    z_scores,
+)
+from oracle.oci_usage_mcp_server.periods import (
+    UsageWindow,
+    closed_until,
+    next_day,
+    next_month,
+    parse_timestamp,
+    split_windows,
+    start_of_day,
+)
+from oracle.oci_usage_mcp_server.store import (
+    METRICS,
+    UsageDatasetKey,
+    UsageStore,
+    from_epoch_day,
+    to_epoch_day,
+)
 
 from . import __project__, __version__
 
@@ -18,6 +47,53 @@ logger = Logger(__name__, level="INFO")
 
 mcp = FastMCP(name=__project__)
 
+MAX_CONCURRENT_REQUESTS = 8
+MAX_RETRIES = 6
+BACKOFF_BASE_SECONDS = 0.5
+# Additive amounts, summed when per-window totals are merged into range totals
+SUMMED_FIELDS = (
+    "computed_amount",
+    "computed_quantity",
+    "attributed_cost",
+    "attributed_usage",
+    "overage",
+)
+TIME_FIELDS = ("time_usage_started", "time_usage_ended")
+# UsageSummary fields holding each group_by dimension
+GROUP_BY_FIELDS = {
+    "tagNamespace": "tags",
+    "tagKey": "tags",
+    "tagValue": "tags",
+    "service": "service",
+    "skuName": "sku_name",
+    "skuPartNumber": "sku_part_number",
+    "unit": "unit",
+    "compartmentName": "compartment_name",
+    "compartmentPath": "compartment_path",
+    "compartmentId": "compartment_id",
+    "platform": "platform",
+    "region": "region",
+    "logicalAd": "ad",
+    "resourceId": "resource_id",
+    "tenantId": "tenant_id",
+    "tenantName": "tenant_name",
+}
+TAG_FIELDS = {"tagNamespace": "namespace", "tagKey": "key", "tagValue": "value"}
+# Dimensions of the local usage store. Grouping by tags returns one row per
+# tag, so tagged usage is kept in a table of its own to avoid double counting
+STORE_DIMENSIONS = ("service", "skuName", "compartmentName", "region")
+TAG_STORE_DIMENSIONS = (
+    "service",
+    "compartmentName",
+    "tagNamespace",
+    "tagKey",
+    "tagValue",
+)
+
+# Set OCI_USAGE_CACHE_DIR to persist closed usage windows across restarts
+usage_cache = UsageCache(persist_dir=os.getenv("OCI_USAGE_CACHE_DIR"))
+usage_store = UsageStore(persist_dir=os.getenv("OCI_USAGE_CACHE_DIR"))
+
 
 def get_usage_client():
     logger.info("entering get_monitoring_client")
@@ -36,6 +112,236 @@ def get_usage_client():
     return oci.usage_api.UsageapiClient(config, signer=signer)
 
 
+def call_with_backoff(operation, *args, **kwargs):
+    """Call an OCI operation, retrying with exponential backoff when throttled (429)"""
+    for attempt in range(MAX_RETRIES):
+        try:
+            return operation(*args, **kwargs)
+        except oci.exceptions.ServiceError as e:
+            if e.status != 429 or attempt == MAX_RETRIES - 1:
+                raise
+            delay = BACKOFF_BASE_SECONDS * (2**attempt)
+            time.sleep(delay + random.uniform(0, delay))
+
+
+def request_all_summarized_usages(
+    usage_client, details: RequestSummarizedUsagesDetails
+) -> list[dict]:
+    """Request summarized usages, following opc-next-page until the last page"""
+    items = []
+    has_next_page = True
+    next_page = None
+    while has_next_page:
+        response = call_with_backoff(
+            usage_client.request_summarized_usages,
+            request_summarized_usages_details=details,
+            page=next_page,
+        )
+        # Convert UsageSummary objects to dictionaries for proper serialization
+        items.extend(oci.util.to_dict(item) for item in response.data.items)
+        has_next_page = response.has_next_page
+        next_page = response.next_page if hasattr(response, "next_page") else None
+    return items
+
+
+def add_amounts(total, value):
+    """Sum two amounts, keeping the API's decimal strings as strings"""
+    if value is None:
+        return total
+    if total is None:
+        return value
+    result = float(total) + float(value)
+    return str(result) if isinstance(total, str) else result
+
+
+def merge_aggregated_usages(
+    items: list[dict], group_by: list[str], start: datetime, end: datetime
+) -> list[dict]:
+    """Add up the per-window totals of each group into totals for the whole range"""
+    key_fields = sorted(
+        {GROUP_BY_FIELDS.get(name, name) for name in group_by} | {"currency", "unit"}
+    )
+    merged: dict[str, dict] = {}
+    for item in items:
+        group_key = json.dumps(
+            [item.get(field) for field in key_fields], sort_keys=True, default=str
+        )
+        total = merged.get(group_key)
+        if total is None:
+            merged[group_key] = dict(
+                item,
+                time_usage_started=start.isoformat(),
+                time_usage_ended=end.isoformat(),
+            )
+            continue
+        for field, value in item.items():
+            if field in SUMMED_FIELDS:
+                total[field] = add_amounts(total.get(field), value)
+            elif field not in key_fields and field not in TIME_FIELDS:
+                # Rates and other per-window values only hold for the range if
+                # every window agrees on them
+                if total.get(field) != value:
+                    total[field] = None
+    return list(merged.values())
+
+
+def fetch_summarized_usages(
+    usage_client,
+    tenant_id: str,
+    start: datetime,
+    end: datetime,
+    group_by: list[str],
+    compartment_depth: float,
+    granularity: str,
+    query_type: str,
+    is_aggregate_by_time: bool,
+    use_cache: bool = True,
+) -> list[dict]:
+    """
+    Fetch summarized usages for [start, end) as independent windows queried
+    concurrently. With use_cache, closed windows are served from and added to
+    the usage cache
+    """
+    now = datetime.now(timezone.utc)
+    closed = closed_until(now)
+    windows = split_windows(start, end, granularity, now)
+
+    def cache_key(window: UsageWindow) -> UsageCacheKey:
+        return UsageCacheKey(
+            tenant_id=tenant_id,
+            query_type=query_type,
+            granularity=granularity,
+            group_by=tuple(group_by),
+            compartment_depth=compartment_depth,
+            is_aggregate_by_time=is_aggregate_by_time,
+            window_start=window.start.isoformat(),
+            window_end=window.end.isoformat(),
+        )
+
+    def fetch_window(window: UsageWindow) -> list[dict]:
+        is_closed = window.end <= closed
+        if use_cache and is_closed:
+            cached = usage_cache.get(cache_key(window))
+            if cached is not None:
+                return cached
+        items = request_all_summarized_usages(
+            usage_client,
+            RequestSummarizedUsagesDetails(
+                tenant_id=tenant_id,
+                time_usage_started=window.start,
+                time_usage_ended=window.end,
+                granularity=granularity,
+                is_aggregate_by_time=is_aggregate_by_time,
+                query_type=query_type,
+                group_by=group_by,
+                compartment_depth=compartment_depth,
+            ),
+        )
+        if use_cache and is_closed:
+            usage_cache.put(cache_key(window), items)
+        return items
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(len(windows), MAX_CONCURRENT_REQUESTS))
+    ) as executor:
+        items = [
+            item for window in executor.map(fetch_window, windows) for item in window
+        ]
+
+    if is_aggregate_by_time and len(windows) > 1:
+        items = merge_aggregated_usages(items, group_by, start, end)
+    return items
+
+
+def dimension_value(item: dict, dimension: str) -> Optional[str]:
+    if dimension in TAG_FIELDS:
+        tags = item.get("tags") or []
+        return tags[0].get(TAG_FIELDS[dimension]) if tags else None
+    return item.get(GROUP_BY_FIELDS.get(dimension, dimension))
+
+
+def day_range(start: datetime, end: datetime) -> tuple[int, int]:
+    """The epoch days [first_day, end_day) touched by [start, end)"""
+    end_day = to_epoch_day(end)
+    if end > from_epoch_day(end_day):
+        end_day += 1
+    return to_epoch_day(start), end_day
+
+
+def usage_dataset_key(
+    tenant_id: str,
+    query_type: str,
+    group_by: list[str],
+    filters: Optional[dict[str, list[str]]],
+    compartment_depth: Optional[float],
+) -> UsageDatasetKey:
+    """The usage store table holding the dimensions a query groups or filters by"""
+    dimensions = set(group_by) | set(filters or {})
+    return UsageDatasetKey(
+        tenant_id=tenant_id,
+        query_type=query_type,
+        dimensions=(
+            TAG_STORE_DIMENSIONS if dimensions & set(TAG_FIELDS) else STORE_DIMENSIONS
+        ),
+        compartment_depth=compartment_depth,
+    )
+
+
+def load_usage_store(
+    client_factory, key: UsageDatasetKey, start: datetime, end: datetime
+) -> int:
+    """
+    Load the daily usage of the days in [start, end) that the store does not
+    cover yet. Returns the number of days requested from the Usage API.
+    """
+    first_day, end_day = day_range(start, end)
+    closed_day = to_epoch_day(closed_until(datetime.now(timezone.utc)))
+    table = usage_store.table(key)
+    missing = table.missing_ranges(first_day, end_day)
+    usage_client = client_factory() if missing else None
+    for range_start, range_end in missing:
+        items = fetch_summarized_usages(
+            usage_client,
+            tenant_id=key.tenant_id,
+            start=from_epoch_day(range_start),
+            end=from_epoch_day(range_end),
+            group_by=list(key.dimensions),
+            compartment_depth=key.compartment_depth,
+            granularity="DAILY",
+            query_type=key.query_type,
+            is_aggregate_by_time=False,
+            # The store keeps the days it loads, caching the windows too would
+            # hold the same usage twice
+            use_cache=False,
+        )
+        table.replace_days(
+            range_start,
+            range_end,
+            days=np.array(
+                [
+                    to_epoch_day(parse_timestamp(item["time_usage_started"]))
+                    for item in items
+                ],
+                dtype=np.int32,
+            ),
+            metrics={
+                name: np.array(
+                    [float(item.get(name) or 0) for item in items], dtype=np.float64
+                )
+                for name in METRICS
+            },
+            values={
+                dimension: [dimension_value(item, dimension) for item in items]
+                for dimension in key.dimensions
+            },
+        )
+        # Days that are not over yet are requested again on every query
+        table.covered.update(range(range_start, min(range_end, closed_day)))
+    if missing:
+        usage_store.save(key)
+    return sum(range_end - range_start for range_start, range_end in missing)
+
+
 @mcp.tool
 def get_summarized_usage(
     tenant_id: Annotated[str, "Tenancy OCID"],
@@ -71,27 +377,255 @@ def get_summarized_usage(
         "Specifies whether aggregated by time. If isAggregateByTime is true,"
         "all usage or cost over the query time period will be added up.",
     ] = False,
+    use_cache: Annotated[
+        bool,
+        "Whether to serve days and months that are already over from the local "
+        "usage cache and only query the Usage API for the rest. Default: True",
+    ] = True,
 ) -> list[dict]:
-    usage_client = get_usage_client()
-    summarized_details = RequestSummarizedUsagesDetails(
+    """
+    Long ranges are split into day and month windows that are fetched
+    concurrently with every page of results; closed windows are cached
+    """
+    return fetch_summarized_usages(
+        get_usage_client(),
         tenant_id=tenant_id,
-        time_usage_started=start_time,
-        time_usage_ended=end_time,
-        granularity=granularity,
-        is_aggregate_by_time=is_aggregate_by_time,
-        query_type=query_type,
+        start=parse_timestamp(start_time),
+        end=parse_timestamp(end_time),
         group_by=group_by,
         compartment_depth=compartment_depth,
+        granularity=granularity,
+        query_type=query_type,
+        is_aggregate_by_time=is_aggregate_by_time,
+        use_cache=use_cache,
     )
 
-    response = usage_client.request_summarized_usages(
-        request_summarized_usages_details=summarized_details
-    )
-    # Convert UsageSummary objects to dictionaries for proper serialization
-    summarized_usages = [
-        oci.util.to_dict(usage_summary) for usage_summary in response.data.items
+
+@mcp.tool
+def query_usage_store(
+    tenant_id: Annotated[str, "Tenancy OCID"],
+    start_time: Annotated[str, "Start of the period, as an ISO 8601 UTC date"],
+    end_time: Annotated[str, "End of the period (exclusive), as an ISO 8601 UTC date"],
+    group_by: Annotated[
+        list[str],
+        "Dimensions to group by, any of “service”, “skuName”, “compartmentName”, "
+        "“region”, “tagNamespace”, “tagKey”, “tagValue” and “day”. "
+        "Tag dimensions can be combined with “service” and “compartmentName” only",
+    ],
+    filters: Annotated[
+        Optional[dict[str, list[str]]],
+        "Only count usage whose dimension has one of the listed values, "
+        'e.g. {"service": ["Compute", "Block Storage"]}',
+    ] = None,
+    top_n: Annotated[
+        Optional[int], "Only return this many groups with the largest totals"
+    ] = None,
+    metric: Annotated[
+        str, 'Metric to add up: "computed_amount" or "computed_quantity"'
+    ] = "computed_amount",
+    query_type: Annotated[
+        str,
+        'Allowed values are: "USAGE", "COST", "CREDIT", "EXPIREDCREDIT", "ALLCREDIT", "OVERAGE"'
+        'Default: "COST"',
+    ] = "COST",
+    compartment_depth: Annotated[
+        Optional[float], "The compartment depth level."
+    ] = None,
+) -> dict:
+    """
+    Group, filter and rank usage from a local columnar store of daily usage.
+    Days the store does not hold yet are loaded from the Usage API first, so
+    regrouping a period that was already queried needs no API call.
+    """
+    key = usage_dataset_key(tenant_id, query_type, group_by, filters, compartment_depth)
+    start = parse_timestamp(start_time)
+    end = parse_timestamp(end_time)
+    with usage_store.lock(key):
+        usage_store.table(key).validate(group_by, filters, metric)
+        loaded_days = load_usage_store(get_usage_client, key, start, end)
+        result = usage_store.table(key).aggregate(
+            *day_range(start, end),
+            group_by=group_by,
+            filters=filters,
+            metric=metric,
+            top_n=top_n,
+        )
+    return dict(result, loaded_days=loaded_days)
+
+
+@mcp.tool
+def forecast_month_end_usage(
+    tenant_id: Annotated[str, "Tenancy OCID"],
+    group_by: Annotated[
+        list[str],
+        "Dimensions to forecast separately, any of “service”, “skuName”, "
+        "“compartmentName”, “region”, “tagNamespace”, “tagKey” and “tagValue”",
+    ] = ["service"],
+    method: Annotated[
+        str,
+        'Forecast method: "linear" extends the trend of the history, "seasonal" '
+        'repeats its average weekly pattern. Default: "linear"',
+    ] = "linear",
+    history_days: Annotated[
+        int, "Number of closed days before today the forecast is based on"
+    ] = 28,
+    filters: Annotated[
+        Optional[dict[str, list[str]]],
+        "Only count usage whose dimension has one of the listed values",
+    ] = None,
+    top_n: Annotated[
+        Optional[int], "Only return this many groups with the largest projections"
+    ] = None,
+    metric: Annotated[
+        str, 'Metric to forecast: "computed_amount" or "computed_quantity"'
+    ] = "computed_amount",
+    query_type: Annotated[
+        str,
+        'Allowed values are: "USAGE", "COST", "CREDIT", "EXPIREDCREDIT", "ALLCREDIT", "OVERAGE"'
+        'Default: "COST"',
+    ] = "COST",
+    compartment_depth: Annotated[
+        Optional[float], "The compartment depth level."
+    ] = None,
+) -> dict:
+    """
+    Project the current month's total per group as its usage of the closed days
+    so far plus a forecast for the rest of the month, computed locally over the
+    daily usage in the usage store
+    """
+    forecasters = {"linear": linear_forecast, "seasonal": seasonal_forecast}
+    if method not in forecasters:
+        raise ValueError(
+            f"Unknown method {method!r}, expected one of {list(forecasters)}"
+        )
+    if history_days < 2:
+        raise ValueError("history_days must be at least 2")
+
+    today = closed_until(datetime.now(timezone.utc))
+    month_start = today.replace(day=1)
+    month_end = next_month(today)
+    history_start = min(month_start, today - timedelta(days=history_days))
+    key = usage_dataset_key(tenant_id, query_type, group_by, filters, compartment_depth)
+    with usage_store.lock(key):
+        usage_store.table(key).validate(group_by, filters, metric)
+        # Today is not over, so only closed days are used
+        loaded_days = load_usage_store(get_usage_client, key, history_start, today)
+        labels, series = usage_store.table(key).daily_series(
+            *day_range(history_start, today),
+            group_by=group_by,
+            filters=filters,
+            metric=metric,
+        )
+
+    month_offset = (month_start - history_start).days
+    month_to_date = series[:, month_offset:].sum(axis=1)
+    remaining = forecasters[method](
+        series[:, -history_days:], (month_end - today).days
+    ).sum(axis=1)
+    projected = month_to_date + remaining
+    order = np.argsort(-projected, kind="stable")[:top_n]
+    return {
+        "month_start": month_start.isoformat(),
+        "month_end": month_end.isoformat(),
+        "method": method,
+        "month_to_date_total": float(month_to_date.sum()),
+        "projected_total": float(projected.sum()),
+        "group_count": len(labels),
+        "groups": [
+            dict(
+                labels[index],
+                month_to_date=float(month_to_date[index]),
+                forecast_remaining=float(remaining[index]),
+                projected_month_end=float(projected[index]),
+            )
+            for index in order
+        ],
+        "loaded_days": loaded_days,
+    }
+
+
+@mcp.tool
+def detect_usage_anomalies(
+    tenant_id: Annotated[str, "Tenancy OCID"],
+    group_by: Annotated[
+        list[str],
+        "Dimensions to score separately, any of “service”, “skuName”, "
+        "“compartmentName”, “region”, “tagNamespace”, “tagKey” and “tagValue”",
+    ] = ["service", "compartmentName"],
+    day: Annotated[
+        Optional[str], "UTC date to check, as an ISO 8601 date. Default: yesterday"
+    ] = None,
+    baseline_days: Annotated[
+        int, "Number of days before the checked day that form the baseline"
+    ] = 14,
+    threshold: Annotated[
+        float, "Report groups whose z-score is at least this far from zero"
+    ] = 3.0,
+    filters: Annotated[
+        Optional[dict[str, list[str]]],
+        "Only count usage whose dimension has one of the listed values",
+    ] = None,
+    metric: Annotated[
+        str, 'Metric to score: "computed_amount" or "computed_quantity"'
+    ] = "computed_amount",
+    query_type: Annotated[
+        str,
+        'Allowed values are: "USAGE", "COST", "CREDIT", "EXPIREDCREDIT", "ALLCREDIT", "OVERAGE"'
+        'Default: "COST"',
+    ] = "COST",
+    compartment_depth: Annotated[
+        Optional[float], "The compartment depth level."
+    ] = None,
+) -> dict:
+    """
+    Find the groups whose usage on a day deviates from the mean of the days
+    before it by at least threshold standard deviations, strongest first.
+    The z-score is null when the baseline is flat and the day differs from it.
+    """
+    if baseline_days < 2:
+        raise ValueError("baseline_days must be at least 2")
+    today = closed_until(datetime.now(timezone.utc))
+    checked = start_of_day(parse_timestamp(day)) if day else today - timedelta(days=1)
+    baseline_start = checked - timedelta(days=baseline_days)
+    key = usage_dataset_key(tenant_id, query_type, group_by, filters, compartment_depth)
+    with usage_store.lock(key):
+        usage_store.table(key).validate(group_by, filters, metric)
+        loaded_days = load_usage_store(
+            get_usage_client, key, baseline_start, next_day(checked)
+        )
+        labels, series = usage_store.table(key).daily_series(
+            *day_range(baseline_start, next_day(checked)),
+            group_by=group_by,
+            filters=filters,
+            metric=metric,
+        )
+
+    baseline = trailing_baseline(series[:, :-1], baseline_days)
+    values = series[:, -1]
+    scores = z_scores(values, baseline)
+    anomalous = np.flatnonzero(np.abs(scores) >= threshold)
+    order = anomalous[
+        np.lexsort(
+            (-np.abs(values - baseline.mean)[anomalous], -np.abs(scores[anomalous]))
+        )
     ]
-    return summarized_usages
+    return {
+        "day": checked.date().isoformat(),
+        "baseline_days": baseline_days,
+        "group_count": len(labels),
+        "anomalies": [
+            dict(
+                labels[index],
+                value=float(values[index]),
+                baseline_mean=float(baseline.mean[index]),
+                baseline_std=float(baseline.std[index]),
+                z_score=(float(scores[index]) if np.isfinite(scores[index]) else None),
+                direction="spike" if values[index] > baseline.mean[index] else "drop",
+            )
+            for index in order
+        ],
+        "loaded_days": loaded_days,
+    }
 
 
 def main():
@@ -0,0 +1,312 @@
+"""
+Copyright (c) 2025, Oracle and/or its affiliates.
+Licensed under the Universal Permissive License v1.0 as shown at
+https://oss.oracle.com/licenses/upl.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from logging import Logger
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+logger = Logger(__name__, level="INFO")
+
+EPOCH = date(1970, 1, 1)
+METRICS = ("computed_amount", "computed_quantity")
+# Pseudo-dimension holding the usage day, for grouping by day
+DAY_DIMENSION = "day"
+
+
+def to_epoch_day(timestamp: datetime) -> int:
+    return (timestamp.astimezone(timezone.utc).date() - EPOCH).days
+
+
+def from_epoch_day(day: int) -> datetime:
+    return datetime.combine(
+        EPOCH + timedelta(days=int(day)), datetime.min.time(), tzinfo=timezone.utc
+    )
+
+
+class UsageDatasetKey(NamedTuple):
+    tenant_id: str
+    query_type: str
+    dimensions: tuple[str, ...]
+    compartment_depth: Optional[float]
+
+
+class UsageTable:
+    """
+    Daily usage rows held column by column: the usage day as an epoch day, the
+    metrics as floats and every dimension as integer codes into a vocabulary,
+    so filters, group-bys and rankings run as vectorized NumPy operations
+    """
+
+    def __init__(self, dimensions: tuple[str, ...]):
+        self.dimensions = dimensions
+        self.days = np.empty(0, dtype=np.int32)
+        self.metrics = {name: np.empty(0, dtype=np.float64) for name in METRICS}
+        self.codes = {name: np.empty(0, dtype=np.int32) for name in dimensions}
+        self.vocabularies: dict[str, list[str]] = {name: [] for name in dimensions}
+        self._lookup: dict[str, dict[str, int]] = {name: {} for name in dimensions}
+        # Closed days whose rows are all loaded
+        self.covered: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def encode(self, dimension: str, values: list[Optional[str]]) -> np.ndarray:
+        lookup = self._lookup[dimension]
+        vocabulary = self.vocabularies[dimension]
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            value = "" if value is None else str(value)
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(vocabulary)
+                vocabulary.append(value)
+            codes[i] = code
+        return codes
+
+    def replace_days(
+        self,
+        first_day: int,
+        end_day: int,
+        days: np.ndarray,
+        metrics: dict[str, np.ndarray],
+        values: dict[str, list[Optional[str]]],
+    ):
+        """Replace the rows of the days in [first_day, end_day) with new rows"""
+        keep = (self.days < first_day) | (self.days >= end_day)
+        self.days = np.concatenate([self.days[keep], days.astype(np.int32)])
+        for name in METRICS:
+            self.metrics[name] = np.concatenate(
+                [self.metrics[name][keep], metrics[name].astype(np.float64)]
+            )
+        for name in self.dimensions:
+            self.codes[name] = np.concatenate(
+                [self.codes[name][keep], self.encode(name, values[name])]
+            )
+
+    def missing_ranges(self, first_day: int, end_day: int) -> list[tuple[int, int]]:
+        """The runs of days in [first_day, end_day) that are not covered yet"""
+        ranges = []
+        for day in range(first_day, end_day):
+            if day in self.covered:
+                continue
+            if ranges and ranges[-1][1] == day:
+                ranges[-1] = (ranges[-1][0], day + 1)
+            else:
+                ranges.append((day, day + 1))
+        return ranges
+
+    def select(
+        self, first_day: int, end_day: int, filters: Optional[dict[str, list[str]]]
+    ) -> np.ndarray:
+        """Boolean mask of the rows in [first_day, end_day) matching every filter"""
+        mask = (self.days >= first_day) & (self.days < end_day)
+        for dimension, accepted in (filters or {}).items():
+            if dimension == DAY_DIMENSION:
+                accepted_days = [
+                    to_epoch_day(datetime.fromisoformat(d)) for d in accepted
+                ]
+                mask &= np.isin(self.days, accepted_days)
+                continue
+            lookup = self._lookup[dimension]
+            accepted_codes = [lookup[v] for v in accepted if v in lookup]
+            mask &= np.isin(self.codes[dimension], accepted_codes)
+        return mask
+
+    def column(self, dimension: str) -> np.ndarray:
+        if dimension == DAY_DIMENSION:
+            return self.days
+        return self.codes[dimension]
+
+    def label(self, dimension: str, code: int) -> Optional[str]:
+        if dimension == DAY_DIMENSION:
+            return from_epoch_day(code).date().isoformat()
+        return self.vocabularies[dimension][code] or None
+
+    def validate(
+        self,
+        group_by: list[str],
+        filters: Optional[dict[str, list[str]]] = None,
+        metric: str = "computed_amount",
+    ):
+        for dimension in list(group_by) + list(filters or {}):
+            if dimension != DAY_DIMENSION and dimension not in self.codes:
+                raise ValueError(
+                    f"Unknown dimension {dimension!r}, expected one of "
+                    f"{[DAY_DIMENSION, *self.dimensions]}"
+                )
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {METRICS}")
+
+    def aggregate(
+        self,
+        first_day: int,
+        end_day: int,
+        group_by: list[str],
+        filters: Optional[dict[str, list[str]]] = None,
+        metric: str = "computed_amount",
+        top_n: Optional[int] = None,
+    ) -> dict:
+        """
+        Sum the metric over the matching rows of [first_day, end_day) for each
+        combination of the group_by dimensions, largest first
+        """
+        self.validate(group_by, filters, metric)
+        mask = self.select(first_day, end_day, filters)
+        weights = self.metrics[metric][mask]
+        total = float(weights.sum())
+        if not group_by:
+            return {"total": total, "group_count": 1, "groups": [{metric: total}]}
+
+        keys = np.stack([self.column(d)[mask] for d in group_by], axis=1)
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=weights, minlength=len(unique_keys))
+        order = np.argsort(-sums, kind="stable")
+        if top_n is not None:
+            order = order[:top_n]
+        groups = []
+        for index in order:
+            group = {
+                dimension: self.label(dimension, unique_keys[index, i])
+                for i, dimension in enumerate(group_by)
+            }
+            group[metric] = float(sums[index])
+            groups.append(group)
+        return {"total": total, "group_count": len(unique_keys), "groups": groups}
+
+    def daily_series(
+        self,
+        first_day: int,
+        end_day: int,
+        group_by: list[str],
+        filters: Optional[dict[str, list[str]]] = None,
+        metric: str = "computed_amount",
+    ) -> tuple[list[dict], np.ndarray]:
+        """
+        The metric per day of [first_day, end_day) for each combination of the
+        group_by dimensions, as the group labels and a (groups x days) matrix
+        """
+        self.validate(group_by, filters, metric)
+        mask = self.select(first_day, end_day, filters)
+        day_count = end_day - first_day
+        if group_by:
+            keys = np.stack([self.column(d)[mask] for d in group_by], axis=1)
+            unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+            inverse = inverse.ravel()
+        else:
+            unique_keys = np.empty((1, 0), dtype=np.int32)
+            inverse = np.zeros(int(mask.sum()), dtype=np.intp)
+        cells = inverse * day_count + (self.days[mask] - first_day)
+        series = np.bincount(
+            cells,
+            weights=self.metrics[metric][mask],
+            minlength=len(unique_keys) * day_count,
+        ).reshape(len(unique_keys), day_count)
+        labels = [
+            {
+                dimension: self.label(dimension, key[i])
+                for i, dimension in enumerate(group_by)
+            }
+            for key in unique_keys
+        ]
+        return labels, series
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        arrays = {
+            "days": self.days,
+            "covered": np.array(sorted(self.covered), dtype=np.int32),
+        }
+        for name in METRICS:
+            arrays[f"metric_{name}"] = self.metrics[name]
+        for name in self.dimensions:
+            arrays[f"codes_{name}"] = self.codes[name]
+            arrays[f"vocabulary_{name}"] = np.array(self.vocabularies[name], dtype=str)
+        return arrays
+
+    @classmethod
+    def from_arrays(
+        cls, dimensions: tuple[str, ...], arrays: dict[str, np.ndarray]
+    ) -> "UsageTable":
+        table = cls(dimensions)
+        table.days = arrays["days"].astype(np.int32)
+        table.covered = set(int(day) for day in arrays["covered"])
+        for name in METRICS:
+            table.metrics[name] = arrays[f"metric_{name}"].astype(np.float64)
+        for name in dimensions:
+            table.codes[name] = arrays[f"codes_{name}"].astype(np.int32)
+            table.vocabularies[name] = [str(v) for v in arrays[f"vocabulary_{name}"]]
+            table._lookup[name] = {
+                value: code for code, value in enumerate(table.vocabularies[name])
+            }
+        return table
+
+
+class UsageStore:
+    """
+    Columnar daily usage tables, one per tenancy, query type and set of
+    dimensions. Tables are kept in memory and, when persist_dir is set, saved
+    to and lazily loaded from one .npz file per table.
+    """
+
+    def __init__(self, persist_dir: Optional[str] = None):
+        self.persist_dir = persist_dir
+        self._tables: dict[UsageDatasetKey, UsageTable] = {}
+        self._locks: dict[UsageDatasetKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self._locks.clear()
+
+    def lock(self, key: UsageDatasetKey) -> threading.Lock:
+        """The lock serializing loads into and queries of one table"""
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def table(self, key: UsageDatasetKey) -> UsageTable:
+        with self._lock:
+            table = self._tables.get(key)
+        if table is None:
+            table = self._load(key) or UsageTable(key.dimensions)
+            with self._lock:
+                table = self._tables.setdefault(key, table)
+        return table
+
+    def save(self, key: UsageDatasetKey):
+        if not self.persist_dir:
+            return
+        table = self.table(key)
+        try:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            # np.savez appends .npz to names without it
+            tmp_path = self._path(key) + ".tmp.npz"
+            np.savez(tmp_path, key=np.array(json.dumps(list(key))), **table.to_arrays())
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Unable to persist usage store table: {e}")
+
+    def _path(self, key: UsageDatasetKey) -> str:
+        digest = hashlib.sha256(json.dumps(list(key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.persist_dir, f"{digest}.npz")
+
+    def _load(self, key: UsageDatasetKey) -> Optional[UsageTable]:
+        if not self.persist_dir or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with np.load(self._path(key)) as data:
+                # JSON turns the dimensions tuple into a list
+                if str(data["key"]) != json.dumps(list(key)):
+                    return None
+                return UsageTable.from_arrays(key.dimensions, dict(data))
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Unable to load usage store table: {e}")
+            return None
@@ -4,12 +4,53 @@ Licensed under the Universal Permissive License v1.0 as shown at
 https://oss.oracle.com/licenses/upl.
 """
 
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, create_autospec, patch
 
+import numpy as np
 import oci
 import pytest
 from fastmcp import Client
-from oracle.oci_usage_mcp_server.server import mcp
+from oracle.oci_usage_mcp_server.cache import UsageCache, UsageCacheKey
+from oracle.oci_usage_mcp_server.forecast import (
+    linear_forecast,
+    seasonal_forecast,
+    trailing_baseline,
+    z_scores,
+)
+from oracle.oci_usage_mcp_server.periods import (
+    next_month,
+    split_windows,
+    start_of_day,
+)
+from oracle.oci_usage_mcp_server.server import (
+    mcp,
+    merge_aggregated_usages,
+    usage_cache,
+    usage_store,
+)
+from oracle.oci_usage_mcp_server.store import UsageDatasetKey, UsageStore
+
+
+@pytest.fixture(autouse=True)
+def isolate_usage_cache(tmp_path):
+    usage_cache.clear()
+    usage_cache.persist_dir = str(tmp_path)
+    usage_store.clear()
+    usage_store.persist_dir = str(tmp_path)
+    yield
+    usage_cache.clear()
+    usage_cache.persist_dir = None
+    usage_store.clear()
+    usage_store.persist_dir = None
+
+
+def usage_response(items, next_page=None):
+    response = create_autospec(oci.response.Response)
+    response.data = oci.usage_api.models.UsageAggregation(items=items)
+    response.has_next_page = next_page is not None
+    response.next_page = next_page
+    return response
 
 
 class TestUsageTools:
@@ -31,6 +72,7 @@ class TestUsageTools:
                 )
             ]
         )
+        mock_request_summarized_response.has_next_page = False
 
         mock_client.request_summarized_usages.return_value = (
             mock_request_summarized_response
@@ -54,3 +96,326 @@ class TestUsageTools:
             assert result[0]["compartment_id"] == "test_compartment_id"
             assert result[0]["service"] == "Database"
             assert result[0]["computed_amount"] == 6.731118997232
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_usage_mcp_server.server.get_usage_client")
+    async def test_get_summarized_usage_follows_pages_and_caches(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        def request_summarized_usages(request_summarized_usages_details, page):
+            day = request_summarized_usages_details.time_usage_started.isoformat()
+            if page is None:
+                return usage_response(
+                    [
+                        oci.usage_api.models.UsageSummary(
+                            service="Compute", time_usage_started=day
+                        )
+                    ],
+                    next_page="page2",
+                )
+            return usage_response(
+                [
+                    oci.usage_api.models.UsageSummary(
+                        service="Database", time_usage_started=day
+                    )
+                ]
+            )
+
+        mock_client.request_summarized_usages.side_effect = request_summarized_usages
+        today = start_of_day(datetime.now(timezone.utc))
+        arguments = {
+            "tenant_id": "test_tenant_id",
+            "start_time": (today - timedelta(days=2)).isoformat(),
+            "end_time": (today + timedelta(days=1)).isoformat(),
+            "group_by": ["service"],
+            "compartment_depth": 1.0,
+        }
+
+        async with Client(mcp) as client:
+            first = (
+                await client.call_tool("get_summarized_usage", arguments)
+            ).structured_content["result"]
+            # Every window has two pages
+            assert mock_client.request_summarized_usages.call_count == 6
+            assert len(first) == 6
+
+            mock_client.request_summarized_usages.reset_mock()
+            second = (
+                await client.call_tool("get_summarized_usage", arguments)
+            ).structured_content["result"]
+
+        # The two closed days come from the cache, only today is fetched again
+        assert mock_client.request_summarized_usages.call_count == 2
+        details = mock_client.request_summarized_usages.call_args.kwargs[
+            "request_summarized_usages_details"
+        ]
+        assert details.time_usage_started == today
+        assert second == first
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_usage_mcp_server.server.get_usage_client")
+    async def test_query_usage_store_regroups_locally(self, mock_get_client, tmp_path):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        def request_summarized_usages(request_summarized_usages_details, page):
+            day = request_summarized_usages_details.time_usage_started.isoformat()
+            return usage_response(
+                [
+                    oci.usage_api.models.UsageSummary(
+                        service=service,
+                        compartment_name=compartment,
+                        computed_amount=amount,
+                        time_usage_started=day,
+                    )
+                    for service, compartment, amount in [
+                        ("Compute", "prod", 10.0),
+                        ("Compute", "dev", 2.0),
+                        ("Database", "prod", 5.0),
+                    ]
+                ]
+            )
+
+        mock_client.request_summarized_usages.side_effect = request_summarized_usages
+        today = start_of_day(datetime.now(timezone.utc))
+        period = {
+            "tenant_id": "test_tenant_id",
+            "start_time": (today - timedelta(days=3)).isoformat(),
+            "end_time": today.isoformat(),
+        }
+
+        async with Client(mcp) as client:
+            by_service = (
+                await client.call_tool(
+                    "query_usage_store", dict(period, group_by=["service"], top_n=1)
+                )
+            ).structured_content
+            assert mock_client.request_summarized_usages.call_count == 3
+            details = mock_client.request_summarized_usages.call_args.kwargs[
+                "request_summarized_usages_details"
+            ]
+            assert details.granularity == "DAILY"
+
+            mock_client.request_summarized_usages.reset_mock()
+            by_compartment = (
+                await client.call_tool(
+                    "query_usage_store",
+                    dict(
+                        period,
+                        group_by=["compartmentName"],
+                        filters={"service": ["Compute"]},
+                    ),
+                )
+            ).structured_content
+
+        assert by_service["loaded_days"] == 3
+        # Loaded days are kept by the store alone, not also as cached windows
+        assert list(tmp_path.glob("*.json")) == []
+        assert by_service["total"] == 51.0
+        assert by_service["group_count"] == 2
+        assert by_service["groups"] == [{"service": "Compute", "computed_amount": 36.0}]
+        # The closed days are regrouped from the store without calling the API
+        mock_client.request_summarized_usages.assert_not_called()
+        assert by_compartment["loaded_days"] == 0
+        assert by_compartment["groups"] == [
+            {"compartmentName": "prod", "computed_amount": 30.0},
+            {"compartmentName": "dev", "computed_amount": 6.0},
+        ]
+
+    @pytest.mark.asyncio
+    @patch("oracle.oci_usage_mcp_server.server.get_usage_client")
+    async def test_forecast_and_anomalies_use_the_usage_store(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        today = start_of_day(datetime.now(timezone.utc))
+        yesterday = today - timedelta(days=1)
+
+        def request_summarized_usages(request_summarized_usages_details, page):
+            day = request_summarized_usages_details.time_usage_started
+            compute = 50.0 if day == yesterday else 10.0 + day.day % 2
+            return usage_response(
+                [
+                    oci.usage_api.models.UsageSummary(
+                        service=service,
+                        computed_amount=amount,
+                        time_usage_started=day.isoformat(),
+                    )
+                    for service, amount in [("Compute", compute), ("Database", 5.0)]
+                ]
+            )
+
+        mock_client.request_summarized_usages.side_effect = request_summarized_usages
+
+        async with Client(mcp) as client:
+            anomalies = (
+                await client.call_tool(
+                    "detect_usage_anomalies",
+                    {"tenant_id": "test_tenant_id", "group_by": ["service"]},
+                )
+            ).structured_content
+            forecast = (
+                await client.call_tool(
+                    "forecast_month_end_usage",
+                    {
+                        "tenant_id": "test_tenant_id",
+                        "filters": {"service": ["Database"]},
+                        "history_days": 7,
+                    },
+                )
+            ).structured_content
+
+        assert anomalies["day"] == yesterday.date().isoformat()
+        assert [a["service"] for a in anomalies["anomalies"]] == ["Compute"]
+        assert anomalies["anomalies"][0]["direction"] == "spike"
+        assert anomalies["anomalies"][0]["z_score"] > 3
+        days_in_month = (next_month(today) - today.replace(day=1)).days
+        assert forecast["groups"] == [
+            {
+                "service": "Database",
+                "month_to_date": 5.0 * (today.day - 1),
+                "forecast_remaining": 5.0 * (days_in_month - today.day + 1),
+                "projected_month_end": 5.0 * days_in_month,
+            }
+        ]
+        # Every day is requested once; today is never needed
+        requested = [
+            call.kwargs["request_summarized_usages_details"].time_usage_started
+            for call in mock_client.request_summarized_usages.call_args_list
+        ]
+        assert len(requested) == len(set(requested))
+        assert today not in requested
+
+
+class TestForecast:
+    def test_linear_forecast_extends_the_trend(self):
+        series = np.array([[1.0, 2.0, 3.0, 4.0], [4.0, 3.0, 2.0, 1.0]])
+
+        assert linear_forecast(series, 2).tolist() == [[5.0, 6.0], [0.0, 0.0]]
+
+    def test_seasonal_forecast_repeats_the_weekly_pattern(self):
+        week = np.arange(7.0)
+        series = np.concatenate([week[4:], week, week])[None, :]
+
+        assert seasonal_forecast(series, 3).tolist() == [[0.0, 1.0, 2.0]]
+
+    def test_z_scores_of_flat_baselines(self):
+        baseline = trailing_baseline(np.array([[1.0, 3.0], [2.0, 2.0], [2.0, 2.0]]), 2)
+
+        scores = z_scores(np.array([4.0, 2.0, 1.0]), baseline)
+
+        assert scores.tolist() == [2.0, 0.0, -np.inf]
+
+
+class TestUsageStore:
+    def test_tables_are_persisted_and_reloaded(self, tmp_path):
+        key = UsageDatasetKey("tenant", "COST", ("service",), None)
+        store = UsageStore(persist_dir=str(tmp_path))
+        table = store.table(key)
+        table.replace_days(
+            100,
+            102,
+            days=np.array([100, 101, 101]),
+            metrics={
+                "computed_amount": np.array([1.0, 2.0, 4.0]),
+                "computed_quantity": np.array([0.0, 0.0, 0.0]),
+            },
+            values={"service": ["Compute", "Compute", None]},
+        )
+        table.covered.update({100, 101})
+        store.save(key)
+
+        reloaded = UsageStore(persist_dir=str(tmp_path)).table(key)
+
+        assert reloaded.missing_ranges(99, 103) == [(99, 100), (102, 103)]
+        assert reloaded.aggregate(100, 102, ["day", "service"])["groups"] == [
+            {"day": "1970-04-12", "service": None, "computed_amount": 4.0},
+            {"day": "1970-04-12", "service": "Compute", "computed_amount": 2.0},
+            {"day": "1970-04-11", "service": "Compute", "computed_amount": 1.0},
+        ]
+
+
+class TestUsageCache:
+    def test_least_recently_used_windows_are_evicted(self):
+        cache = UsageCache(max_entries=2)
+        keys = [
+            UsageCacheKey("t", "COST", "DAILY", (), None, False, f"{day}", "")
+            for day in range(3)
+        ]
+        cache.put(keys[0], [{"day": 0}])
+        cache.put(keys[1], [{"day": 1}])
+        assert cache.get(keys[0]) == [{"day": 0}]
+        cache.put(keys[2], [{"day": 2}])
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == [{"day": 0}]
+        assert cache.get(keys[2]) == [{"day": 2}]
+
+
+class TestUsageWindows:
+    def test_closed_months_are_fetched_whole_and_the_open_month_by_day(self):
+        now = datetime(2025, 3, 3, 12, tzinfo=timezone.utc)
+        windows = split_windows(
+            datetime(2025, 1, 15, tzinfo=timezone.utc),
+            datetime(2025, 3, 4, tzinfo=timezone.utc),
+            "DAILY",
+            now,
+        )
+
+        starts = [window.start.date().isoformat() for window in windows]
+        # January is only partly requested, so it is split by day
+        assert starts[:2] == ["2025-01-15", "2025-01-16"]
+        assert "2025-02-01" in starts and "2025-02-02" not in starts
+        assert starts[-3:] == ["2025-03-01", "2025-03-02", "2025-03-03"]
+        assert windows[-1].end == datetime(2025, 3, 4, tzinfo=timezone.utc)
+
+    def test_monthly_granularity_splits_on_month_boundaries(self):
+        windows = split_windows(
+            datetime(2025, 1, 1, tzinfo=timezone.utc),
+            datetime(2025, 4, 1, tzinfo=timezone.utc),
+            "MONTHLY",
+            datetime(2025, 3, 15, tzinfo=timezone.utc),
+        )
+
+        assert [window.start.month for window in windows] == [1, 2, 3]
+
+    def test_merge_sums_each_group_across_windows(self):
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        end = datetime(2025, 3, 1, tzinfo=timezone.utc)
+        items = [
+            {
+                "service": "Compute",
+                "currency": "USD",
+                "unit": None,
+                "computed_amount": 1.5,
+                "attributed_cost": "2.5",
+                "discount": 0.1,
+                "time_usage_started": "2025-01-01T00:00:00+00:00",
+            },
+            {
+                "service": "Compute",
+                "currency": "USD",
+                "unit": None,
+                "computed_amount": 2.0,
+                "attributed_cost": "1.0",
+                "discount": 0.2,
+                "time_usage_started": "2025-02-01T00:00:00+00:00",
+            },
+            {
+                "service": "Database",
+                "currency": "USD",
+                "unit": None,
+                "computed_amount": 4.0,
+                "time_usage_started": "2025-01-01T00:00:00+00:00",
+            },
+        ]
+
+        merged = merge_aggregated_usages(items, ["service"], start, end)
+
+        assert len(merged) == 2
+        compute = next(item for item in merged if item["service"] == "Compute")
+        assert compute["computed_amount"] == 3.5
+        assert compute["attributed_cost"] == "3.5"
+        assert compute["discount"] is None
+        assert compute["time_usage_started"] == start.isoformat()
+        assert compute["time_usage_ended"] == end.isoformat()